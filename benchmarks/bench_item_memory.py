@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Память на объект плана (комнаты, приборы, мебель, проёмы).
+
+    python benchmarks/bench_item_memory.py [--count 5000] [--kind room,device,furniture,opening]
+
+Каждый вид — в отдельном процессе: создаётся --count объектов (без сцены, чтобы не мерить
+индексы), прирост RSS делится на число объектов; отдельно — Python-объекты по tracemalloc.
+Затем один кадр рисования всех объектов: сколько памяти остаётся после paint.
+Без дисплея используйте QT_QPA_PLATFORM=offscreen.
+"""
+from __future__ import annotations
+import os, sys, json, argparse, subprocess, tracemalloc, gc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KINDS = ("room", "device", "furniture", "opening")
+
+def _rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def _make(kind: str, i: int):
+    from PySide6.QtCore import QRectF
+    from files.models import ItemProps
+    from files.items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
+    if kind == "room":
+        return RoomItem(ItemProps(f"Комната {i}", 300, 200, "", "room"), QRectF(0, 0, 300, 200))
+    if kind == "device":
+        return DeviceItem(ItemProps(f"Прибор {i}", 20, 20, "", "device"), QRectF(0, 0, 20, 20))
+    if kind == "furniture":
+        return FurnitureItem(ItemProps(f"Мебель {i}", 60, 40, "", "furniture"), QRectF(0, 0, 60, 40))
+    return OpeningItem(ItemProps(f"Проём {i}", 80, 10, "", "opening"), QRectF(0, 0, 80, 10),
+                       subtype="door" if i % 2 else "window")
+
+def _child(kind: str, count: int):
+    sys.path.insert(0, ROOT)
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QApplication, QStyleOptionGraphicsItem
+    app = QApplication(sys.argv[:1])
+    warm = [_make(kind, -1)]   # первый объект тянет импорты и кэши — не в счёт
+    img = QImage(64, 64, QImage.Format_ARGB32_Premultiplied)
+    p = QPainter(img); warm[0].paint(p, QStyleOptionGraphicsItem()); p.end()
+    gc.collect()
+    rss0 = _rss()
+    tracemalloc.start()
+    items = [_make(kind, i) for i in range(count)]
+    for i, it in enumerate(items):
+        it.set_view_mode("dim" if i % 3 == 0 else "active_bright")   # как после apply_layer_state
+    py_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    gc.collect()
+    rss1 = _rss()
+    opt = QStyleOptionGraphicsItem()
+    p = QPainter(img)
+    for it in items:
+        it.paint(p, opt)
+    p.end()
+    gc.collect()
+    rss2 = _rss()
+    print(json.dumps({"kind": kind, "count": count, "rss": (rss1 - rss0) / count,
+                      "python": py_bytes / count, "after_paint": (rss2 - rss0) / count}))
+    del app
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=5000)
+    ap.add_argument("--kind", default=",".join(KINDS))
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(args.child, args.count)
+        return
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    print(f"{'вид':<12}{'RSS, Б/объект':>16}{'Python, Б/объект':>19}{'после paint':>14}")
+    for kind in args.kind.split(","):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", kind, "--count", str(args.count)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{kind:<12}{r['rss']:>16.0f}{r['python']:>19.0f}{r['after_paint']:>14.0f}")
+
+if __name__ == "__main__":
+    main()
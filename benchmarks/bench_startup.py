@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Время запуска редактора до первого кадра.
+
+    python benchmarks/bench_startup.py [--runs 5] [--project plan.sh]
+
+Каждый прогон — отдельный процесс (холодный импорт). Без дисплея
+используйте QT_QPA_PLATFORM=offscreen.
+"""
+from __future__ import annotations
+import os, sys, json, time, argparse, statistics, subprocess, tempfile
+
+T0 = time.perf_counter()
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _child(project: str | None):
+    sys.path.insert(0, ROOT)
+    # не в папке проекта: редактор пишет автосейв в рабочую папку
+    os.chdir(tempfile.mkdtemp(prefix="smarthome-bench-"))
+    marks = {}
+    from PySide6.QtCore import QObject, QEvent, QTimer
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    marks["qt_app"] = time.perf_counter() - T0
+    from smarthome_editor import MainWindow
+    marks["import"] = time.perf_counter() - T0
+    win = MainWindow()
+    marks["construct"] = time.perf_counter() - T0
+    if project:
+        with open(project, "r", encoding="utf-8") as f:
+            win.load_data_async(json.load(f))
+
+    class _FirstPaint(QObject):
+        def eventFilter(self, obj, ev):
+            if ev.type() == QEvent.Paint and "first_frame" not in marks:
+                # кадр готов после возврата из paintEvent
+                QTimer.singleShot(0, self._done)
+            return False
+        def _done(self):
+            if "first_frame" not in marks:
+                marks["first_frame"] = time.perf_counter() - T0
+            # ждём, пока достроятся отложенные панели
+            if getattr(win, "palette", True) is None or getattr(win, "props_panel", True) is None:
+                QTimer.singleShot(1, self._done)
+                return
+            marks["panels_ready"] = time.perf_counter() - T0
+            QTimer.singleShot(0, app.quit)
+
+    f = _FirstPaint()
+    win.view.viewport().installEventFilter(f)
+    win.show()
+    app.exec()
+    print(json.dumps(marks))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--project", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(args.project)
+        return
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    runs = []
+    for _ in range(args.runs):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child"]
+        if args.project:
+            cmd += ["--project", os.path.abspath(args.project)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    print(f"{'этап':<12}{'медиана, мс':>14}{'мин, мс':>12}")
+    for key in ("qt_app", "import", "construct", "first_frame", "panels_ready"):
+        vals = [r[key] * 1000 for r in runs if key in r]
+        if vals:
+            print(f"{key:<12}{statistics.median(vals):>14.1f}{min(vals):>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,61 @@
-from .utils import *
-from .models import ItemProps, Mode, Layer
-from .items import ResizeHandle, PlanRectItem, RoomItem, DeviceItem, FurnitureItem
-from .state import SceneState
-from .factory import ItemFactory
-from .scene import PlanScene, PlanView
-from .palette import make_icon, make_category_icon, PreviewTile, PalettePanel
-from .hud import LayersHUD
-from .undo import UndoManager
-from .items import OpeningItem
-from .scene import PlanScene, Mode, SCENE_W, SCENE_H
-from .undo import UndoManager
-from .palette import PalettePanel
-from .properties import PropertyPanel   # ← ВАЖНО
-from .models import Layer
+"""
+Модули редактора. Имена отдаются лениво (PEP 562): `import files` ничего не тянет,
+подмодуль импортируется при первом обращении к его имени.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "ItemProps": "models", "Mode": "models", "Layer": "models",
+    "ResizeHandle": "items", "PlanRectItem": "items", "RoomItem": "items",
+    "DeviceItem": "items", "FurnitureItem": "items", "OpeningItem": "items",
+    "SceneState": "state",
+    "ItemFactory": "factory",
+    "PlanScene": "scene", "PlanView": "scene",
+    "make_icon": "palette", "make_category_icon": "palette",
+    "PreviewTile": "palette", "PalettePanel": "palette", "CatalogModel": "palette", "CatalogView": "palette",
+    "Catalog": "catalog", "CatalogRow": "catalog",
+    "LayersHUD": "hud", "MinimapHUD": "hud",
+    "UndoManager": "undo",
+    "WallIndex": "walls",
+    "WallTopology": "topology", "WallSegment": "topology",
+    "GuideIndex": "guides",
+    "ProjectReader": "loader",
+    "RecentCache": "recent", "recent_cache": "recent",
+    "PropertyPanel": "properties",
+    "validate_scene": "validate", "Issue": "validate",
+    "ValidationPanel": "validation_panel",
+    "SearchIndex": "search", "SearchPanel": "search_panel",
+    "RoomChildrenModel": "room_contents", "RoomChildrenProxy": "room_contents",
+    "export_scene": "export",
+    "CoverageMap": "coverage", "CoverageOverlay": "coverage",
+    "NavGraph": "navgraph", "Route": "navgraph",
+    "CableRouter": "routing", "CableOverlay": "routing", "Cable": "routing",
+    "CollabSession": "collab",
+    "ArrayDialog": "array_tool", "ArrayGhost": "array_tool", "array_positions": "array_tool", "place_array": "array_tool",
+    "Change": "diff", "Conflict": "diff", "DiffOverlay": "diff",
+    "SegmentBVH": "visibility", "VisibilityEngine": "visibility", "VisibilityOverlay": "visibility",
+}
 
 __all__ = [
     "PlanScene", "Mode", "SCENE_W", "SCENE_H",
     "PlanView", "UndoManager", "PalettePanel",
     "PropertyPanel", "Layer", "FurnitureItem", "OpeningItem",
-]
\ No newline at end of file
+]
+
+def __getattr__(name: str):
+    mod = _EXPORTS.get(name)
+    if mod is None:
+        # константы и хелперы utils (раньше шли через `from .utils import *`)
+        if name.startswith("_"):
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        utils = import_module(".utils", __name__)
+        if not hasattr(utils, name):
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        value = getattr(utils, name)
+    else:
+        value = getattr(import_module("." + mod, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | set(__all__))
@@ -0,0 +1,225 @@
+"""
+Массив: прибор или мебель из каталога рядами × столбцами внутри комнаты.
+
+Позиции считаются разом (NumPy, без него — списками): сетка по центру комнаты и целиком
+внутри неё; ряды и столбцы, которые не помещаются, отбрасываются. Предпросмотр — один «призрак»
+поверх комнаты, который рисует все прямоугольники одним вызовом, поэтому сотни копий не
+тормозят перерасчёт при каждом щелчке счётчика. Вставка — одна пачка через
+SceneState.insert_records, в историю — одна запись.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtWidgets import (QDialog, QFormLayout, QComboBox, QSpinBox, QDialogButtonBox, QLabel,
+                               QGraphicsItem, QCheckBox)
+from .items import RoomItem
+from .models import new_uid
+from .styles import item_style
+from .utils import PX_GRID
+
+try:
+    import numpy as np
+except ImportError:   # NumPy необязателен: без него те же позиции считаются списками
+    np = None
+
+MAX_INSTANCES = 2000      # больше за раз не вставляем: план станет неповоротливым
+MAX_SIDE = 100            # рядов/столбцов в счётчиках
+
+# ---- позиции ----
+def fill_counts(room_w: float, room_h: float, w: float, h: float, gap_x: float, gap_y: float,
+                margin: float = 0.0) -> Tuple[int, int]:
+    """(ряды, столбцы), которые помещаются в комнату с зазорами gap и отступом margin от стен."""
+    def n(extent: float, size: float, gap: float) -> int:
+        free = extent - 2 * margin - size
+        return 1 if free < 0 else int((free + 1e-6) // (size + gap)) + 1   # допуск — на округление float
+    return n(room_h, h, gap_y), n(room_w, w, gap_x)
+
+def array_positions(room_w: float, room_h: float, w: float, h: float, rows: int, cols: int,
+                    gap_x: float, gap_y: float, margin: float = 0.0, grid: Optional[float] = None):
+    """
+    Левые верхние углы объектов w × h (в координатах комнаты): не больше rows × cols и не
+    больше, чем помещается (fill_counts), так что копии не перекрываются. Сетка по центру,
+    целиком внутри комнаты с отступом margin; grid — начало сетки на узел сетки плана.
+    NumPy — массив (N, 2), без него — список пар; порядок — по рядам.
+    """
+    fit_rows, fit_cols = fill_counts(room_w, room_h, w, h, gap_x, gap_y, margin)
+    rows, cols = min(rows, fit_rows), min(cols, fit_cols)
+    def start(n: int, size: float, step: float, extent: float) -> float:
+        span = (n - 1) * step + size
+        s = (extent - span) / 2
+        if grid:
+            s = round(s / grid) * grid
+        # сдвигаем всю сетку, а не отдельные копии: после снапа она не вылезет за стену
+        return min(max(s, margin), max(margin, extent - margin - span))
+    sx, sy = w + gap_x, h + gap_y
+    x0, y0 = start(cols, w, sx, room_w), start(rows, h, sy, room_h)
+    if np is None:
+        return [(x0 + i * sx, y0 + j * sy) for j in range(rows) for i in range(cols)]
+    gx, gy = np.meshgrid(x0 + np.arange(cols) * sx, y0 + np.arange(rows) * sy)
+    return np.column_stack((gx.ravel(), gy.ravel()))
+
+# ---- предпросмотр ----
+class ArrayGhost(QGraphicsItem):
+    """Все копии массива одним объектом сцены: один paint, один drawRects."""
+    def __init__(self):
+        super().__init__()
+        self.setZValue(1e6)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self._rects: List[QRectF] = []
+        self._bounds = QRectF()
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def set_positions(self, room: RoomItem, positions, w: float, h: float):
+        self.setPos(room.scenePos())
+        rects = [QRectF(float(x), float(y), w, h) for x, y in positions]
+        bounds = QRectF()
+        if rects:
+            # позиции не левее и не выше 0; объект крупнее комнаты вылезает только вправо/вниз
+            right = max(r.right() for r in rects)
+            bottom = max(r.bottom() for r in rects)
+            bounds = room.rect().united(QRectF(0, 0, right, bottom)).adjusted(-2, -2, 2, 2)
+        if bounds != self._bounds:
+            self.prepareGeometryChange()
+            self._bounds = bounds
+        self._rects = rects
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        st = item_style("ghost")
+        painter.setPen(st.pen)
+        painter.setBrush(st.brush)
+        painter.drawRects(self._rects)
+
+    def detach(self):
+        if self.scene() is not None:
+            self.scene().removeItem(self)
+
+# ---- вставка ----
+def place_array(scene, room: RoomItem, meta: Dict, positions) -> List[object]:
+    """Копии meta в позициях positions (координаты комнаты) одной пачкой и одной записью истории."""
+    section = "furniture" if meta.get("kind") == "furniture" else "devices"
+    w, h = float(meta.get("w", 100)), float(meta.get("h", 50))
+    base = {"name": meta.get("name", "Объект"), "room_id": room.props.uid, "w": w, "h": h,
+            "rot": 0.0, "desc": meta.get("desc", "")}
+    recs = [dict(base, id=new_uid(), x=float(x), y=float(y)) for x, y in positions]
+    if not recs:
+        return []
+    created = scene.state.insert_records(scene, {section: recs})
+    if created:
+        scene.apply_layer_state(created)
+        for it in created:
+            if it.flags() & QGraphicsItem.ItemIsSelectable:
+                it.setSelected(True)
+        scene._push_snapshot("array")
+    return created
+
+class ArrayDialog(QDialog):
+    """Выбор позиции каталога, комнаты и раскладки; предпросмотр на плане обновляется сразу."""
+    def __init__(self, scene, room: Optional[RoomItem] = None, entry: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        from .catalog import catalog
+        self.setWindowTitle("Массив объектов")
+        self.scene = scene
+        self.cat = catalog()
+        self.created: List[object] = []
+        self._positions = []
+        self._ghost = ArrayGhost()
+        scene.addItem(self._ghost)
+
+        form = QFormLayout(self)
+        self.cb_item = QComboBox()
+        for i in self.cat.query(section="devices") + self.cat.query(section="furniture"):
+            r = self.cat.rows[i]
+            self.cb_item.addItem(f"{r.name}  ({r.w:.0f} × {r.h:.0f})", i)
+        if entry is not None and self.cb_item.findData(entry) >= 0:
+            self.cb_item.setCurrentIndex(self.cb_item.findData(entry))
+        self.cb_room = QComboBox()
+        rooms = sorted((it for it in scene.items() if isinstance(it, RoomItem) and not it._is_preview),
+                       key=lambda r: r.props.name)
+        for r in rooms:
+            self.cb_room.addItem(r.props.name, r.props.uid)
+        if room is not None and self.cb_room.findData(room.props.uid) >= 0:
+            self.cb_room.setCurrentIndex(self.cb_room.findData(room.props.uid))
+        self.chk_fill = QCheckBox("Заполнить комнату")
+        self.chk_fill.setToolTip("Ряды и столбцы — сколько поместится с заданными зазорами")
+        self.sp_rows, self.sp_cols = self._spin(1, MAX_SIDE, 2), self._spin(1, MAX_SIDE, 3)
+        self.sp_gap_x, self.sp_gap_y = self._spin(0, 2000, PX_GRID * 2), self._spin(0, 2000, PX_GRID * 2)
+        self.sp_margin = self._spin(0, 1000, 0)
+        self.lbl_info = QLabel()
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        form.addRow("Объект:", self.cb_item)
+        form.addRow("Комната:", self.cb_room)
+        form.addRow("", self.chk_fill)
+        form.addRow("Рядов:", self.sp_rows)
+        form.addRow("Столбцов:", self.sp_cols)
+        form.addRow("Зазор по X:", self.sp_gap_x)
+        form.addRow("Зазор по Y:", self.sp_gap_y)
+        form.addRow("Отступ от стен:", self.sp_margin)
+        form.addRow(self.lbl_info)
+        form.addRow(self.buttons)
+
+        for cb in (self.cb_item, self.cb_room):
+            cb.currentIndexChanged.connect(self._refresh)
+        self.chk_fill.toggled.connect(self._refresh)
+        for sp in (self.sp_rows, self.sp_cols, self.sp_gap_x, self.sp_gap_y, self.sp_margin):
+            sp.valueChanged.connect(self._refresh)
+        self.finished.connect(lambda _: self._ghost.detach())
+        self._refresh()
+
+    @staticmethod
+    def _spin(lo: int, hi: int, value: int) -> QSpinBox:
+        sp = QSpinBox()
+        sp.setRange(lo, hi)
+        sp.setValue(value)
+        return sp
+
+    def room(self) -> Optional[RoomItem]:
+        room = self.scene.item_by_id(self.cb_room.currentData())
+        return room if isinstance(room, RoomItem) else None
+
+    def meta(self) -> Optional[Dict]:
+        i = self.cb_item.currentData()
+        return None if i is None else self.cat.entry(i)
+
+    def _refresh(self):
+        room, meta = self.room(), self.meta()
+        ok = room is not None and meta is not None
+        if ok:
+            w, h = float(meta.get("w", 100)), float(meta.get("h", 50))
+            rw, rh = room.rect().width(), room.rect().height()
+            gx, gy, m = self.sp_gap_x.value(), self.sp_gap_y.value(), self.sp_margin.value()
+            fill = self.chk_fill.isChecked()
+            if fill:
+                rows, cols = fill_counts(rw, rh, w, h, gx, gy, m)
+                for sp, v in ((self.sp_rows, rows), (self.sp_cols, cols)):
+                    sp.blockSignals(True); sp.setValue(min(v, MAX_SIDE)); sp.blockSignals(False)
+            else:
+                rows, cols = self.sp_rows.value(), self.sp_cols.value()
+            self.sp_rows.setEnabled(not fill)
+            self.sp_cols.setEnabled(not fill)
+            if rows * cols > MAX_INSTANCES:
+                self._positions = []
+                self.lbl_info.setText(f"Слишком много копий: {rows * cols} (не больше {MAX_INSTANCES})")
+                ok = False
+            else:
+                grid = PX_GRID if self.scene.snap_to_grid else None
+                self._positions = array_positions(rw, rh, w, h, rows, cols, gx, gy, m, grid)
+                n = len(self._positions)
+                lost = rows * cols - n
+                self.lbl_info.setText(f"Копий: {n}" + (f" (не поместилось: {lost})" if lost else ""))
+            self._ghost.set_positions(room, self._positions, w, h)
+        else:
+            self._positions = []
+            self.lbl_info.setText("Нет комнаты или объекта каталога")
+        self.buttons.button(QDialogButtonBox.Ok).setEnabled(ok and len(self._positions) > 0)
+
+    def accept(self):
+        room, meta = self.room(), self.meta()
+        self._ghost.detach()
+        if room is not None and meta is not None:
+            self.created = place_array(self.scene, room, meta, self._positions)
+        super().accept()
@@ -0,0 +1,230 @@
+"""
+Каталог палитры: файлы *.jsonl в папке catalog/ (одна позиция на строку) и индекс по ним.
+
+Индекс — строка на позицию: файл, смещение строки, раздел палитры, название, категория,
+размер. Он кэшируется на диске и при загрузке пересобирается только для файлов, у которых
+изменились mtime или размер. Сама позиция (описание, иконка, прочие поля) читается из файла
+по смещению, когда понадобилась, — например, когда строка списка стала видна.
+"""
+from __future__ import annotations
+import os, json, hashlib
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+from .utils import APP_DIR
+from .search import normalize, trigrams
+
+CATALOG_DIR = os.path.join(APP_DIR, "catalog")
+INDEX_VERSION = 1
+ENTRY_CACHE = 512          # разобранных позиций в памяти
+
+PALETTE_SECTIONS = ("rooms", "devices", "furniture")
+SECTION_OF_KIND = {"room": "rooms", "opening": "rooms", "device": "devices", "furniture": "furniture"}
+
+class CatalogRow(NamedTuple):
+    file: int          # индекс в Catalog.files
+    offset: int        # смещение строки в файле
+    section: str
+    name: str
+    category: str
+    w: float
+    h: float
+
+def cache_dir() -> str:
+    from PySide6.QtCore import QStandardPaths
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation) or os.path.expanduser("~/.cache")
+    return os.path.join(base, "SmartHome", "catalog")
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def index_file(path: str) -> List[List]:
+    """Строки индекса одного файла: [смещение, раздел, название, категория, w, h]. Битые строки пропускаются."""
+    rows: List[List] = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                meta = json.loads(line.decode("utf-8"))
+                section = SECTION_OF_KIND.get(meta.get("kind", "device"))
+                if section is None:
+                    continue
+                rows.append([start, section, str(meta.get("name", "")), str(meta.get("category", "")),
+                             float(meta.get("w", 100)), float(meta.get("h", 100))])
+            except (ValueError, TypeError, AttributeError):
+                continue
+    return rows
+
+class Catalog:
+    """
+    Каталог из папки: load() — индекс (из кэша или пересборкой изменившихся файлов),
+    query() — поиск по названию, разделу, категории и габаритам, entry() — позиция целиком.
+    """
+    def __init__(self, directory: str = CATALOG_DIR, cache_path: Optional[str] = None):
+        self.directory = directory
+        if cache_path is None:
+            tag = hashlib.sha1(os.path.abspath(directory).encode("utf-8")).hexdigest()[:16]
+            cache_path = os.path.join(cache_dir(), f"index-{tag}.json")
+        self.cache_path = cache_path
+        self.files: List[str] = []
+        self.rows: List[CatalogRow] = []
+        self.reindexed = 0                     # файлов пересобрано при последней загрузке
+        self._stamps: List[Optional[List[int]]] = []
+        self._names: List[str] = []
+        self._grams: Optional[Dict[str, List[int]]] = None
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # ---- индекс ----
+    def _scan(self) -> List[str]:
+        try:
+            return sorted(n for n in os.listdir(self.directory) if n.endswith(".jsonl"))
+        except OSError:
+            return []
+
+    def stale(self) -> bool:
+        """Файлы каталога поменялись с последней загрузки (stat каждого файла, без чтения)."""
+        if self._scan() != self.files:
+            return True
+        return any(_stamp(os.path.join(self.directory, n)) != s for n, s in zip(self.files, self._stamps))
+
+    def load(self) -> "Catalog":
+        cached: Dict[str, Dict] = {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                blob = json.load(f)
+            if blob.get("version") == INDEX_VERSION:
+                cached = blob.get("files", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        self.files, self._stamps, self.rows = self._scan(), [], []
+        self.reindexed = 0
+        out: Dict[str, Dict] = {}
+        for fi, name in enumerate(self.files):
+            path = os.path.join(self.directory, name)
+            stamp = _stamp(path)
+            entry = cached.get(name)
+            if entry is None or entry.get("stamp") != stamp:
+                try:
+                    entry = {"stamp": stamp, "rows": index_file(path)}
+                except OSError:
+                    entry = {"stamp": stamp, "rows": []}
+                self.reindexed += 1
+            out[name] = entry
+            self._stamps.append(stamp)
+            self.rows.extend(CatalogRow(fi, *r) for r in entry["rows"])
+        if self.reindexed or set(cached) != set(out):
+            self._save(out)
+        self._names = [normalize(r.name) for r in self.rows]
+        self._grams = None
+        self._entries.clear()
+        return self
+
+    def _save(self, files: Dict[str, Dict]):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "files": files}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass   # без кэша каталог просто соберётся заново в следующий раз
+
+    # ---- позиции ----
+    def entry(self, i: int) -> Dict:
+        """Позиция целиком (как meta для перетаскивания на план). Читается по смещению и кэшируется."""
+        meta = self._entries.get(i)
+        if meta is not None:
+            self._entries.move_to_end(i)
+            return meta
+        row = self.rows[i]
+        path = os.path.join(self.directory, self.files[row.file])
+        try:
+            with open(path, "rb") as f:
+                f.seek(row.offset)
+                meta = json.loads(f.readline().decode("utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        if not isinstance(meta, dict):
+            meta = {}
+        meta.setdefault("name", row.name)
+        meta.setdefault("w", row.w)
+        meta.setdefault("h", row.h)
+        icon = meta.get("icon")
+        if icon and not os.path.isabs(icon):
+            local = os.path.join(self.directory, icon)   # иконки каталога поставщика — рядом с ним
+            if os.path.exists(local):
+                meta["icon"] = local
+        self._entries[i] = meta
+        if len(self._entries) > ENTRY_CACHE:
+            self._entries.popitem(last=False)
+        return meta
+
+    def categories(self, section: Optional[str] = None) -> List[str]:
+        seen = {r.category for r in self.rows if r.category and (section is None or r.section == section)}
+        return sorted(seen, key=normalize)
+
+    # ---- поиск ----
+    def _gram_index(self) -> Dict[str, List[int]]:
+        if self._grams is None:
+            grams: Dict[str, List[int]] = {}
+            for i, name in enumerate(self._names):
+                for g in trigrams(name):
+                    grams.setdefault(g, []).append(i)
+            self._grams = grams
+        return self._grams
+
+    def query(self, text: str = "", section: Optional[str] = None, category: Optional[str] = None,
+              max_w: Optional[float] = None, max_h: Optional[float] = None) -> List[int]:
+        """
+        Номера позиций в порядке каталога: в названии есть все слова text, раздел и категория
+        совпадают, габариты не больше max_w × max_h (в любом повороте).
+        """
+        words = normalize(text).split()
+        cand = None
+        long_words = [w for w in words if len(w) >= 3]
+        if long_words:
+            grams = self._gram_index()
+            for w in long_words:
+                for g in trigrams(w):
+                    bucket = grams.get(g)
+                    if not bucket:
+                        return []
+                    cand = set(bucket) if cand is None else cand.intersection(bucket)
+            pool = sorted(cand)
+        else:
+            pool = range(len(self.rows))
+        out = []
+        for i in pool:
+            r = self.rows[i]
+            if section is not None and r.section != section:
+                continue
+            if category and r.category != category:
+                continue
+            if max_w is not None or max_h is not None:
+                bw, bh = max_w or float("inf"), max_h or float("inf")
+                if not ((r.w <= bw and r.h <= bh) or (r.h <= bw and r.w <= bh)):
+                    continue
+            if words and not all(w in self._names[i] for w in words):
+                continue
+            out.append(i)
+        return out
+
+_catalog: Optional[Catalog] = None
+
+def catalog() -> Catalog:
+    """Каталог приложения (папка catalog/); перечитывается, если файлы поменялись."""
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog().load()
+    elif _catalog.stale():
+        _catalog.load()
+    return _catalog
@@ -0,0 +1,156 @@
+"""
+Копирование, вставка и дублирование выделенного.
+
+В буфер обмена уходят записи объектов в формате файла проекта: выделенные комнаты
+вместе с приборами, мебелью и проёмами на их стенах. Вставка — одна пачка через
+SceneState.insert_records с новыми id: группа комнат сдвигается целиком одним проходом
+поиска свободного места (а не раздвиганием каждой комнаты), в историю — одна запись.
+"""
+from __future__ import annotations
+import json
+from typing import Dict, List, Optional
+from PySide6.QtCore import QByteArray, QMimeData, QPointF, QRectF
+from PySide6.QtGui import QGuiApplication
+from PySide6.QtWidgets import QGraphicsItem
+from .models import new_uid
+from .items import RoomItem, DeviceItem, FurnitureItem, PlanRectItem
+from .undo import SECTIONS
+from .guides import item_scene_rect
+from .utils import CANVAS_MAX, EPS, PX_GRID, snap, _scene_rect_of_item, _rects_overlap_strict
+
+MIME_TYPE = "application/x-smarthome-items"
+PASTE_STEP = 2 * PX_GRID       # вставка без точки и дублирование — со сдвигом
+FREE_SPOT_TRIES = 64
+
+# ---- выделение -> записи ----
+def copy_items(scene, items) -> Optional[Dict]:
+    """Записи объектов items (комнаты — с содержимым и проёмами) и левый верхний угол копии."""
+    st = scene.state
+    items = [it for it in items if isinstance(it, PlanRectItem) and not it._is_preview]
+    rooms = {it for it in items if isinstance(it, RoomItem)}
+    todo = list(items)
+    for room in rooms:
+        todo.extend(ch for ch in room.childItems() if isinstance(ch, (DeviceItem, FurnitureItem)))
+    todo.extend(op for op in scene._openings if op.anchor_room in rooms)
+    picked: Dict[str, tuple] = {}
+    origin = QRectF()
+    for it in todo:
+        entry = st.record_of(it)
+        if entry is None or it.props.uid in picked:
+            continue
+        picked[it.props.uid] = entry
+        origin = origin.united(item_scene_rect(it))   # у приборов pos() — в координатах комнаты
+    if not picked:
+        return None
+    data: Dict = {s: [] for s in SECTIONS}
+    for section, rec in picked.values():
+        data[section].append(rec)
+    data["origin"] = [origin.left(), origin.top()]
+    return data
+
+def set_clipboard(data: Dict):
+    mime = QMimeData()
+    mime.setData(MIME_TYPE, QByteArray(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+    QGuiApplication.clipboard().setMimeData(mime)
+
+def clipboard_data() -> Optional[Dict]:
+    mime = QGuiApplication.clipboard().mimeData()
+    if mime is None or not mime.hasFormat(MIME_TYPE):
+        return None
+    try:
+        data = json.loads(bytes(mime.data(MIME_TYPE).data()).decode("utf-8"))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+# ---- записи -> сцена ----
+def _free_offset(scene, rooms: List[Dict], dx: float, dy: float):
+    """
+    Сдвиг группы комнат, при котором ни одна не перекрывает комнаты плана. Группа целиком
+    уходит вправо за мешающие комнаты; не нашлось места — под весь план.
+    """
+    left = min(r["x"] for r in rooms)
+    top = min(r["y"] for r in rooms)
+    dx, dy = max(dx, -left), max(dy, -top)   # не левее и не выше холста
+    start_dx = dx
+    for _ in range(FREE_SPOT_TRIES):
+        right_edge = None
+        for r in rooms:
+            rect = QRectF(r["x"] + dx, r["y"] + dy, r["w"], r["h"])
+            for it in scene.items(rect):
+                if isinstance(it, RoomItem) and not it._is_preview:
+                    b = _scene_rect_of_item(it)
+                    if _rects_overlap_strict(rect, b):
+                        right_edge = b.right() if right_edge is None else max(right_edge, b.right())
+        if right_edge is None:
+            return dx, dy
+        dx = right_edge - left
+        if scene.snap_to_grid:
+            dx = snap(dx + PX_GRID / 2 - EPS, PX_GRID)   # к сетке, но не внутрь соседа
+        if left + dx > CANVAS_MAX:
+            break
+    return start_dx, scene.content_rect().bottom() - top
+
+def _local_delta(room: RoomItem, dx: float, dy: float):
+    """Сдвиг сцены (dx, dy) в координатах комнаты."""
+    d = room.mapFromScene(QPointF(dx, dy)) - room.mapFromScene(QPointF(0.0, 0.0))
+    return d.x(), d.y()
+
+def _shift_child(rec: Dict, room: RoomItem, dx: float, dy: float) -> Dict:
+    """Прибор/мебель в существующую комнату: сдвиг сцены (dx, dy), прижатый внутрь комнаты."""
+    dx, dy = _local_delta(room, dx, dy)
+    w, h = rec["w"], rec["h"]
+    x = min(max(rec["x"] + dx, 0.0), max(0.0, room.rect().width() - w))
+    y = min(max(rec["y"] + dy, 0.0), max(0.0, room.rect().height() - h))
+    return dict(rec, x=x, y=y)
+
+def _shift_opening(rec: Dict, room: RoomItem, dx: float, dy: float) -> Dict:
+    """Проём на стену существующей комнаты: сдвиг вдоль стены."""
+    dx, dy = _local_delta(room, dx, dy)
+    along = dx if rec.get("edge", "T") in ("T", "B") else dy
+    wall = room.rect().width() if rec.get("edge", "T") in ("T", "B") else room.rect().height()
+    offset = min(max(float(rec.get("offset", 0.0)) + along, 0.0), max(0.0, wall - float(rec.get("length", 80))))
+    return dict(rec, offset=offset)
+
+def paste(scene, data: Dict, at: Optional[QPointF] = None) -> List[object]:
+    """
+    Вставляет копию data: левым верхним углом в точку at (или со сдвигом PASTE_STEP).
+    Всё получает новые id; приборы и проёмы выделенных без комнаты объектов попадают в ту же
+    комнату, если она ещё есть. Возвращает созданные объекты.
+    """
+    ox, oy = data.get("origin") or (0.0, 0.0)
+    if at is None:
+        dx = dy = PASTE_STEP
+    else:
+        dx, dy = at.x() - ox, at.y() - oy
+        if scene.snap_to_grid:
+            dx, dy = snap(dx, PX_GRID), snap(dy, PX_GRID)
+    rooms = [r for r in data.get("rooms", []) if "id" in r]
+    if rooms:
+        dx, dy = _free_offset(scene, rooms, dx, dy)
+    ids = {r["id"]: new_uid() for r in rooms}
+    out: Dict = {"rooms": [dict(r, id=ids[r["id"]], x=r["x"] + dx, y=r["y"] + dy) for r in rooms]}
+    for section in ("devices", "furniture", "openings"):
+        recs = out[section] = []
+        for rec in data.get(section, []):
+            rid = rec.get("room_id")
+            if rid in ids:
+                recs.append(dict(rec, id=new_uid(), room_id=ids[rid]))
+                continue
+            room = scene.item_by_id(rid) if rid else None
+            if not isinstance(room, RoomItem):
+                continue
+            shifted = _shift_opening(rec, room, dx, dy) if section == "openings" else _shift_child(rec, room, dx, dy)
+            recs.append(dict(shifted, id=new_uid()))
+    created = scene.state.insert_records(scene, out)
+    if created:
+        scene.apply_layer_state(created)
+        for it in created:
+            if it.flags() & QGraphicsItem.ItemIsSelectable:
+                it.setSelected(True)
+        scene._push_snapshot("paste")
+    return created
+
+def duplicate(scene, items) -> List[object]:
+    data = copy_items(scene, items)
+    return paste(scene, data) if data else []
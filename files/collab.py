@@ -0,0 +1,291 @@
+"""
+Совместная работа нескольких редакторов над одним планом по TCP.
+
+Один редактор открывает сессию (сервер на порту, по умолчанию только localhost), другие
+подключаются. Обмен — строки JSON: при подключении хост отдаёт снимок плана, дальше
+ходят только операции над объектами (add/remove/move/resize/rename/set) с id объекта.
+Локальные правки копятся и уходят одной пачкой за кадр; хост пересылает пачку остальным.
+
+Конфликты — last-writer-wins по группе полей: у каждой операции метка Лэмпорта
+(счётчик, участник), применяется операция с большей меткой. Удаление — тоже метка:
+правки с меньшей меткой удалённого объекта не воскрешают.
+"""
+from __future__ import annotations
+import json, uuid
+from typing import Dict, List, Optional, Set, Tuple
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtNetwork import QHostAddress, QTcpServer, QTcpSocket
+from shiboken6 import isValid
+from .undo import SECTIONS
+
+COLLAB_PORT = 47820
+FRAME_MS = 16                  # пачка операций — не чаще раза в кадр
+
+# группа полей -> вид операции; поля, не попавшие в группы, идут как "set"
+FIELD_GROUPS = {
+    "move": ("x", "y", "room_id", "edge", "offset", "side"),
+    "resize": ("w", "h", "length", "thickness"),
+    "rename": ("name", "desc"),
+}
+_GROUP_OF = {f: g for g, fields in FIELD_GROUPS.items() for f in fields}
+
+Stamp = Tuple[int, str]        # (счётчик Лэмпорта, участник)
+
+def _group(field: str) -> str:
+    return _GROUP_OF.get(field, "set")
+
+class CollabSession(QObject):
+    """
+    Участник совместной сессии: host() — принять подключения, join() — подключиться.
+    Следит за сценой по её сигналам, применяет чужие операции точечно (SceneState.upsert_record).
+    """
+    statusChanged = Signal(str)
+    applied = Signal(int)      # применено чужих операций в пачке
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.site = uuid.uuid4().hex[:8]
+        self.clock = 0
+        self._stamps: Dict[Tuple[str, str], Stamp] = {}   # (id, группа|"exist") -> метка
+        self._known: Dict[str, Tuple[str, Dict]] = {}     # id -> (секция, запись) — то, что знают все
+        self._touched: Set[object] = set()
+        self._outbox: List[Dict] = []
+        self._applying = False
+        self._server: Optional[QTcpServer] = None
+        self._peers: List[QTcpSocket] = []
+        self._buffers: Dict[QTcpSocket, bytes] = {}
+        self._synced = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FRAME_MS)
+        self._timer.timeout.connect(self.flush)
+        for sig in (scene.itemAdded, scene.itemRemoved, scene.itemChanged, scene.itemRenamed):
+            sig.connect(self._touch)
+
+    # ---- подключение ----
+    @property
+    def is_host(self) -> bool:
+        return self._server is not None
+
+    def peer_count(self) -> int:
+        return len(self._peers)
+
+    def host(self, port: int = COLLAB_PORT, address: str = "127.0.0.1") -> bool:
+        self._snapshot_known()
+        self._synced = True
+        self._server = QTcpServer(self)
+        self._server.newConnection.connect(self._on_new_connection)
+        if not self._server.listen(QHostAddress(address), port):
+            err = self._server.errorString()
+            self._server = None
+            self.statusChanged.emit(f"Не удалось открыть сессию: {err}")
+            return False
+        self.statusChanged.emit(f"Сессия открыта: {address}:{self._server.serverPort()}")
+        return True
+
+    def port(self) -> int:
+        return self._server.serverPort() if self._server else 0
+
+    def join(self, address: str, port: int = COLLAB_PORT):
+        sock = QTcpSocket(self)
+        self._attach(sock)
+        sock.connected.connect(lambda: self.statusChanged.emit(f"Подключено к {address}:{port}"))
+        sock.errorOccurred.connect(lambda *_: self.statusChanged.emit(f"Ошибка соединения: {sock.errorString()}"))
+        sock.connectToHost(address, port)
+
+    def close(self):
+        self.flush()
+        for sig in (self.scene.itemAdded, self.scene.itemRemoved, self.scene.itemChanged, self.scene.itemRenamed):
+            sig.disconnect(self._touch)
+        for sock in list(self._peers):
+            sock.readyRead.disconnect()
+            sock.disconnected.disconnect()
+            sock.disconnectFromHost()
+        self._peers.clear()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        self._timer.stop()
+
+    def _attach(self, sock: QTcpSocket):
+        self._peers.append(sock)
+        self._buffers[sock] = b""
+        sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+        sock.disconnected.connect(lambda s=sock: self._on_disconnected(s))
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            sock = self._server.nextPendingConnection()
+            self._attach(sock)
+            self.flush()   # снимок — после уже отправленных правок
+            self._send(sock, {"hello": self.scene.serialize(), "clock": self.clock,
+                              "stamps": [[k[0], k[1], v[0], v[1]] for k, v in self._stamps.items()]})
+            self.statusChanged.emit(f"Подключился участник (всего: {len(self._peers)})")
+
+    def _on_disconnected(self, sock: QTcpSocket):
+        if not isValid(self):
+            return   # сокеты закрываются при уничтожении сессии вместе с окном
+        if sock in self._peers:
+            self._peers.remove(sock)
+            self._buffers.pop(sock, None)
+            self.statusChanged.emit(f"Участник отключился (осталось: {len(self._peers)})")
+        sock.deleteLater()
+
+    # ---- сеть ----
+    @staticmethod
+    def _send(sock: QTcpSocket, msg: Dict):
+        sock.write(json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    def _on_ready_read(self, sock: QTcpSocket):
+        buf = self._buffers.get(sock, b"") + bytes(sock.readAll().data())
+        *lines, rest = buf.split(b"\n")
+        self._buffers[sock] = rest
+        for line in lines:
+            if not line.strip():
+                continue
+            msg = json.loads(line.decode("utf-8"))
+            if "hello" in msg:
+                self._on_hello(msg)
+            elif "ops" in msg:
+                self.receive(msg["ops"])
+                # хост — ретранслятор: пачка уходит остальным как есть
+                if self.is_host:
+                    for other in self._peers:
+                        if other is not sock:
+                            other.write(line + b"\n")
+
+    def _on_hello(self, msg: Dict):
+        self._applying = True
+        try:
+            self.scene.deserialize(msg["hello"])   # один раз при входе; дальше — только операции
+        finally:
+            self._applying = False
+        self.clock = max(self.clock, int(msg.get("clock", 0)))
+        self._stamps = {(a, b): (int(t), s) for a, b, t, s in msg.get("stamps", [])}
+        self._touched.clear()
+        self._snapshot_known()
+        self._synced = True
+        self.statusChanged.emit("План получен от хоста")
+
+    # ---- локальные правки -> операции ----
+    def _snapshot_known(self):
+        st = self.scene.state
+        self._known = {rec["id"]: (section, rec) for section, rec, _ in st.collect(self.scene)}
+
+    def _touch(self, item):
+        if self._applying or getattr(item, "_is_preview", True):
+            return
+        self._touched.add(item)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _stamp(self) -> Stamp:
+        self.clock += 1
+        return self.clock, self.site
+
+    def _emit_op(self, kind: str, uid: str, section: str, fields: Dict, key: str):
+        ts = self._stamp()
+        self._stamps[(uid, key)] = ts
+        self._outbox.append({"k": kind, "id": uid, "s": section, "f": fields, "t": ts[0], "site": ts[1]})
+
+    def collect_ops(self):
+        """Сравнивает затронутые объекты с известным состоянием и дописывает операции в исходящие."""
+        if not self._synced:
+            return
+        st = self.scene.state
+        touched, self._touched = self._touched, set()
+        entries = []
+        for item in touched:
+            uid = item.props.uid if isValid(item) else None
+            if uid is None:
+                continue
+            alive = item.scene() is self.scene and self.scene.item_by_id(uid) is item
+            entries.append((uid, st.record_of(item) if alive else None))
+        # добавления — комнаты раньше детей, удаления — дети раньше комнат
+        order = {s: i for i, s in enumerate(SECTIONS)}
+        entries.sort(key=lambda e: order[e[1][0] if e[1] else self._known.get(e[0], ("rooms",))[0]])
+        removes = []
+        for uid, entry in entries:
+            known = self._known.get(uid)
+            if entry is None:
+                if known is not None:
+                    removes.append((uid, known[0]))
+                continue
+            section, rec = entry
+            if known is None:
+                self._known[uid] = (section, rec)
+                self._emit_op("add", uid, section, rec, "exist")
+                for g in set(_group(f) for f in rec if f != "id"):
+                    self._stamps[(uid, g)] = self._stamps[(uid, "exist")]
+                continue
+            changed: Dict[str, Dict] = {}
+            for f, v in rec.items():
+                if known[1].get(f) != v:
+                    changed.setdefault(_group(f), {})[f] = v
+            if changed:
+                self._known[uid] = (section, rec)
+                for g, fields in changed.items():
+                    self._emit_op(g, uid, section, fields, g)
+        for uid, section in reversed(removes):
+            del self._known[uid]
+            self._emit_op("remove", uid, section, {}, "exist")
+
+    def flush(self):
+        """Отправить накопленное одной пачкой."""
+        self._timer.stop()
+        self.collect_ops()
+        if not self._outbox:
+            return
+        batch, self._outbox = self._outbox, []
+        for sock in self._peers:
+            self._send(sock, {"ops": batch})
+
+    # ---- чужие операции ----
+    def _newer(self, key: Tuple[str, str], ts: Stamp) -> bool:
+        return ts > self._stamps.get(key, (0, ""))
+
+    def receive(self, ops: List[Dict]) -> int:
+        """Применяет пачку чужих операций к сцене (без полной перезагрузки). Возвращает число применённых."""
+        # свои несброшенные правки — сначала в known/метки, чтобы чужие сравнивались с ними
+        self.collect_ops()
+        st = self.scene.state
+        done = 0
+        self._applying = True
+        try:
+            for op in ops:
+                ts = (int(op["t"]), op["site"])
+                self.clock = max(self.clock, ts[0])
+                uid, section, kind = op["id"], op["s"], op["k"]
+                if kind in ("add", "remove"):
+                    if not self._newer((uid, "exist"), ts):
+                        continue
+                    self._stamps[(uid, "exist")] = ts
+                    if kind == "remove":
+                        self._known.pop(uid, None)
+                        st.remove_record(self.scene, uid)
+                    else:
+                        rec = dict(op["f"])
+                        for g in set(_group(f) for f in rec if f != "id"):
+                            self._stamps[(uid, g)] = ts
+                        if st.upsert_record(self.scene, section, rec) is not None:
+                            self._known[uid] = (section, rec)
+                    done += 1
+                    continue
+                known = self._known.get(uid)
+                if known is None or self._stamps.get((uid, "exist"), (0, "")) > ts:
+                    continue   # объект удалён позже этой правки
+                if not self._newer((uid, kind), ts):
+                    continue   # у нас правка новее — она и останется
+                self._stamps[(uid, kind)] = ts
+                rec = dict(known[1])
+                rec.update(op["f"])
+                if st.upsert_record(self.scene, section, rec) is not None:
+                    self._known[uid] = (section, rec)
+                    done += 1
+        finally:
+            self._applying = False
+        if done:
+            self.applied.emit(done)
+        return done
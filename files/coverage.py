@@ -0,0 +1,265 @@
+"""
+Покрытие Wi-Fi: уровень сигнала роутеров/хабов на растре плана.
+
+Модель — log-distance path loss плюс затухание в каждой пересечённой стене (общая
+стена соседних комнат слабее внешней, проёмы — дыры). Растр разбит на тайлы; поле
+каждого роутера хранится по тайлам, и при сдвиге роутера или стены пересчитываются
+только тайлы, на луч к которым могло повлиять изменение.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, Tuple
+from PySide6.QtCore import Qt, QRectF, QTimer
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QGraphicsObject, QGraphicsItem
+from .items import DeviceItem
+from .utils import PX_PER_METER
+
+try:
+    import numpy as np
+except ImportError:   # без NumPy слой покрытия недоступен (см. CoverageOverlay.available)
+    np = None
+
+ROUTER_NAMES = ("роутер", "хаб")
+COVERAGE_CELL = 20.0       # px сцены на клетку растра
+TILE_CELLS = 32            # тайл — TILE_CELLS × TILE_CELLS клеток
+TX_DBM = 20.0              # мощность передатчика
+PL0_DB = 40.0              # потери на первом метре (2.4 ГГц)
+PATH_EXP = 2.2             # показатель затухания с расстоянием
+WALL_DB = 5.0              # межкомнатная стена
+EXT_WALL_DB = 12.0         # внешняя (несущая) стена
+RANGE_M = 25.0             # дальше роутер не считаем
+FLOOR_DBM = -90.0          # слабее — сигнала нет (прозрачно)
+COVERAGE_Z = 50
+
+# (dBm, RGBA) — опорные цвета шкалы, между ними линейно
+_STOPS = ((-45, (22, 163, 74, 120)), (-60, (132, 204, 22, 120)), (-67, (234, 179, 8, 125)),
+          (-75, (249, 115, 22, 130)), (-85, (239, 68, 68, 135)), (FLOOR_DBM, (153, 27, 27, 135)))
+
+Wall = Tuple[str, float, float, float, bool]   # как walls.cut_openings
+Tile = Tuple[int, int]
+
+def is_router(item) -> bool:
+    return isinstance(item, DeviceItem) and item.props.name.strip().lower().startswith(ROUTER_NAMES)
+
+def _lut():
+    """Цвет по -dBm (индекс 0..255), прозрачно слабее FLOOR_DBM."""
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    db = -np.arange(256, dtype=float)
+    xs = [s[0] for s in reversed(_STOPS)]
+    for ch in range(4):
+        lut[:, ch] = np.interp(db, xs, [s[1][ch] for s in reversed(_STOPS)]).astype(np.uint8)
+    lut[db < FLOOR_DBM, 3] = 0
+    return lut
+
+class CoverageMap:
+    """
+    Растр уровня сигнала (dBm) по тайлам. update() получает текущие роутеры и стены,
+    сравнивает с прошлым вызовом и возвращает тайлы, которые изменились.
+    """
+    def __init__(self, cell: float = COVERAGE_CELL, tile: int = TILE_CELLS):
+        self.cell = float(cell)
+        self.tile = int(tile)
+        self.span = self.cell * self.tile                       # сторона тайла, px сцены
+        self.range_px = RANGE_M * PX_PER_METER
+        self._routers: Dict[object, Tuple[float, float]] = {}
+        self._walls: Set[Wall] = set()
+        self._arrays = None                                     # стены в виде массивов NumPy
+        self._fields: Dict[Tuple[object, Tile], object] = {}    # (роутер, тайл) -> dBm
+        self._tiles: Dict[Tile, object] = {}                    # тайл -> max по роутерам
+
+    def __len__(self) -> int:
+        return len(self._routers)
+
+    def clear(self):
+        self.__init__(self.cell, self.tile)
+
+    # ---- геометрия тайлов ----
+    def tile_rect(self, t: Tile) -> QRectF:
+        return QRectF(t[0] * self.span, t[1] * self.span, self.span, self.span)
+
+    def _reach_box(self, pos) -> Tuple[int, int, int, int]:
+        """Диапазон тайлов (i0, i1, j0, j1) в радиусе действия роутера."""
+        x, y = pos
+        r, s = self.range_px, self.span
+        return max(0, int((x - r) // s)), int((x + r) // s), max(0, int((y - r) // s)), int((y + r) // s)
+
+    def _reach(self, pos) -> Set[Tile]:
+        i0, i1, j0, j1 = self._reach_box(pos)
+        return {(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)}
+
+    def _shadow(self, pos, t: Tile) -> Tuple[float, float, float, float]:
+        """Габарит всех лучей от роутера к клеткам тайла."""
+        x0, y0 = t[0] * self.span, t[1] * self.span
+        return (min(pos[0], x0), min(pos[1], y0), max(pos[0], x0 + self.span), max(pos[1], y0 + self.span))
+
+    # ---- обновление ----
+    def update(self, routers: Dict[object, Tuple[float, float]], walls: List[Wall]) -> Set[Tile]:
+        dirty: Set[Tile] = set()
+        for r in set(self._routers) | set(routers):
+            old, new = self._routers.get(r), routers.get(r)
+            if old == new:
+                continue
+            for pos in (old, new):
+                if pos is not None:
+                    dirty |= self._reach(pos)
+            for key in [k for k in self._fields if k[0] is r]:
+                del self._fields[key]
+        self._routers = dict(routers)
+
+        walls = set(walls)
+        changed = walls ^ self._walls
+        if changed or self._arrays is None:
+            self._walls = walls
+            self._arrays = self._wall_arrays(walls)
+            boxes = [((c, lo, c, hi) if o == "V" else (lo, c, hi, c)) for o, c, lo, hi, _ in changed]
+            for key in list(self._fields):
+                x0, y0, x1, y1 = self._shadow(self._routers[key[0]], key[1])
+                if any(bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0 for bx0, by0, bx1, by1 in boxes):
+                    del self._fields[key]
+                    dirty.add(key[1])
+
+        for t in dirty:
+            best = None
+            for r, pos in self._routers.items():
+                i0, i1, j0, j1 = self._reach_box(pos)
+                if not (i0 <= t[0] <= i1 and j0 <= t[1] <= j1):
+                    continue
+                f = self._fields.get((r, t))
+                if f is None:
+                    f = self._fields[(r, t)] = self._field(pos, t)
+                best = f if best is None else np.maximum(best, f)
+            if best is None or not (best >= FLOOR_DBM).any():
+                self._tiles.pop(t, None)
+            else:
+                self._tiles[t] = best
+        return dirty
+
+    @staticmethod
+    def _wall_arrays(walls):
+        h = [(c, lo, hi, WALL_DB if shared else EXT_WALL_DB) for o, c, lo, hi, shared in walls if o == "H"]
+        v = [(c, lo, hi, WALL_DB if shared else EXT_WALL_DB) for o, c, lo, hi, shared in walls if o == "V"]
+        return (np.asarray(h, dtype=float).reshape(-1, 4), np.asarray(v, dtype=float).reshape(-1, 4))
+
+    def _field(self, pos, t: Tile):
+        """Сигнал роутера в клетках тайла (dBm, массив tile × tile)."""
+        rx, ry = pos
+        k = np.arange(self.tile, dtype=float) + 0.5
+        px = (t[0] * self.tile + k)[None, :] * self.cell
+        py = (t[1] * self.tile + k)[:, None] * self.cell
+        px, py = np.broadcast_arrays(px, py)
+        px, py = px.ravel(), py.ravel()
+        d = np.hypot(px - rx, py - ry)
+        rssi = TX_DBM - PL0_DB - 10.0 * PATH_EXP * np.log10(np.maximum(d / PX_PER_METER, 1.0))
+
+        x0, y0, x1, y1 = self._shadow(pos, t)
+        loss = np.zeros_like(d)
+        h, v = self._arrays
+        # горизонтальная стена y=c пересечена, если c строго между ry и py и x точки пересечения на стене
+        for (a, b, ca, cb, wall) in ((ry, rx, py, px, h[(h[:, 0] > y0) & (h[:, 0] < y1) & (h[:, 2] >= x0) & (h[:, 1] <= x1)]),
+                                     (rx, ry, px, py, v[(v[:, 0] > x0) & (v[:, 0] < x1) & (v[:, 2] >= y0) & (v[:, 1] <= y1)])):
+            if not len(wall):
+                continue
+            c, lo, hi, db = wall[:, 0], wall[:, 1], wall[:, 2], wall[:, 3]
+            den = ca[:, None] - a
+            # den == 0 (луч вдоль стены): s = ±inf/nan и along = nan — такие пары отсекает hit
+            with np.errstate(divide="ignore", invalid="ignore"):
+                s = (c[None, :] - a) / den
+                along = b + s * (cb[:, None] - b)
+            hit = (s > 0) & (s < 1) & (along >= lo[None, :]) & (along <= hi[None, :])
+            loss += hit @ db
+        rssi -= loss
+        rssi[d > self.range_px] = -np.inf
+        return rssi.reshape(self.tile, self.tile).astype(np.float32)
+
+    # ---- запросы ----
+    def tiles(self) -> Dict[Tile, object]:
+        return self._tiles
+
+    def signal_at(self, x: float, y: float) -> Optional[float]:
+        """Уровень сигнала в точке сцены (dBm) или None, если сигнала нет."""
+        i, j = int(x // self.cell), int(y // self.cell)
+        arr = self._tiles.get((i // self.tile, j // self.tile))
+        if arr is None:
+            return None
+        v = float(arr[j % self.tile, i % self.tile])
+        return v if v >= FLOOR_DBM else None
+
+class CoverageOverlay(QGraphicsObject):
+    """
+    Слой теплокарты поверх плана: по тайлу CoverageMap — готовое QImage, рисуются только
+    попавшие в область перерисовки. Пересчёт — по planChanged сцены, не чаще раза в REFRESH_MS.
+    """
+    REFRESH_MS = 150
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def __init__(self, scene):
+        super().__init__()
+        self.map = CoverageMap()
+        self._images: Dict[Tile, QImage] = {}
+        self._bounds = QRectF()
+        self._lut = _lut()
+        self.setZValue(COVERAGE_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._scene = scene
+        scene.addItem(self)
+        scene.planChanged.connect(self.schedule)
+        self.refresh()
+
+    def detach(self):
+        self._scene.planChanged.disconnect(self.schedule)
+        self._timer.stop()
+        self._scene.removeItem(self)
+
+    def schedule(self):
+        # не перезапускаем: во время перетаскивания карта обновляется раз в REFRESH_MS
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def refresh(self) -> Set[Tile]:
+        sc = self._scene
+        routers = {}
+        for it in sc.items():
+            if is_router(it) and not it._is_preview:
+                c = it.mapToScene(it.rect().center())
+                routers[it] = (c.x(), c.y())
+        dirty = self.map.update(routers, sc.solid_walls())
+        tiles = self.map.tiles()
+        area = QRectF()
+        for t in dirty:
+            arr = tiles.get(t)
+            if arr is None:
+                self._images.pop(t, None)
+            else:
+                idx = np.clip(-arr, 0, 255).astype(np.uint8)
+                rgba = np.ascontiguousarray(self._lut[idx])
+                self._images[t] = QImage(rgba.data, self.map.tile, self.map.tile,
+                                         4 * self.map.tile, QImage.Format_RGBA8888).copy()
+            area = area.united(self.map.tile_rect(t))
+        if dirty:
+            bounds = QRectF()
+            for t in self._images:
+                bounds = bounds.united(self.map.tile_rect(t))
+            if bounds != self._bounds:
+                self.prepareGeometryChange()
+                self._bounds = bounds
+            self.update(area)
+        return dirty
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter: QPainter, option, widget=None):
+        exposed = option.exposedRect
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        for t, img in self._images.items():
+            r = self.map.tile_rect(t)
+            if r.intersects(exposed):
+                painter.drawImage(r, img)
@@ -0,0 +1,545 @@
+"""
+Сравнение и трёхстороннее слияние проектов (.sh/.json в схеме SceneState).
+
+Объекты сопоставляются за линейное время по словарям ключей, от точного к грубому:
+постоянный id → геометрия+имя (старые файлы без uid) → имя в той же комнате (остатки
+одноимённых объектов комнаты парами по порядку в файле). Комнаты опознаются первыми: ключ ребёнка включает опознанную
+комнату, поэтому номера комнат старых файлов между файлами сравнивать не нужно.
+
+    python -m files.diff old.sh new.sh
+    python -m files.diff --merge base.sh ours.sh theirs.sh -o merged.sh
+"""
+from __future__ import annotations
+import hashlib, json, sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from PySide6.QtCore import Qt, QRectF, QTimer
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import QGraphicsObject
+from .undo import SECTIONS
+from .guides import item_scene_rect
+from .items import RoomItem
+
+Canon = Tuple        # канонический ключ объекта в пределах сравнения/слияния
+Side = Dict[str, List[Tuple[Canon, Optional[Canon], Dict]]]   # секция -> [(ключ, ключ комнаты, запись)]
+
+# поля, которые сливаются только вместе (иначе x от одной стороны и y от другой)
+_GROUPS = {
+    "rooms": (("x", "y"), ("w", "h")),
+    "devices": (("parent", "x", "y"), ("w", "h")),
+    "furniture": (("parent", "x", "y"), ("w", "h")),
+    "openings": (("parent", "edge", "offset"), ("length", "thickness")),
+}
+# вид изменения по полю
+_KINDS = {"parent": "moved", "x": "moved", "y": "moved", "edge": "moved", "offset": "moved",
+          "w": "resized", "h": "resized", "length": "resized", "thickness": "resized",
+          "name": "renamed"}
+KIND_ORDER = ("added", "removed", "moved", "resized", "renamed", "edited")
+
+@dataclass
+class Change:
+    section: str
+    kinds: Tuple[str, ...]        # из KIND_ORDER, по порядку
+    old: Optional[Dict]           # запись старого файла (None — добавлен)
+    new: Optional[Dict]           # запись нового файла (None — удалён)
+
+    @property
+    def name(self) -> str:
+        return (self.new or self.old).get("name", "")
+
+@dataclass
+class Conflict:
+    section: str
+    id: str                       # id объекта в результате слияния
+    name: str
+    fields: Tuple[str, ...]       # ("delete",) — удалён с одной стороны, изменён с другой
+    base: Optional[Dict]
+    ours: Optional[Dict]
+    theirs: Optional[Dict]
+
+# ---- опознание объектов ----
+def _r(v) -> float:
+    try:
+        return round(float(v), 1)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _lookup_keys(section: str, rec: Dict, parent: Optional[Canon]):
+    """Ключи сопоставления записи: (id, геометрия+имя, имя в комнате)."""
+    uid = rec.get("id")
+    uid = uid if isinstance(uid, str) and uid else None
+    name = rec.get("name", "")
+    if section == "openings":
+        geo = (section, name, rec.get("subtype"), parent, rec.get("edge"), _r(rec.get("offset")), _r(rec.get("length")))
+        loose = (section, name, rec.get("subtype"), parent)
+    else:
+        geo = (section, name, parent, _r(rec.get("x")), _r(rec.get("y")), _r(rec.get("w")), _r(rec.get("h")))
+        loose = (section, name, parent)
+    return uid, geo, loose
+
+class _Pool:
+    """Опознанные объекты одной или нескольких сторон: ключ сопоставления -> канонические ключи."""
+    def __init__(self):
+        self.by: Tuple[Dict, Dict, Dict] = ({}, {}, {})
+
+    def add(self, keys, canon: Canon):
+        for d, k in zip(self.by, keys):
+            d.setdefault(k, []).append(canon)
+
+    def claim(self, level: int, key, taken: set, cursor: Dict) -> Optional[Canon]:
+        lst = self.by[level].get(key)
+        if not lst:
+            return None
+        i = cursor.get((level, key), 0)
+        while i < len(lst) and lst[i] in taken:
+            i += 1
+        cursor[(level, key)] = i + 1
+        if i >= len(lst):
+            return None
+        taken.add(lst[i])
+        return lst[i]
+
+def _identify(data: Dict, pool: Optional[_Pool], tag: str, into: Optional[_Pool] = None) -> Side:
+    """
+    Канонические ключи записей data: опознанные в pool получают его ключ, остальные —
+    новый (tag, секция, номер). into — куда добавить неопознанные (для следующей стороны).
+    """
+    side: Side = {}
+    taken: set = set()
+    cursor: Dict = {}
+    room_canon: Dict[object, Canon] = {}
+    for section in SECTIONS:
+        recs = data.get(section) or []
+        parents, keys = [], []
+        for i, rec in enumerate(recs):
+            parent = None if section == "rooms" else room_canon.get(rec.get("room_id"), ("?", rec.get("room_id")))
+            parents.append(parent)
+            keys.append(_lookup_keys(section, rec, parent))
+        canon: List[Optional[Canon]] = [None] * len(recs)
+        if pool is not None:
+            # уровень за уровнем по всей секции: совпадение по id важнее совпадения по геометрии
+            for level in range(3):
+                for i, k in enumerate(keys):
+                    if canon[i] is None and k[level] is not None:
+                        canon[i] = pool.claim(level, k[level], taken, cursor)
+        out = []
+        for i, rec in enumerate(recs):
+            c = canon[i]
+            if c is None:
+                c = (tag, section, i)
+                if into is not None:
+                    into.add(keys[i], c)
+            out.append((c, parents[i], rec))
+            if section == "rooms":
+                room_canon[rec.get("id", i)] = c
+        side[section] = out
+    return side
+
+def _pool_of(side: Side) -> _Pool:
+    pool = _Pool()
+    for section in SECTIONS:
+        for c, parent, rec in side.get(section, ()):
+            pool.add(_lookup_keys(section, rec, parent), c)
+    return pool
+
+def _norm(parent: Optional[Canon], rec: Dict) -> Dict:
+    out = {k: v for k, v in rec.items() if k not in ("id", "room_id")}
+    out["parent"] = parent
+    return out
+
+def _index(side: Side, section: str) -> Dict[Canon, Tuple[Dict, Dict]]:
+    return {c: (_norm(p, rec), rec) for c, p, rec in side.get(section, ())}
+
+# ---- сравнение ----
+def _compare(section: str, prev: Optional[Tuple[Dict, Dict]], parent: Optional[Canon], rec: Dict) -> Optional[Change]:
+    """Change записи rec против prev = (нормализованная, исходная) старой; None — без изменений."""
+    if prev is None:
+        return Change(section, ("added",), None, rec)
+    n_old, n_new = prev[0], _norm(parent, rec)
+    if n_old == n_new:
+        return None
+    kinds = {_KINDS.get(f, "edited") for f in set(n_old) | set(n_new) if n_old.get(f) != n_new.get(f)}
+    return Change(section, tuple(k for k in KIND_ORDER if k in kinds), prev[1], rec)
+
+def diff(old: Dict, new: Dict) -> List[Change]:
+    """Изменения от old к new: по одному Change на добавленный/удалённый/изменённый объект."""
+    a = _identify(old, None, "a")
+    b = _identify(new, _pool_of(a), "b")
+    out: List[Change] = []
+    for section in SECTIONS:
+        before = _index(a, section)
+        seen = set()
+        for c, parent, rec in b.get(section, ()):
+            seen.add(c)
+            ch = _compare(section, before.get(c), parent, rec)
+            if ch is not None:
+                out.append(ch)
+        for c, (_, rec) in before.items():
+            if c not in seen:
+                out.append(Change(section, ("removed",), rec, None))
+    return out
+
+def summary(changes: List[Change]) -> Dict[str, int]:
+    counts = {k: 0 for k in KIND_ORDER}
+    for ch in changes:
+        for k in ch.kinds:
+            counts[k] += 1
+    return counts
+
+# ---- слияние ----
+def _out_id(c: Canon, *recs) -> str:
+    for rec in recs:
+        if rec is not None and isinstance(rec.get("id"), str) and rec["id"]:
+            return rec["id"]
+    return hashlib.sha1(repr(c).encode("utf-8")).hexdigest()[:32]   # детерминированно для старых файлов
+
+def _merge_fields(section: str, b: Dict, o: Dict, t: Dict, prefer: str):
+    """Слияние по группам полей; возвращает (запись, конфликтные поля)."""
+    grouped = {f for g in _GROUPS[section] for f in g}
+    groups = list(_GROUPS[section]) + [(f,) for f in sorted(set(b) | set(o) | set(t)) if f not in grouped]
+    out, bad = {}, []
+    for g in groups:
+        vb, vo, vt = (tuple(d.get(f) for f in g) for d in (b, o, t))
+        if vo == vt or vt == vb:
+            v = vo
+        elif vo == vb:
+            v = vt
+        else:
+            bad.extend(g)
+            v = vo if prefer == "ours" else vt
+        for f, x in zip(g, v):
+            if x is not None or f in o or f in t:
+                out[f] = x
+    return out, tuple(bad)
+
+def merge(base: Dict, ours: Dict, theirs: Dict, prefer: str = "ours") -> Tuple[Dict, List[Conflict]]:
+    """
+    Трёхстороннее слияние. Непересекающиеся правки берутся с обеих сторон; при конфликте
+    поля побеждает prefer ("ours"/"theirs"), удаление против правки оставляет правку.
+    Возвращает (проект, конфликты).
+    """
+    sb = _identify(base, None, "b")
+    shared = _pool_of(sb)
+    so = _identify(ours, shared, "o", into=shared)   # добавленное в ours опознаётся в theirs
+    st = _identify(theirs, shared, "t")
+
+    merged: Dict[str, Dict[Canon, Tuple[Dict, str]]] = {}
+    conflicts: List[Conflict] = []
+    versions: Dict[str, Tuple[Dict, Dict, Dict]] = {}
+    for section in SECTIONS:
+        ib, io, it = _index(sb, section), _index(so, section), _index(st, section)
+        versions[section] = (ib, io, it)
+        order = list(ib) + [c for c in io if c not in ib] + [c for c in it if c not in ib and c not in io]
+        res: Dict[Canon, Tuple[Dict, str]] = {}
+        for c in order:
+            b, o, t = ib.get(c), io.get(c), it.get(c)
+            raw = (b[1] if b else None, o[1] if o else None, t[1] if t else None)
+            uid = _out_id(c, raw[1], raw[2], raw[0])
+            if o is None and t is None:
+                continue
+            if b is not None and (o is None or t is None):
+                kept = o or t
+                if kept[0] != b[0]:
+                    conflicts.append(Conflict(section, uid, kept[1].get("name", ""), ("delete",), *raw))
+                    res[c] = (dict(kept[0]), uid)
+                continue
+            if o is None or t is None:
+                res[c] = (dict((o or t)[0]), uid)
+                continue
+            rec, bad = _merge_fields(section, b[0] if b else {}, o[0], t[0], prefer)
+            if bad:
+                conflicts.append(Conflict(section, uid, rec.get("name", ""), bad, *raw))
+            res[c] = (rec, uid)
+        merged[section] = res
+
+    # дети удалённой комнаты: комната возвращается (из ours, theirs или base)
+    rooms = merged["rooms"]
+    ib, io, it = versions["rooms"]
+    for section in SECTIONS[1:]:
+        for c, (rec, uid) in merged[section].items():
+            p = rec.get("parent")
+            if p is None or p in rooms:
+                continue
+            src = io.get(p) or it.get(p) or ib.get(p)
+            if src is None:
+                continue
+            rid = _out_id(p, src[1])
+            rooms[p] = (dict(src[0]), rid)
+            conflicts.append(Conflict("rooms", rid, src[1].get("name", ""), ("delete",),
+                                      *(d.get(p, (None, None))[1] for d in (ib, io, it))))
+
+    canvas: Dict = {}
+    for d in (base, ours, theirs):
+        canvas.update(d.get("canvas") or {})
+    for k in ("w", "h"):   # холст — по большей из сторон
+        vals = [(d.get("canvas") or {}).get(k) for d in (base, ours, theirs)]
+        if any(v is not None for v in vals):
+            canvas[k] = max(v for v in vals if v is not None)
+    out: Dict = {"canvas": canvas} if canvas else {}
+    for section in SECTIONS:
+        lst = out[section] = []
+        for c, (rec, uid) in merged[section].items():
+            p = rec.pop("parent", None)
+            row = {"id": uid}
+            if section != "rooms":
+                if p is not None and p in rooms:
+                    row["room_id"] = rooms[p][1]
+                elif section == "openings":
+                    continue   # проём без комнаты не существует
+                else:
+                    row["room_id"] = None
+            row.update(rec)
+            lst.append(row)
+    return out, conflicts
+
+# ---- подсветка в редакторе ----
+DIFF_COLORS = {
+    "added": QColor("#16A34A"), "removed": QColor("#DC2626"), "moved": QColor("#2563EB"),
+    "resized": QColor("#7C3AED"), "renamed": QColor("#D97706"), "edited": QColor("#64748B"),
+}
+DIFF_Z = 60
+
+def record_box(rooms: Dict[object, Dict], section: str, rec: Dict) -> Optional[Tuple[float, float, float, float]]:
+    """Габарит записи в координатах сцены (x, y, w, h) без учёта поворота; rooms — комнаты файла по id."""
+    if section == "rooms":
+        return float(rec["x"]), float(rec["y"]), float(rec["w"]), float(rec["h"])
+    room = rooms.get(rec.get("room_id"))
+    rx, ry = (float(room["x"]), float(room["y"])) if room else (0.0, 0.0)
+    if section != "openings":
+        return rx + float(rec["x"]), ry + float(rec["y"]), float(rec["w"]), float(rec["h"])
+    if room is None:
+        return None
+    w, h = float(room["w"]), float(room["h"])
+    L, T = float(rec.get("length", 80)), float(rec.get("thickness", 12))
+    off, out = float(rec.get("offset", 0)), rec.get("side", "outside") == "outside"
+    edge = rec.get("edge", "T")
+    if edge in ("T", "B"):
+        x = max(0.0, min(off, w - L))
+        y = (-T if out else 0.0) if edge == "T" else (h if out else h - T)
+        return rx + x, ry + y, L, T
+    y = max(0.0, min(off, h - L))
+    x = (-T if out else 0.0) if edge == "L" else (w if out else w - T)
+    return rx + x, ry + y, T, L
+
+class DiffOverlay(QGraphicsObject):
+    """
+    Подсветка отличий текущего плана от файла: рамки изменённых объектов цветом вида
+    изменения, удалённые — пунктиром на старом месте.
+
+    Файл опознаётся один раз, сцена целиком сравнивается с ним тоже один раз; дальше
+    пересчитываются только записи объектов из itemAdded/itemRemoved/itemChanged/itemRenamed,
+    не чаще раза в REFRESH_MS. Опознанный объект сцены сохраняет свой ключ, пока он в сцене.
+    """
+    REFRESH_MS = 150
+
+    def __init__(self, scene, other: Dict):
+        super().__init__()
+        self.other = other
+        self._rooms = {r.get("id", i): r for i, r in enumerate(other.get("rooms") or [])}
+        a = _identify(other, None, "a")
+        self._pool = _pool_of(a)
+        self._before = {section: _index(a, section) for section in SECTIONS}
+        self._match: Dict[str, Canon] = {}     # id объекта сцены -> ключ
+        self._owner: Dict[Canon, str] = {}     # ключ -> id объекта сцены
+        self._diffs: Dict[Canon, Change] = {}  # ключ -> изменение (у ключей файла — и удаление)
+        self._touched: set = set()             # id объектов, изменившихся с прошлого пересчёта
+        self.changes: List[Change] = []
+        self._marks: List[Tuple[QRectF, str]] = []
+        self._bounds = QRectF()
+        self.setZValue(DIFF_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._scene = scene
+        scene.addItem(self)
+        self._signals = (scene.itemAdded, scene.itemRemoved, scene.itemChanged, scene.itemRenamed)
+        for sig in self._signals:
+            sig.connect(self._touch)
+        self._compare_all()
+        self._draw()
+
+    def detach(self):
+        for sig in self._signals:
+            sig.disconnect(self._touch)
+        self._timer.stop()
+        self._scene.removeItem(self)
+
+    def _touch(self, item):
+        self._touched.add(item.props.uid)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _compare_all(self):
+        b = _identify(self._scene.serialize(), self._pool, "b")
+        for section in SECTIONS:
+            for c, parent, rec in b.get(section, ()):
+                self._match[rec["id"]], self._owner[c] = c, rec["id"]
+                self._set(c, _compare(section, self._before[section].get(c), parent, rec))
+        for section, before in self._before.items():
+            for c, (_, rec) in before.items():
+                if c not in self._owner:
+                    self._diffs[c] = Change(section, ("removed",), rec, None)
+
+    def _set(self, c: Canon, ch: Optional[Change]):
+        if ch is None:
+            self._diffs.pop(c, None)
+        else:
+            self._diffs[c] = ch
+
+    def _claim(self, section: str, recs: List[Dict], parents: List[Optional[Canon]]):
+        """
+        Ключи новых объектов сцены: свободные (удалённые) записи файла или новые ключи.
+        Уровень за уровнем по всей пачке, как в _identify: совпадение по id важнее геометрии.
+        """
+        keys = [_lookup_keys(section, rec, p) for rec, p in zip(recs, parents)]
+        canon: List[Optional[Canon]] = [None] * len(recs)
+        for level in range(3):
+            for i, k in enumerate(keys):
+                if canon[i] is None and k[level] is not None:
+                    canon[i] = next((c for c in self._pool.by[level].get(k[level], ()) if c not in self._owner), None)
+                    if canon[i] is not None:
+                        self._owner[canon[i]] = recs[i]["id"]
+        for i, rec in enumerate(recs):
+            c = canon[i] or ("b", section, rec["id"])
+            self._match[rec["id"]], self._owner[c] = c, rec["id"]
+
+    def _update(self, uids: set):
+        sc, state = self._scene, self._scene.state
+        rooms = {u for u in uids if isinstance(sc.item_by_id(u), RoomItem) or self._match.get(u, ("", ""))[1] == "rooms"}
+        if rooms:   # проём не ребёнок комнаты: сигнала от него нет, а запись зависит от комнаты
+            uids = uids | {op.props.uid for op in sc._openings
+                           if op.anchor_room is not None and op.anchor_room.props.uid in rooms}
+        present: Dict[str, List[Dict]] = {section: [] for section in SECTIONS}
+        for uid in uids:
+            item = sc.item_by_id(uid)
+            entry = state.record_of(item) if item is not None else None
+            if entry is not None:
+                present[entry[0]].append(entry[1])
+                continue
+            c = self._match.pop(uid, None)
+            if c is None:
+                continue
+            del self._owner[c]
+            prev = self._before[c[1]].get(c)   # c[1] — секция ключа
+            self._set(c, None if prev is None else Change(c[1], ("removed",), prev[1], None))
+        for section in SECTIONS:   # комнаты раньше детей: ключ ребёнка — от комнаты
+            recs = present[section]
+            parents = [None if section == "rooms" else self._match.get(rec.get("room_id"), ("?", rec.get("room_id")))
+                       for rec in recs]
+            new = [i for i, rec in enumerate(recs) if rec["id"] not in self._match]
+            if new:
+                self._claim(section, [recs[i] for i in new], [parents[i] for i in new])
+            for rec, parent in zip(recs, parents):
+                c = self._match[rec["id"]]
+                self._set(c, _compare(section, self._before[section].get(c), parent, rec))
+
+    def refresh(self):
+        touched, self._touched = self._touched, set()
+        self._update(touched)
+        self._draw()
+
+    def _draw(self):
+        sc = self._scene
+        order = {s: i for i, s in enumerate(SECTIONS)}
+        self.changes = sorted(self._diffs.values(), key=lambda ch: order[ch.section])
+        marks = []
+        for ch in self.changes:
+            if ch.new is None:
+                box = record_box(self._rooms, ch.section, ch.old)
+                if box is not None:
+                    marks.append((QRectF(*box), "removed"))
+                continue
+            item = sc.item_by_id(ch.new["id"])
+            if item is not None:
+                marks.append((item_scene_rect(item), ch.kinds[0]))   # как record_box: с учётом комнаты
+        bounds = QRectF()
+        for r, _ in marks:
+            bounds = bounds.united(r)
+        bounds = bounds.adjusted(-4, -4, 4, 4)
+        if bounds != self._bounds:
+            self.prepareGeometryChange()
+            self._bounds = bounds
+        self._marks = marks
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter: QPainter, option, widget=None):
+        exposed = option.exposedRect
+        for r, kind in self._marks:
+            if not r.intersects(exposed):
+                continue
+            pen = QPen(DIFF_COLORS[kind], 3, Qt.DashLine if kind == "removed" else Qt.SolidLine)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(r)
+
+# ---- CLI ----
+def load_project(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)   # .sh — тот же JSON
+
+def _describe(ch: Change) -> str:
+    sign = {"added": "+", "removed": "-"}.get(ch.kinds[0], "~")
+    parts = []
+    if ch.old and ch.new:
+        o, n = ch.old, ch.new
+        if "moved" in ch.kinds:
+            if ch.section == "openings":
+                parts.append(f"стена {o.get('edge')}:{_r(o.get('offset'))} → {n.get('edge')}:{_r(n.get('offset'))}")
+            else:
+                parts.append(f"({_r(o.get('x'))}, {_r(o.get('y'))}) → ({_r(n.get('x'))}, {_r(n.get('y'))})")
+        if "resized" in ch.kinds:
+            if ch.section == "openings":
+                parts.append(f"{_r(o.get('length'))} → {_r(n.get('length'))}")
+            else:
+                parts.append(f"{_r(o.get('w'))}×{_r(o.get('h'))} → {_r(n.get('w'))}×{_r(n.get('h'))}")
+        if "renamed" in ch.kinds:
+            parts.append(f"«{o.get('name', '')}» → «{n.get('name', '')}»")
+    detail = f" [{', '.join(ch.kinds)}] " + "; ".join(parts) if sign == "~" else ""
+    return f"{sign} {ch.section:<9} {ch.name or '(без названия)'}{detail}"
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m files.diff", description="Сравнение и слияние проектов SmartHome")
+    ap.add_argument("files", nargs="+", help="OLD NEW  или  BASE OURS THEIRS (с --merge)")
+    ap.add_argument("--merge", action="store_true", help="трёхстороннее слияние")
+    ap.add_argument("-o", "--output", help="куда записать результат слияния (по умолчанию stdout)")
+    ap.add_argument("--prefer", choices=("ours", "theirs"), default="ours", help="чья правка побеждает в конфликте")
+    ap.add_argument("--json", action="store_true", help="изменения/конфликты в JSON")
+    args = ap.parse_args(argv)
+
+    if not args.merge:
+        if len(args.files) != 2:
+            ap.error("нужно два файла: OLD NEW")
+        changes = diff(*(load_project(p) for p in args.files))
+        if args.json:
+            json.dump([{"section": c.section, "kinds": c.kinds, "old": c.old, "new": c.new} for c in changes],
+                      sys.stdout, ensure_ascii=False, indent=1)
+            print()
+        else:
+            for ch in changes:
+                print(_describe(ch))
+            print(", ".join(f"{k}: {v}" for k, v in summary(changes).items()), file=sys.stderr)
+        return 1 if changes else 0
+
+    if len(args.files) != 3:
+        ap.error("для --merge нужно три файла: BASE OURS THEIRS")
+    result, conflicts = merge(*(load_project(p) for p in args.files), prefer=args.prefer)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    for c in conflicts:
+        what = "удалён с одной стороны, изменён с другой" if c.fields == ("delete",) else ", ".join(c.fields)
+        print(f"! конфликт {c.section} «{c.name}» ({c.id}): {what}", file=sys.stderr)
+    return 1 if conflicts else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Экспорт плана в PNG/SVG/PDF для печати.
+
+PNG: план рисуется горизонтальными полосами (QGraphicsScene.render в GUI-потоке — items
+рисуются только из него), фильтрация строк и deflate идут параллельно в потоках, а готовые
+фрагменты сразу пишутся в файл — в памяти одновременно лишь несколько полос, а не вся картинка. SVG/PDF — векторные, пишутся потоково
+самими QSvgGenerator/QPdfWriter.
+
+Без GUI:  python -m files.export plan.json plan.png --dpi 300
+"""
+from __future__ import annotations
+import os, sys, zlib, struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional
+from PySide6.QtCore import Qt, QRectF, QSize, QSizeF, QMarginsF
+from PySide6.QtGui import QImage, QPainter, QColor, QPdfWriter, QPageSize
+
+EXPORT_DPI = 300
+SCREEN_DPI = 96.0          # 1 px сцены = 1 экранный пиксель при 96 dpi
+EXPORT_MARGIN = 20.0       # поля вокруг плана, px сцены
+STRIP_H = 256              # высота полосы PNG, px результата
+PNG_LEVEL = 6
+
+Progress = Optional[Callable[[int, int], bool]]   # (готово, всего) -> False = отмена
+
+class ExportCancelled(Exception):
+    pass
+
+def export_rect(scene) -> QRectF:
+    """Область экспорта: содержимое плана с полями (или весь холст, если план пуст)."""
+    r = scene.content_rect()
+    if r.isNull() or r.isEmpty():
+        return QRectF(scene.sceneRect())
+    return r.adjusted(-EXPORT_MARGIN, -EXPORT_MARGIN, EXPORT_MARGIN, EXPORT_MARGIN)
+
+@contextmanager
+def export_mode(scene, grid: bool = False):
+    """Без выделения, тусклых слоёв и направляющих; фон — белый (или сетка, если grid)."""
+    from .items import PlanRectItem
+    selected = scene.selectedItems()
+    scene.clearSelection()
+    dimmed = [(it, it.opacity()) for it in scene.items()
+              if isinstance(it, PlanRectItem) and it.opacity() < 1.0 and not it._is_preview]
+    for it, _ in dimmed:
+        it.setOpacity(1.0)
+    scene._export_plain = not grid
+    try:
+        yield
+    finally:
+        scene._export_plain = False
+        for it, op in dimmed:
+            it.setOpacity(op)
+        for it in selected:
+            it.setSelected(True)
+
+def _scale_for(dpi: float) -> float:
+    return float(dpi) / SCREEN_DPI
+
+def output_size(scene, dpi: float = EXPORT_DPI) -> QSize:
+    src = export_rect(scene)
+    k = _scale_for(dpi)
+    return QSize(max(1, int(round(src.width() * k))), max(1, int(round(src.height() * k))))
+
+# ---------- PNG ----------
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+def _render_strip(scene, src: QRectF, k: float, y0: int, w: int, h: int) -> QImage:
+    """Полоса [y0, y0+h) результата: рисуется только попадающая в неё часть сцены."""
+    img = QImage(w, h, QImage.Format_RGB888)
+    img.fill(QColor(Qt.white))
+    part = QRectF(src.left(), src.top() + y0 / k, w / k, h / k)
+    p = QPainter(img)
+    p.setRenderHint(QPainter.Antialiasing, True)
+    p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+    scene.render(p, QRectF(0, 0, w, h), part, Qt.IgnoreAspectRatio)
+    p.end()
+    return img
+
+def _compress_strip(img: QImage):
+    """(сырые строки PNG с байтом фильтра, сжатый deflate-фрагмент); zlib отпускает GIL."""
+    w, h = img.width(), img.height()
+    bits = bytes(img.constBits())
+    bpl, row = img.bytesPerLine(), w * 3
+    raw = b"".join(b"\x00" + bits[r * bpl:r * bpl + row] for r in range(h))
+    # сырой deflate с SYNC_FLUSH: фрагменты полос склеиваются в один поток
+    comp = zlib.compressobj(PNG_LEVEL, zlib.DEFLATED, -15)
+    return raw, comp.compress(raw) + comp.flush(zlib.Z_SYNC_FLUSH)
+
+def export_png(scene, path: str, dpi: float = EXPORT_DPI, grid: bool = False,
+               workers: Optional[int] = None, progress: Progress = None) -> QSize:
+    src = export_rect(scene)
+    k = _scale_for(dpi)
+    size = output_size(scene, dpi)
+    w, h = size.width(), size.height()
+    workers = workers or max(1, min(8, os.cpu_count() or 1))
+    strips = [(y, min(STRIP_H, h - y)) for y in range(0, h, STRIP_H)]
+    ppm = int(round(dpi / 0.0254))
+    tmp = path + ".part"
+    try:
+        with export_mode(scene, grid), open(tmp, "wb") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+            f.write(_chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1)))
+            f.write(_chunk(b"IDAT", b"\x78\x9c"))          # заголовок zlib
+            adler = 1
+            pending = deque()
+            nxt = 0
+            for done in range(len(strips)):
+                # не больше 2×workers полос в работе — память ограничена
+                while nxt < len(strips) and len(pending) < workers * 2:
+                    y, sh = strips[nxt]
+                    pending.append(pool.submit(_compress_strip, _render_strip(scene, src, k, y, w, sh)))
+                    nxt += 1
+                raw, data = pending.popleft().result()
+                adler = zlib.adler32(raw, adler)
+                f.write(_chunk(b"IDAT", data))
+                if progress is not None and progress(done + 1, len(strips)) is False:
+                    for fut in pending:
+                        fut.cancel()
+                    raise ExportCancelled()
+            tail = zlib.compressobj(PNG_LEVEL, zlib.DEFLATED, -15).flush(zlib.Z_FINISH)   # пустой финальный блок
+            f.write(_chunk(b"IDAT", tail + struct.pack(">I", adler & 0xFFFFFFFF)))
+            f.write(_chunk(b"IEND", b""))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return size
+
+# ---------- SVG / PDF ----------
+def export_svg(scene, path: str, dpi: float = EXPORT_DPI, grid: bool = False) -> QSize:
+    from PySide6.QtSvg import QSvgGenerator
+    src = export_rect(scene)
+    size = output_size(scene, dpi)
+    gen = QSvgGenerator()
+    gen.setFileName(path)
+    gen.setSize(size)
+    gen.setViewBox(QRectF(0, 0, size.width(), size.height()))
+    gen.setResolution(int(dpi))
+    gen.setTitle("SmartHome plan")
+    with export_mode(scene, grid):
+        p = QPainter(gen)
+        p.setRenderHint(QPainter.Antialiasing, True)
+        scene.render(p, QRectF(0, 0, size.width(), size.height()), src)
+        p.end()
+    return size
+
+def export_pdf(scene, path: str, dpi: float = EXPORT_DPI, grid: bool = False) -> QSize:
+    src = export_rect(scene)
+    size = output_size(scene, dpi)
+    writer = QPdfWriter(path)
+    writer.setResolution(int(dpi))
+    mm = QSizeF(size.width() / dpi * 25.4, size.height() / dpi * 25.4)
+    writer.setPageSize(QPageSize(mm, QPageSize.Millimeter, "plan"))
+    writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+    writer.setTitle("SmartHome plan")
+    with export_mode(scene, grid):
+        p = QPainter(writer)
+        p.setRenderHint(QPainter.Antialiasing, True)
+        scene.render(p, QRectF(0, 0, writer.width(), writer.height()), src, Qt.KeepAspectRatio)
+        p.end()
+    return size
+
+def export_scene(scene, path: str, dpi: float = EXPORT_DPI, grid: bool = False,
+                 progress: Progress = None) -> QSize:
+    """Формат — по расширению path (.png | .svg | .pdf)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".png":
+        return export_png(scene, path, dpi, grid, progress=progress)
+    if ext == ".svg":
+        return export_svg(scene, path, dpi, grid)
+    if ext == ".pdf":
+        return export_pdf(scene, path, dpi, grid)
+    raise ValueError(f"Неизвестный формат экспорта: {ext or path}")
+
+# ---------- CLI ----------
+def main(argv=None) -> int:
+    import argparse, json
+    ap = argparse.ArgumentParser(prog="python -m files.export", description="Экспорт плана SmartHome в PNG/SVG/PDF")
+    ap.add_argument("project", help="файл проекта (.json/.sh)")
+    ap.add_argument("output", help="куда сохранить: .png | .svg | .pdf")
+    ap.add_argument("--dpi", type=float, default=EXPORT_DPI)
+    ap.add_argument("--grid", action="store_true", help="рисовать сетку")
+    args = ap.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from .scene import PlanScene
+    with open(args.project, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    scene = PlanScene()
+    scene.deserialize(data)
+
+    def _report(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+        return True
+    size = export_scene(scene, args.output, args.dpi, args.grid, progress=_report)
+    print(f"\n{args.output}: {size.width()}×{size.height()} px", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
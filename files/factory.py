@@ -4,14 +4,14 @@ from PySide6.QtCore import QPointF, QRectF
 from PySide6.QtWidgets import QMessageBox, QGraphicsItem
 from .models import ItemProps
 from .items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
-from .utils import SCENE_W, SCENE_H, PX_GRID, snap, _scene_rect_of_item, _rects_overlap_strict
+from .utils import CANVAS_MAX, PX_GRID, snap, _scene_rect_of_item, _rects_overlap_strict
 
 class ItemFactory:
     def __init__(self, scene):
         self.scene = scene
 
     def _create_room(self, meta: Dict, pos: QPointF, w: float, h: float) -> Optional[RoomItem]:
-        if pos.x() + w > SCENE_W or pos.y() + h > SCENE_H:
+        if pos.x() < 0 or pos.y() < 0 or pos.x() + w > CANVAS_MAX or pos.y() + h > CANVAS_MAX:
             QMessageBox.warning(None, "Вне холста", "Комната не может выходить за границы холста.")
             return None
         item = RoomItem(ItemProps(meta.get("name", "Комната"), w, h, meta.get("desc", ""), "room"),
@@ -30,6 +30,7 @@ class ItemFactory:
                 self.scene.removeItem(item)
                 QMessageBox.warning(None, "Пересечение", "Не удалось разместить без перекрытий.")
                 return None
+        self.scene.ensure_canvas_fits(_scene_rect_of_item(item))
         return item
     
     def create_from_meta(self, meta: Dict, scene_pos: QPointF):
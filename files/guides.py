@@ -0,0 +1,102 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from PySide6.QtCore import QRectF, QLineF
+from .utils import SortedEntries
+
+# запись = (значение, начало, конец, item, вид); для оси X значение — x кромки/центра,
+# начало/конец — вертикальный габарит объекта (для окна видимости и длины направляющей)
+Entry = Tuple[float, float, float, object, str]
+
+def item_scene_rect(item) -> QRectF:
+    """Габарит без поворота: pos родителя + pos объекта (как _scene_rect_of_item, но для детей комнат)."""
+    r = item.rect()
+    p = item.pos()
+    parent = item.parentItem()
+    if parent is not None:
+        p = p + parent.pos()
+    return QRectF(p.x(), p.y(), r.width(), r.height())
+
+class GuideIndex:
+    """
+    Кромки и центры объектов плана в двух отсортированных списках (по x и по y).
+    Объект переиндексируется при сдвиге/изменении размера; при перетаскивании
+    кандидаты берутся bisect'ом в полосе ±порог и фильтруются по видимой области.
+    """
+    def __init__(self):
+        self._x = SortedEntries()
+        self._y = SortedEntries()
+        self._items: Dict[object, Tuple[QRectF, Tuple[Entry, ...], Tuple[Entry, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def clear(self):
+        self.__init__()
+
+    def update_item(self, item):
+        rect = item_scene_rect(item)
+        old = self._items.get(item)
+        if old is not None:
+            if old[0] == rect:
+                return
+            self._drop(old)
+        xs = tuple((v, rect.top(), rect.bottom(), item, k)
+                   for v, k in ((rect.left(), "min"), (rect.center().x(), "mid"), (rect.right(), "max")))
+        ys = tuple((v, rect.left(), rect.right(), item, k)
+                   for v, k in ((rect.top(), "min"), (rect.center().y(), "mid"), (rect.bottom(), "max")))
+        for e in xs: self._x.insert(e)
+        for e in ys: self._y.insert(e)
+        self._items[item] = (rect, xs, ys)
+
+    def remove_item(self, item):
+        old = self._items.pop(item, None)
+        if old is not None:
+            self._drop(old)
+
+    def _drop(self, old):
+        for e in old[1]: self._x.remove(e)
+        for e in old[2]: self._y.remove(e)
+
+    @staticmethod
+    def _best(axis: SortedEntries, values, win_lo: float, win_hi: float,
+              exclude, threshold: float) -> Optional[Tuple[float, Entry]]:
+        """Ближайшее к одному из values значение в полосе ±threshold: (сдвиг, запись)."""
+        best = None
+        keys, entries = axis.keys, axis.entries
+        for v in values:
+            i = bisect_left(keys, v - threshold)
+            while i < len(keys) and keys[i] <= v + threshold:
+                e = entries[i]; i += 1
+                if e[3] in exclude or e[2] < win_lo or e[1] > win_hi:
+                    continue
+                d = e[0] - v
+                if best is None or abs(d) < abs(best[0]):
+                    best = (d, e)
+        return best
+
+    def snap(self, rect: QRectF, window: QRectF, threshold: float,
+             exclude=()) -> Tuple[float, float, List[QLineF]]:
+        """
+        Сдвиг (dx, dy), прилипающий кромкой/центром rect к ближайшим кромкам/центрам
+        других объектов в окне window, и направляющие для отрисовки.
+        """
+        exclude = set(exclude)
+        bx = self._best(self._x, (rect.left(), rect.center().x(), rect.right()),
+                        window.top(), window.bottom(), exclude, threshold)
+        by = self._best(self._y, (rect.top(), rect.center().y(), rect.bottom()),
+                        window.left(), window.right(), exclude, threshold)
+        dx = bx[0] if bx else 0.0
+        dy = by[0] if by else 0.0
+        moved = rect.translated(dx, dy)
+        lines: List[QLineF] = []
+        if bx:
+            x, lo, hi = bx[1][0], bx[1][1], bx[1][2]
+            lines.append(QLineF(x, min(lo, moved.top()), x, max(hi, moved.bottom())))
+        if by:
+            y, lo, hi = by[1][0], by[1][1], by[1][2]
+            lines.append(QLineF(min(lo, moved.left()), y, max(hi, moved.right()), y))
+        return dx, dy, lines
@@ -1,8 +1,9 @@
 from __future__ import annotations
-from PySide6.QtCore import Qt, QSize
+import math
+from PySide6.QtCore import Qt, QSize, QRectF, QPointF, QTimer
+from PySide6.QtGui import QImage, QPainter, QPen, QColor
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QToolButton
 from .models import Layer
-from .palette import make_category_icon
 from .utils import load_svg_icon, CATEGORY_ICON_ROOMS, CATEGORY_ICON_DEVICES, CATEGORY_ICON_FURNITURE
 
 class LayersHUD(QWidget):
@@ -42,12 +43,14 @@ class LayersHUD(QWidget):
             btn.setToolTip(tooltip)
             btn.setCheckable(True)
             btn.setAutoExclusive(True)
-            btn.setIcon(make_category_icon("rooms" if svg_path==CATEGORY_ICON_ROOMS else
-                                           "devices" if svg_path==CATEGORY_ICON_DEVICES else
-                                           "furniture", 24))
-            # перекрываем на случай наличия SVG-иконок
+            # SVG-иконка; нарисованная заглушка (и модуль палитры) — только если SVG нет
             svg = load_svg_icon(svg_path, 20)
-            if svg: btn.setIcon(svg)
+            if svg is None:
+                from .palette import make_category_icon
+                svg = make_category_icon("rooms" if svg_path==CATEGORY_ICON_ROOMS else
+                                         "devices" if svg_path==CATEGORY_ICON_DEVICES else
+                                         "furniture", 24)
+            btn.setIcon(svg)
             btn.setIconSize(QSize(20,20))
             btn.setFixedSize(36,36)
             btn.clicked.connect(lambda _=False, L=layer: self._set_layer(L))
@@ -80,3 +83,144 @@ class LayersHUD(QWidget):
         vw = self.view.viewport().width()
         vh = self.view.viewport().height()
         self.move(vw - self.width() - margin, vh - self.height() - margin)
+
+class MinimapHUD(QWidget):
+    """
+    Мини-карта в левом нижнем углу вида: вся сцена в уменьшенной копии и рамка видимой
+    области; клик/перетаскивание — перейти. Копия хранится в QImage и перерисовывается
+    только в областях из QGraphicsScene.changed, не чаще раза в REFRESH_MS.
+    """
+    MAX_SIZE = QSize(220, 160)
+    MARGIN = 6
+    REFRESH_MS = 250
+    FRAME_COLOR = QColor("#2563EB")
+
+    def __init__(self, view):
+        super().__init__(view.viewport())
+        self.view = view
+        self.setObjectName("MinimapHUD")
+        self.setAttribute(Qt.WA_StyledBackground, True)
+        self.setStyleSheet("QWidget#MinimapHUD { background: rgba(255,255,255,0.95); border:1px solid #e7e8ee; border-radius:12px; }")
+        self.setCursor(Qt.PointingHandCursor)
+        self._image: QImage = QImage()
+        self._k = 1.0                   # px мини-карты на единицу сцены
+        self._src = QRectF()            # область сцены, которую показывает карта
+        self._dirty = QRectF()
+        self._full = True
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.flush)
+
+        scene = view.scene()
+        scene.changed.connect(self._on_changed)
+        scene.sceneRectChanged.connect(self._on_rect_changed)
+        view.horizontalScrollBar().valueChanged.connect(self.update)
+        view.verticalScrollBar().valueChanged.connect(self.update)
+        view.scaleChanged.connect(self.update)
+        self._on_rect_changed(scene.sceneRect())
+
+    # ---- кэш ----
+    def _on_rect_changed(self, rect: QRectF):
+        self._src = QRectF(rect)
+        w, h = max(rect.width(), 1.0), max(rect.height(), 1.0)
+        self._k = min(self.MAX_SIZE.width() / w, self.MAX_SIZE.height() / h)
+        size = QSize(math.ceil(w * self._k), math.ceil(h * self._k))
+        self.setFixedSize(size + QSize(2 * self.MARGIN, 2 * self.MARGIN))
+        self.reposition()
+        self._full = True
+        self._schedule()
+
+    def _on_changed(self, rects):
+        for r in rects:
+            self._dirty = self._dirty.united(r)
+        if not self._dirty.isEmpty():
+            self._schedule()
+
+    def _schedule(self):
+        # не перезапускаем: при перетаскивании карта обновляется раз в REFRESH_MS
+        if self.isVisible() and not self._timer.isActive():
+            self._timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule()
+
+    def flush(self):
+        """Перерисовать накопленную грязную область (или всё, если сменился масштаб)."""
+        scene = self.view.scene()
+        dpr = self.devicePixelRatioF()
+        w, h = self.width() - 2 * self.MARGIN, self.height() - 2 * self.MARGIN
+        if self._full or self._image.isNull() or self._image.size() != QSize(round(w * dpr), round(h * dpr)):
+            self._image = QImage(round(w * dpr), round(h * dpr), QImage.Format_ARGB32_Premultiplied)
+            self._image.setDevicePixelRatio(dpr)
+            area = QRectF(self._src)
+            self._full = False
+        else:
+            area = self._dirty.intersected(self._src)
+        self._dirty = QRectF()
+        if area.isEmpty():
+            return
+        # в пиксели карты с округлением наружу, чтобы не оставлять швов
+        k = self._k
+        x0 = math.floor((area.left() - self._src.left()) * k)
+        y0 = math.floor((area.top() - self._src.top()) * k)
+        x1 = min(math.ceil((area.right() - self._src.left()) * k), w)
+        y1 = min(math.ceil((area.bottom() - self._src.top()) * k), h)
+        target = QRectF(x0, y0, x1 - x0, y1 - y0)
+        source = QRectF(self._src.left() + x0 / k, self._src.top() + y0 / k, target.width() / k, target.height() / k)
+        p = QPainter(self._image)
+        p.setClipRect(target)
+        p.fillRect(target, Qt.white)
+        plain, scene._export_plain = scene._export_plain, True   # без сетки и направляющих
+        try:
+            scene.render(p, target, source, Qt.IgnoreAspectRatio)
+        finally:
+            scene._export_plain = plain
+            p.end()
+        self.update()
+
+    # ---- отрисовка и навигация ----
+    def _viewport_rect(self) -> QRectF:
+        vp = self.view.viewport().rect()
+        r = self.view.mapToScene(vp).boundingRect().intersected(self._src)
+        return QRectF(self.MARGIN + (r.left() - self._src.left()) * self._k,
+                      self.MARGIN + (r.top() - self._src.top()) * self._k,
+                      r.width() * self._k, r.height() * self._k)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        p = QPainter(self)
+        if not self._image.isNull():
+            p.drawImage(QPointF(self.MARGIN, self.MARGIN), self._image)
+        pen = QPen(self.FRAME_COLOR, 1.5)
+        p.setPen(pen)
+        fill = QColor(self.FRAME_COLOR); fill.setAlpha(30)
+        p.setBrush(fill)
+        p.drawRect(self._viewport_rect())
+        p.end()
+
+    def _navigate(self, pos):
+        x = self._src.left() + (pos.x() - self.MARGIN) / self._k
+        y = self._src.top() + (pos.y() - self.MARGIN) / self._k
+        self.view.centerOn(x, y)
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._navigate(event.position())
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._navigate(event.position())
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+
+    def reposition(self):
+        margin = 12
+        vh = self.view.viewport().height()
+        self.move(margin, vh - self.height() - margin)
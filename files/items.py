@@ -1,15 +1,15 @@
 from __future__ import annotations
+import math
 from typing import Optional, List, Tuple
 from PySide6.QtCore import Qt, QRectF, QPointF, QSizeF
-from PySide6.QtGui import QBrush, QColor, QPainter, QPen, QFont
+from PySide6.QtGui import QPainter
 from PySide6.QtWidgets import QGraphicsRectItem, QGraphicsItem
 from .models import ItemProps
-from .utils import (ROOM_COLOR, ROOM_BORDER, DEV_COLOR, DEV_BORDER, EPS, PX_GRID,
+from .styles import ItemStyle, item_style, label_font, LABEL_BRUSH, LABEL_PEN
+from .utils import (EPS, PX_GRID, CANVAS_MAX,
                     snap, _scene_rect_of_item, _rects_overlap_strict)
 # Важно: PlanScene используется только через методы scene(), импорт внутри методов не нужен
 
-GHOST_PEN   = QPen(QColor("#94A3B8"), 1, Qt.DashLine)
-GHOST_BRUSH = QBrush(QColor(148, 163, 184, 80))
 class ResizeHandle(QGraphicsRectItem):
     SIZE = 10.0
     def __init__(self, owner: "PlanRectItem", cx: float, cy: float, corner: str):
@@ -17,8 +17,9 @@ class ResizeHandle(QGraphicsRectItem):
         self.owner = owner
         self.corner = corner
         self.setZValue(1000)
-        self.setBrush(QColor(255, 255, 255))
-        self.setPen(QPen(QColor(80, 80, 80), 1))
+        st = item_style("handle")
+        self.setBrush(st.brush)
+        self.setPen(st.pen)
         self.setFlag(QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, True)
         self.setCursor({
@@ -65,6 +66,15 @@ class ResizeHandle(QGraphicsRectItem):
             return self.pos()
         return super().itemChange(change, value)
 
+# на что отвечает PlanRectItem.itemChange; прочее (флаги, подсказка, прозрачность) — сразу в Qt:
+# при создании объекта itemChange зовётся пару десятков раз, и цепочка сравнений заметна на пачках
+_HANDLED_CHANGES = frozenset((
+    QGraphicsItem.ItemSelectedChange, QGraphicsItem.ItemPositionChange,
+    QGraphicsItem.ItemSceneChange, QGraphicsItem.ItemSceneHasChanged,
+    QGraphicsItem.ItemParentChange, QGraphicsItem.ItemParentHasChanged,
+    QGraphicsItem.ItemRotationHasChanged, QGraphicsItem.ItemPositionHasChanged,
+))
+
 class PlanRectItem(QGraphicsRectItem):
     def __init__(self, props: ItemProps, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -76,111 +86,77 @@ class PlanRectItem(QGraphicsRectItem):
         self._handles: List[ResizeHandle] = []
         self._rounded = 6.0
         self._is_preview = False     # признак «призрака»
-        self._view_mode  = "active"  # active | dim | dim_strong_border | ghost
+        self._dragging = False       # тянут мышью — включаются умные направляющие
+        self._view_mode  = "active"  # active | active_bright | dim | dim_strong_border | ghost
+        self._apply_style()
+        self.update_tooltip()
 
-        if self.props.kind == "room":
-            self.brush_normal = QBrush(ROOM_COLOR)
-            self.pen_normal = QPen(ROOM_BORDER, 2, Qt.SolidLine)
-        else:
-            self.brush_normal = QBrush(DEV_COLOR)
-            self.pen_normal = QPen(DEV_BORDER, 1, Qt.SolidLine)
+    # ---- стиль: перо и кисть — общие из таблицы (styles.py), у объекта только ключ ----
+    @property
+    def style_kind(self) -> str:
+        return self.props.kind
 
-        self.brush_selected = QBrush(QColor(255, 240, 180, 160))
-        self.pen_selected = QPen(QColor(255, 140, 0), 2, Qt.DashLine)
+    def style(self, selected: Optional[bool] = None) -> ItemStyle:
+        return item_style(self.style_kind, self._view_mode,
+                          self.isSelected() if selected is None else selected)
 
-        self.setBrush(self.brush_normal)
-        self.setPen(self.pen_normal)
-        self.update_tooltip()
+    def _apply_style(self, selected: Optional[bool] = None):
+        st = self.style(selected)
+        self.setPen(st.pen)     # перо объекта нужно и для boundingRect
+        self.setBrush(st.brush)
 
     def set_view_mode(self, mode: str):
         self._view_mode = mode
+        self._apply_style()
 
         # «призрак» действует только на превью (drag-preview)
         if mode == "ghost" and getattr(self, "_is_preview", False):
-            try:
-                self.setOpacity(0.5)
-                self.setPen(GHOST_PEN)
-                self.setBrush(GHOST_BRUSH)
-            except Exception:
-                pass
-            self.update()
-            return
-
-        # обычные режимы — реальный элемент всегда видим
-        try:
-            self.setOpacity(1.0)
-            pen = self.pen()
-            pen.setStyle(Qt.SolidLine)
-            self.setPen(pen)
-        except Exception:
-            pass
-
+            self.setOpacity(0.5)
         # лёгкое «тускление» по слоям (не через полную прозрачность!)
-        if mode == "dim":
-            try:
-                self.setOpacity(0.55)
-            except Exception:
-                pass
+        elif mode == "dim":
+            self.setOpacity(0.55)
         elif mode == "dim_strong_border":
-            try:
-                self.setOpacity(0.65)
-                pen = self.pen()
-                pen.setColor(QColor("#64748B"))
-                self.setPen(pen)
-            except Exception:
-                pass
+            self.setOpacity(0.65)
+        else:
+            self.setOpacity(1.0)   # обычные режимы — реальный элемент всегда видим
 
 
 
     def mousePressEvent(self, e):
         if e.button() == Qt.LeftButton:
             self.setOpacity(0.6)
+            self._dragging = True
         super().mousePressEvent(e)
 
     def mouseReleaseEvent(self, e):
         if e.button() == Qt.LeftButton:
             self.setOpacity(1.0)
+            self._dragging = False
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "clear_guides"):
+                scene.clear_guides()
         super().mouseReleaseEvent(e)
 
     def paint(self, painter: QPainter, option, widget=None):
         painter.setRenderHint(QPainter.Antialiasing, True)
         r = self.rect()
-        brush = self.brush_normal if not self.isSelected() else self.brush_selected
-        pen   = self.pen_normal   if not self.isSelected() else self.pen_selected
+        st = self.style()
 
         if isinstance(self, RoomItem):
-            sz = f"{self.rect().width():.0f}×{self.rect().height():.0f}"
-            painter.setFont(QFont("", 8, QFont.DemiBold))
+            sz = f"{r.width():.0f}×{r.height():.0f}"
+            painter.setFont(label_font())
             fm = painter.fontMetrics()
             tw = fm.horizontalAdvance(sz) + 8
             th = fm.height() + 4
-            pill = QRectF(self.rect().left() + 4, self.rect().top() + 4, tw, th)
+            pill = QRectF(r.left() + 4, r.top() + 4, tw, th)
             painter.setPen(Qt.NoPen)
-            painter.setBrush(QColor(0, 0, 0, 110))
+            painter.setBrush(LABEL_BRUSH)
             painter.drawRoundedRect(pill, 4, 4)
-            painter.setPen(QColor(255, 255, 255))
+            painter.setPen(LABEL_PEN)
             painter.drawText(pill, Qt.AlignCenter, sz)
-            if self._view_mode == "dim_strong_border":
-                c = ROOM_COLOR
-                brush = QBrush(QColor(c.red(), c.green(), c.blue(), 50))
-                pen = QPen(ROOM_BORDER, 3, Qt.SolidLine)
-            elif self._view_mode == "dim":
-                c = ROOM_COLOR
-                brush = QBrush(QColor(c.red(), c.green(), c.blue(), 40))
-                pen = QPen(ROOM_BORDER, 1.5, Qt.SolidLine)
-
-        elif isinstance(self, (DeviceItem, FurnitureItem)):
-            if self._view_mode == "active_bright":
-                c = DEV_COLOR
-                painter.setPen(QPen(DEV_BORDER, 1.5, Qt.SolidLine))
-                painter.setBrush(QBrush(QColor(c.red(), c.green(), c.blue(), 220)))
-            elif self._view_mode == "dim":
-                c = DEV_COLOR
-                painter.setPen(QPen(DEV_BORDER, 1, Qt.SolidLine))
-                painter.setBrush(QBrush(QColor(c.red(), c.green(), c.blue(), 60)))
-
-        painter.setPen(pen)
-        painter.setBrush(brush)
+
+        painter.setPen(st.pen)
+        painter.setBrush(st.brush)
         painter.drawRoundedRect(r, self._rounded, self._rounded)
 
     def update_tooltip(self):
@@ -256,39 +232,37 @@ class PlanRectItem(QGraphicsRectItem):
             self.update_tooltip()
             return True
 
-        new_rect_scene = QRectF(self.pos(), QSizeF(width_px, height_px))
-        allowed_scene = scene.sceneRect()
-
-        if new_rect_scene.right() > allowed_scene.right() or new_rect_scene.bottom() > allowed_scene.bottom():
-            width_px = min(width_px, allowed_scene.right() - self.pos().x())
-            height_px = min(height_px, allowed_scene.bottom() - self.pos().y())
+        # холст растёт сам, ограничиваем только жёстким пределом
+        width_px = min(width_px, CANVAS_MAX - self.pos().x())
+        height_px = min(height_px, CANVAS_MAX - self.pos().y())
 
         if isinstance(self, RoomItem):
             old = self.rect()
             super().setRect(QRectF(0, 0, width_px, height_px))
-            if (self.pos().x() < allowed_scene.left() or
-                self.pos().y() < allowed_scene.top() or
+            if (self.pos().x() < 0 or
+                self.pos().y() < 0 or
                 self._any_room_overlap()):
                 super().setRect(old)
                 return False
 
         super().setRect(QRectF(0, 0, width_px, height_px))
+        scene.ensure_canvas_fits(_scene_rect_of_item(self))
+        if hasattr(scene, "track_item"):
+            scene.track_item(self)
         self.update_tooltip()
         return True
 
     def itemChange(self, change: QGraphicsItem.GraphicsItemChange, value):
-        from .scene import PlanScene  # локальный импорт, чтобы избежать циклов
+        if change not in _HANDLED_CHANGES:
+            return super().itemChange(change, value)
         if change == QGraphicsItem.ItemSelectedChange:
+            self._apply_style(bool(value))
             if bool(value):
-                self.setBrush(self.brush_selected)
-                self.setPen(self.pen_selected)
                 if isinstance(self, RoomItem):
                     self._create_handles()
                 scene = self.scene()
                 if scene: scene.show_size_overlay(self)
             else:
-                self.setBrush(self.brush_normal)
-                self.setPen(self.pen_normal)
                 self._remove_handles()
                 scene = self.scene()
                 if scene: scene.hide_size_overlay(self)
@@ -296,7 +270,7 @@ class PlanRectItem(QGraphicsRectItem):
         elif change == QGraphicsItem.ItemPositionChange:
             new_pos: QPointF = value
             scene = self.scene()
-            if scene is not None:
+            if scene is not None and not getattr(scene, "_restoring", False):
                 rect = self.rect()
                 parent = self.parentItem()
                 if parent and isinstance(parent, RoomItem):
@@ -306,19 +280,53 @@ class PlanRectItem(QGraphicsRectItem):
                     if scene.snap_to_grid:
                         x = snap(x, PX_GRID)
                         y = snap(y, PX_GRID)
+                    if self._dragging and hasattr(scene, "guide_snap"):
+                        x, y = scene.guide_snap(self, x, y, allowed)
                     return QPointF(x, y)
                 else:
-                    allowed = scene.sceneRect()
-                    x = min(max(new_pos.x(), allowed.left()),  allowed.right()  - rect.width())
-                    y = min(max(new_pos.y(), allowed.top()),   allowed.bottom() - rect.height())
+                    x, y = scene.clamp_to_canvas(new_pos.x(), new_pos.y(), rect.width(), rect.height())
                     if scene.snap_to_grid:
                         x = snap(x, PX_GRID)
                         y = snap(y, PX_GRID)
+                    if self._dragging and hasattr(scene, "guide_snap"):
+                        x, y = scene.guide_snap(self, x, y)
                     return QPointF(x, y)
 
+        elif change == QGraphicsItem.ItemSceneChange:
+            scene = self.scene()            # ещё старая сцена
+            if scene is not None and hasattr(scene, "untrack_item"):
+                scene.item_detached(self)
+                scene.untrack_item(self)
+
+        elif change == QGraphicsItem.ItemSceneHasChanged:
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "track_item"):
+                scene.track_item(self)
+                scene.item_attached(self)
+
+        elif change == QGraphicsItem.ItemParentChange:
+            # переезд в другую комнату — для списков содержимого комнат это «ушёл» + «пришёл»
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "item_detached"):
+                scene.item_detached(self)
+
+        elif change == QGraphicsItem.ItemParentHasChanged:
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "item_attached"):
+                scene.item_attached(self)
+
+        elif change == QGraphicsItem.ItemRotationHasChanged:
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "track_item"):
+                scene.track_item(self)
+
         elif change == QGraphicsItem.ItemPositionHasChanged:
-            if isinstance(self, RoomItem):
-                scene = self.scene()
+            scene = self.scene()
+            if scene is not None and hasattr(scene, "track_item"):
+                scene.track_item(self)
+            if scene and isinstance(self, (RoomItem, OpeningItem)) and not self._is_preview:
+                scene.ensure_canvas_fits(_scene_rect_of_item(self))
+            if isinstance(self, RoomItem) and not getattr(scene, "_restoring", False):
                 if scene and self._any_room_overlap():
                     scene.nudge_room_to_touch(self)
 
@@ -328,21 +336,14 @@ class RoomItem(PlanRectItem):
     def __init__(self, props: ItemProps, *args, **kwargs):
         super().__init__(props, *args, **kwargs)
         self.props.kind = "room"
-        self.setPen(QPen(QColor("#2563EB"), 2))
-        self.setBrush(QBrush(QColor(37, 99, 235, 70)))
         self.setOpacity(1.0)
 
     
-    # Внутрь RoomItem:
     def _notify_openings(self):
+        """Стены комнаты изменились: сцена обновляет индекс стен и прижимает проёмы."""
         sc = self.scene()
-        if not sc:
-            return
-        # Импорт не сверху, чтобы не ловить циклических импортов
-        from .items import OpeningItem
-        for it in sc.items():
-            if isinstance(it, OpeningItem) and it.anchor_room is self:
-                it._reposition_on_wall()
+        if sc is not None and hasattr(sc, "room_geometry_changed"):
+            sc.room_geometry_changed(self)
 
     def itemChange(self, change, value):
         # вызываем базовую логику
@@ -365,16 +366,12 @@ class DeviceItem(PlanRectItem):
     def __init__(self, props: ItemProps, *args, **kwargs):
         super().__init__(props, *args, **kwargs)
         self.props.kind = "device"
-        self.setPen(QPen(QColor("#334155"), 1))
-        self.setBrush(QBrush(QColor(226, 232, 240)))
         self.setOpacity(1.0)
 
 class FurnitureItem(PlanRectItem):
     def __init__(self, props: ItemProps, *args, **kwargs):
         super().__init__(props, *args, **kwargs)
         self.props.kind = "furniture"
-        self.setPen(QPen(QColor("#334155"), 1))
-        self.setBrush(QBrush(QColor(226, 232, 240)))
         self.setOpacity(1.0)
 
 class OpeningItem(PlanRectItem):
@@ -384,6 +381,11 @@ class OpeningItem(PlanRectItem):
     """
     MAG_DIST = 24.0
     EDGE_SWITCH_EPS = 8.0
+    subtype: str = "window"   # на уровне класса: стиль нужен уже в PlanRectItem.__init__
+
+    @property
+    def style_kind(self) -> str:
+        return self.subtype
     def __init__(self, props: ItemProps, *args, subtype: str = "window", **kwargs):
         super().__init__(props, *args, **kwargs)
         self.props.kind = "opening"
@@ -396,21 +398,10 @@ class OpeningItem(PlanRectItem):
         self.length: float = self.rect().width()
         self.thickness: float = self.rect().height()
         self.side: str = "outside" if subtype == "window" else "inside"
-        # в __init__ OpeningItem:
-        self.setPen(QPen(QColor("#0EA5E9" if self.subtype=="window" else "#2563EB"), 2))
-        self.setBrush(QBrush(QColor(14,165,233,40) if self.subtype=="window" else QColor(37,99,235,40)))
         self.setOpacity(1.0)
 
-
-        # визуал
-        if self.subtype == "window":
-            self.brush_normal = QBrush(QColor(80, 180, 255, 150))
-            self.pen_normal = QPen(QColor(30, 120, 200), 1)
-        else:
-            self.brush_normal = QBrush(QColor(230, 170, 60, 160))
-            self.pen_normal = QPen(QColor(180, 120, 30), 1)
-        self.setBrush(self.brush_normal)
-        self.setPen(self.pen_normal)
+        # визуал: окно и дверь — свои стили таблицы
+        self._apply_style()
         self._rounded = 2.0
 
         # проём не масштабируем ручками через угловые хэндлы (пока)
@@ -439,6 +430,10 @@ class OpeningItem(PlanRectItem):
     def _reposition_on_wall(self):
         if not (self.anchor_room and self.edge):
             return
+        self.setPos(self._wall_pos())
+
+    def _wall_pos(self) -> QPointF:
+        """Позиция (в сцене) для текущих anchor_room/edge/offset/side."""
         r = self.anchor_room.rect()
         # локальные координаты «нижнего левого» угла прямоугольника
         if self.edge == "T":
@@ -457,8 +452,31 @@ class OpeningItem(PlanRectItem):
             y = max(0.0, min(self.offset, r.height() - self.length))
             x = r.width() if self.side == "outside" else (r.width() - self.thickness)
             local = QPointF(x, y)
-        scene_pt = self.anchor_room.mapToScene(local)
-        self.setPos(scene_pt)
+        return self.anchor_room.mapToScene(local)
+
+    def _rehome(self, new_scene_pos: QPointF) -> bool:
+        """
+        Проём утащили дальше MAG_DIST от своей комнаты — перевешиваем его на ближайшую
+        стену другой комнаты (поиск по индексу стен сцены). True, если якорь сменился.
+        """
+        sc = self.scene()
+        walls = getattr(sc, "walls", None)
+        if walls is None or self._is_preview:
+            return False
+        c = new_scene_pos + self.rect().center()
+        rr = _scene_rect_of_item(self.anchor_room)
+        dx = max(rr.left() - c.x(), 0.0, c.x() - rr.right())
+        dy = max(rr.top() - c.y(), 0.0, c.y() - rr.bottom())
+        if math.hypot(dx, dy) <= self.MAG_DIST:
+            return False
+        hit = walls.nearest_edge(c.x(), c.y(), self.length, self.MAG_DIST, exclude=self.anchor_room)
+        if hit is None:
+            return False
+        room, edge, offset = hit
+        self.anchor_room = room
+        self._set_edge_and_rect(edge)
+        self.offset = snap(offset, PX_GRID)
+        return True
 
     # запрещаем менять размер обычными путями
     def set_size_px(self, width_px: float, height_px: float) -> bool:
@@ -466,8 +484,11 @@ class OpeningItem(PlanRectItem):
         return False
 
     def itemChange(self, change, value):
-        if change == QGraphicsItem.ItemPositionChange and self.anchor_room and self.edge:
+        if (change == QGraphicsItem.ItemPositionChange and self.anchor_room and self.edge
+                and not getattr(self.scene(), "_restoring", False)):
             new_scene_pos: QPointF = value if isinstance(value, QPointF) else QPointF(value)
+            if self._rehome(new_scene_pos):
+                return self._wall_pos()
             room = self.anchor_room
             rr = room.rect()
             local = room.mapFromScene(new_scene_pos)
@@ -556,18 +577,10 @@ class OpeningItem(PlanRectItem):
         r = self.rect()
         painter.setRenderHint(QPainter.Antialiasing, True)
 
-        # общий бордер/фон
-        if self.subtype == "door":
-            # дверь — «квадратная»: заметнее, толще обводка
-            pen = QPen(QColor("#2563EB"), 2)
-            brush = QBrush(QColor(37, 99, 235, 30))  # лёгкая синяя заливка
-        else:
-            # окно — тонкий «брусок», полупрозрачный
-            pen = QPen(QColor("#0EA5E9"), 1.5)
-            brush = QBrush(QColor(14, 165, 233, 30))
-
-        painter.setPen(pen)
-        painter.setBrush(brush)
+        # дверь — заметнее, толще обводка; окно — тонкий полупрозрачный «брусок»
+        st = self.style()
+        painter.setPen(st.pen)
+        painter.setBrush(st.brush)
         painter.drawRoundedRect(r, 2, 2)
 
 
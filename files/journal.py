@@ -0,0 +1,143 @@
+"""
+Журнал автосохранения: контрольная точка (полный проект) + лог правок.
+
+Каждая правка дописывается в лог одной строкой JSON — только изменившиеся записи
+и id удалённых, так что запись стоит O(правки), а не O(проекта). Когда лог разрастается,
+проект целиком пишется в контрольную точку (через временный файл и os.replace), а лог
+обнуляется. Восстановление — точка + лог по порядку; оборванная при сбое последняя
+строка отбрасывается, всё до неё сохраняется.
+
+У каждой точки свой id (поле JOURNAL_KEY), каждая строка лога несёт id точки, к которой
+написана. Накат пропускает чужие строки: сбой между заменой точки и обнулением лога
+оставляет лог прежней точки, а она могла быть совсем другим проектом (UndoManager.reset).
+"""
+from __future__ import annotations
+import json, os, uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from .undo import SECTIONS
+
+CHECKPOINT_ENTRIES = 500           # правок в логе до новой контрольной точки
+CHECKPOINT_BYTES = 4 * 1024 * 1024  # или байт в логе
+JOURNAL_KEY = "journal"            # id контрольной точки: в точке и в каждой строке её лога
+
+def log_path_for(checkpoint_path: str) -> str:
+    return os.path.splitext(checkpoint_path)[0] + ".wal"
+
+def _fsync_write(f, payload: bytes):
+    f.write(payload)
+    f.flush()
+    os.fsync(f.fileno())
+
+def read_log(log_path: str) -> List[Dict]:
+    """Записи лога по порядку; чтение останавливается на первой битой или недописанной строке."""
+    out: List[Dict] = []
+    try:
+        with open(log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                if not isinstance(entry, dict):
+                    break
+                out.append(entry)
+    except FileNotFoundError:
+        pass
+    return out
+
+def replay(data: Optional[Dict], entries: Iterable[Dict]) -> Dict:
+    """
+    Накатывает записи лога на проект data (не изменяя его). Повторный накат безвреден;
+    записи с id точки, отличным от data[JOURNAL_KEY], пропускаются.
+    """
+    data = data or {}
+    own = data.get(JOURNAL_KEY)
+    sections: Dict[str, Dict[str, Dict]] = {}
+    loose: Dict[str, List[Dict]] = {}   # записи без id (старые файлы) — как есть
+    for s in SECTIONS:
+        sections[s] = {}
+        loose[s] = []
+        for rec in data.get(s, []):
+            if rec.get("id") is None:
+                loose[s].append(rec)
+            else:
+                sections[s][rec["id"]] = rec
+    canvas = data.get("canvas") or {}
+    for entry in entries:
+        if entry.get(JOURNAL_KEY) != own:
+            continue
+        if "canvas" in entry:
+            canvas = entry["canvas"]
+        for uid in entry.get("del", ()):
+            for recs in sections.values():
+                recs.pop(uid, None)
+        for section, rec in entry.get("put", ()):
+            if section in sections:
+                sections[section][rec["id"]] = rec   # на месте, если был; иначе — в конец
+    out: Dict = {"canvas": canvas}
+    for s in SECTIONS:
+        out[s] = loose[s] + list(sections[s].values())
+    return out
+
+def load(checkpoint_path: str) -> Optional[Dict]:
+    """Контрольная точка + хвост лога; None — если нет ни того, ни другого."""
+    data = None
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    entries = read_log(log_path_for(checkpoint_path))
+    if data is None and not entries:
+        return None
+    return replay(data, entries)
+
+def exists(checkpoint_path: str) -> bool:
+    return os.path.exists(checkpoint_path) or os.path.exists(log_path_for(checkpoint_path))
+
+class Journal:
+    """Запись журнала: checkpoint() — проект целиком, append() — одна правка."""
+    def __init__(self, checkpoint_path: str):
+        self.checkpoint_path = checkpoint_path
+        self.log_path = log_path_for(checkpoint_path)
+        self._log = None
+        self._id: Optional[str] = None   # id текущей контрольной точки
+        self._entries = 0
+        self._bytes = 0
+
+    def needs_checkpoint(self) -> bool:
+        return self._entries >= CHECKPOINT_ENTRIES or self._bytes >= CHECKPOINT_BYTES
+
+    def checkpoint(self, data: Dict):
+        cid = uuid.uuid4().hex
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "wb") as f:
+            _fsync_write(f, json.dumps(dict(data, **{JOURNAL_KEY: cid}), ensure_ascii=False, indent=2).encode("utf-8"))
+        os.replace(tmp, self.checkpoint_path)
+        # сбой между replace и обнулением не страшен: у строк старого лога чужой id, накат их пропустит
+        self._id = cid
+        self.close()
+        self._log = open(self.log_path, "wb")
+        self._entries = self._bytes = 0
+
+    def append(self, canvas: Optional[Dict], put: List[Tuple[str, Dict]], dels: List[str]):
+        entry: Dict = {JOURNAL_KEY: self._id}
+        if canvas is not None:
+            entry["canvas"] = canvas
+        if put:
+            entry["put"] = put
+        if dels:
+            entry["del"] = dels
+        if len(entry) == 1:
+            return
+        if self._log is None:
+            self._log = open(self.log_path, "ab")
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        _fsync_write(self._log, payload)
+        self._entries += 1
+        self._bytes += len(payload)
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
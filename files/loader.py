@@ -0,0 +1,60 @@
+from __future__ import annotations
+import os, json
+from PySide6.QtCore import QThread, Signal
+
+READ_CHUNK = 256 * 1024   # читаем файл кусками, чтобы отдавать прогресс и ловить отмену
+
+class ProjectReader(QThread):
+    """
+    Чтение и разбор JSON-проекта в фоновом потоке.
+    Сигналы приходят в GUI-поток (QThread живёт там), данные — обычный dict.
+    """
+    progress = Signal(int)      # 0..100
+    loaded = Signal(object)     # dict проекта
+    failed = Signal(str)        # текст ошибки
+
+    def __init__(self, path: str, parent=None, journaled: bool = False):
+        super().__init__(parent)
+        self.path = path
+        self.journaled = journaled   # path — контрольная точка журнала: докатить лог (journal.py)
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        try:
+            if self.journaled and not os.path.exists(self.path):
+                raw = b"{}"   # контрольной точки ещё нет — только лог
+            else:
+                raw = self._read()
+                if raw is None:
+                    return
+            data = json.loads(raw.decode("utf-8"))
+            if self.isInterruptionRequested():
+                return
+            if not isinstance(data, dict):
+                raise ValueError("Файл не похож на проект SmartHome.")
+            if self.journaled:
+                from .journal import read_log, replay, log_path_for
+                data = replay(data, read_log(log_path_for(self.path)))
+            self.progress.emit(100)
+            self.loaded.emit(data)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _read(self):
+        """Содержимое файла кусками с прогрессом; None — чтение отменили."""
+        total = max(1, os.path.getsize(self.path))
+        parts, done = [], 0
+        with open(self.path, "rb") as f:
+            while True:
+                if self.isInterruptionRequested():
+                    return None
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                done += len(chunk)
+                # чтение — 90%, разбор — оставшиеся 10%
+                self.progress.emit(int(done * 90 / total))
+        return b"".join(parts)
@@ -1,5 +1,9 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
+
+def new_uid() -> str:
+    return uuid.uuid4().hex
 
 @dataclass
 class ItemProps:
@@ -8,6 +12,7 @@ class ItemProps:
     height_px: float = 100.0
     description: str = ""
     kind: str = "object"  # "room" | "device"
+    uid: str = field(default_factory=new_uid)   # постоянный id: переживает сохранение, undo и импорт
 
 class Mode:
     EDIT = "edit"
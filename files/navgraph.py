@@ -0,0 +1,242 @@
+"""
+Граф перемещений по плану: вершины — двери, рёбра — пути внутри комнат.
+
+Дверь соединяет свою комнату с соседней по общей стене (по топологии стен); дверь
+во внешней стене — выход. Внутри прямоугольной комнаты путь между дверями — отрезок.
+Граф обновляется по помеченным дверям/комнатам при следующем запросе, деревья
+Дейкстры кэшируются по двери-источнику до следующего изменения графа.
+"""
+from __future__ import annotations
+import heapq, math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from PySide6.QtCore import QPointF, QRectF
+from .items import RoomItem, OpeningItem
+from .utils import PX_PER_METER, _scene_rect_of_item
+from .walls import opening_gap
+
+Point = Tuple[float, float]
+
+@dataclass
+class Route:
+    length: float                 # px сцены
+    points: List[QPointF]         # ломаная: старт, середины дверей, финиш
+    doors: List[object]
+
+    @property
+    def length_m(self) -> float:
+        return self.length / PX_PER_METER
+
+def _dist(a: Point, b: Point) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+class NavGraph:
+    def __init__(self, scene):
+        self.scene = scene
+        self._doors: Dict[object, Tuple[Point, Tuple[object, ...]]] = {}   # дверь -> (середина, комнаты)
+        self._room_doors: Dict[object, Set[object]] = {}
+        self._room_rects: Dict[object, QRectF] = {}
+        self._adj: Dict[object, Dict[object, float]] = {}
+        self._exits: Set[object] = set()
+        self._trees: Dict[object, Tuple[Dict, Dict]] = {}
+        self._exit_tree: Optional[Tuple[Dict, Dict]] = None
+        self._dirty_doors: Set[object] = set()
+        self._dirty_rooms: Set[object] = set()
+
+    def clear(self):
+        self.__init__(self.scene)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._doors)
+
+    # ---- пометки от сцены ----
+    def mark_door(self, op):
+        if isinstance(op, OpeningItem):
+            self._dirty_doors.add(op)
+
+    def mark_room(self, room):
+        self._dirty_rooms.add(room)
+
+    # ---- пересборка ----
+    def _resolve(self, op) -> Optional[Tuple[Point, Tuple[object, ...]]]:
+        if op.subtype != "door" or op.scene() is not self.scene:
+            return None
+        room = op.anchor_room
+        gap = opening_gap(op)
+        if gap is None or room is None or room.scene() is not self.scene:
+            return None
+        orient, c, a, b = gap
+        mid = (a + b) / 2.0
+        point = (mid, c) if orient == "H" else (c, mid)
+        rooms = [room]
+        for s in self.scene.topology.segments(room):
+            if s.orient == orient and abs(s.coord - c) < 1e-3 and s.lo <= mid <= s.hi:
+                rooms.extend(r for r, e in s.sides if r is not room and e != op.edge and r not in rooms)
+        return point, tuple(rooms)
+
+    def _refresh(self):
+        if not (self._dirty_doors or self._dirty_rooms):
+            return
+        doors = set(self._dirty_doors)
+        for room in self._dirty_rooms:
+            # дверь могла сменить соседа, если рядом сдвинулась/появилась/исчезла комната
+            areas = [self._room_rects.get(room)]
+            if isinstance(room, RoomItem) and room.scene() is self.scene:
+                areas.append(_scene_rect_of_item(room))
+            for area in areas:
+                if area is None:
+                    continue
+                area = area.adjusted(-1, -1, 1, 1)
+                doors.update(d for d, (p, _) in self._doors.items() if area.contains(QPointF(*p)))
+                doors.update(op for op in self.scene._openings
+                             if op.subtype == "door" and op.anchor_room is room)
+        self._dirty_doors.clear()
+        self._dirty_rooms.clear()
+
+        touched: Set[object] = set()
+        for d in doors:
+            old = self._doors.get(d)
+            new = self._resolve(d)
+            if old == new:
+                continue
+            for entry in (old, new):
+                if entry is not None:
+                    touched.update(entry[1])
+            if old is not None:
+                for r in old[1]:
+                    self._room_doors.get(r, set()).discard(d)
+                del self._doors[d]
+            if new is not None:
+                self._doors[d] = new
+                for r in new[1]:
+                    self._room_doors.setdefault(r, set()).add(d)
+            self._adj.pop(d, None)
+        if not touched:
+            return
+        # рёбра между дверями пересчитываем только в затронутых комнатах
+        for r in touched:
+            for d in self._room_doors.get(r, ()):
+                self._adj.pop(d, None)
+        for r in touched:
+            members = self._room_doors.get(r)
+            if not members:
+                self._room_doors.pop(r, None)
+                self._room_rects.pop(r, None)
+                continue
+            self._room_rects[r] = _scene_rect_of_item(r)
+        for r in touched:
+            for d in self._room_doors.get(r, ()):
+                row = self._adj.setdefault(d, {})
+                for rr in self._doors[d][1]:
+                    for e in self._room_doors.get(rr, ()):
+                        if e is not d:
+                            w = _dist(self._doors[d][0], self._doors[e][0])
+                            if w < row.get(e, math.inf):
+                                row[e] = w
+                                self._adj.setdefault(e, {})[d] = w
+        self._exits = {d for d, (_, rooms) in self._doors.items() if len(rooms) == 1}
+        self._trees.clear()
+        self._exit_tree = None
+
+    # ---- Дейкстра ----
+    def _dijkstra(self, sources: Dict[object, float]) -> Tuple[Dict, Dict]:
+        dist = dict(sources)
+        prev: Dict[object, object] = {}
+        heap = [(w, id(d), d) for d, w in sources.items()]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            w, _, d = heapq.heappop(heap)
+            if d in done:
+                continue
+            done.add(d)
+            for e, we in self._adj.get(d, {}).items():
+                nw = w + we
+                if nw < dist.get(e, math.inf):
+                    dist[e] = nw
+                    prev[e] = d
+                    heapq.heappush(heap, (nw, id(e), e))
+        return dist, prev
+
+    def _tree(self, door) -> Tuple[Dict, Dict]:
+        t = self._trees.get(door)
+        if t is None:
+            t = self._trees[door] = self._dijkstra({door: 0.0})
+        return t
+
+    @staticmethod
+    def _chain(prev: Dict, end) -> List[object]:
+        out = [end]
+        while out[-1] in prev:
+            out.append(prev[out[-1]])
+        return out
+
+    def _locate(self, item) -> Tuple[Optional[Point], Optional[object]]:
+        """Точка и комната для комнаты (центр) или прибора/мебели (центр в сцене)."""
+        if isinstance(item, RoomItem):
+            c = _scene_rect_of_item(item).center()
+            return (c.x(), c.y()), item
+        parent = item.parentItem()
+        if not isinstance(parent, RoomItem):
+            return None, None
+        c = item.mapToScene(item.rect().center())
+        return (c.x(), c.y()), parent
+
+    # ---- запросы ----
+    def route(self, a, b) -> Optional[Route]:
+        """Кратчайший путь между комнатами/приборами через двери (None — не связаны)."""
+        self._refresh()
+        pa, ra = self._locate(a)
+        pb, rb = self._locate(b)
+        if ra is None or rb is None:
+            return None
+        if ra is rb:
+            return Route(_dist(pa, pb), [QPointF(*pa), QPointF(*pb)], [])
+        best, best_pair = math.inf, None
+        for da in self._room_doors.get(ra, ()):
+            dist, _ = self._tree(da)
+            base = _dist(pa, self._doors[da][0])
+            for db in self._room_doors.get(rb, ()):
+                w = dist.get(db)
+                if w is not None and base + w + _dist(self._doors[db][0], pb) < best:
+                    best = base + w + _dist(self._doors[db][0], pb)
+                    best_pair = (da, db)
+        if best_pair is None:
+            return None
+        da, db = best_pair
+        doors = self._chain(self._tree(da)[1], db)[::-1]
+        pts = [QPointF(*pa)] + [QPointF(*self._doors[d][0]) for d in doors] + [QPointF(*pb)]
+        return Route(best, pts, doors)
+
+    def distance(self, a, b) -> Optional[float]:
+        r = self.route(a, b)
+        return None if r is None else r.length
+
+    def exit_route(self, item) -> Optional[Route]:
+        """Путь эвакуации: от комнаты/прибора до ближайшей двери во внешней стене."""
+        self._refresh()
+        p, room = self._locate(item)
+        if room is None or not self._exits:
+            return None
+        if self._exit_tree is None:
+            self._exit_tree = self._dijkstra({d: 0.0 for d in self._exits})
+        dist, prev = self._exit_tree
+        best, start = math.inf, None
+        for d in self._room_doors.get(room, ()):
+            w = dist.get(d)
+            if w is not None and _dist(p, self._doors[d][0]) + w < best:
+                best, start = _dist(p, self._doors[d][0]) + w, d
+        if start is None:
+            return None
+        doors = self._chain(prev, start)
+        return Route(best, [QPointF(*p)] + [QPointF(*self._doors[d][0]) for d in doors], doors)
+
+    def connected_rooms(self, room) -> Set[object]:
+        """Комнаты, куда можно пройти из room."""
+        self._refresh()
+        seen: Set[object] = set()
+        for d in self._room_doors.get(room, ()):
+            seen.update(r for e in self._tree(d)[0] for r in self._doors[e][1])
+        seen.discard(room)
+        return seen
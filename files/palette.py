@@ -1,12 +1,15 @@
 from __future__ import annotations
-import json
-from typing import Dict, Tuple
-from PySide6.QtCore import Qt, QRectF, QPointF, QPoint, QSize, QMimeData, QRect, QByteArray
+import json, re
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
+from PySide6.QtCore import (Qt, QRectF, QPointF, QPoint, QSize, QMimeData, QRect, QByteArray,
+                            QAbstractListModel, QModelIndex)
 from PySide6.QtGui import QIcon, QPixmap, QPainter, QPen, QFont, QDrag, QColor, QCursor
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QApplication,QGridLayout, QScrollArea, QToolButton, QListWidget, QListWidgetItem
+from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QApplication, QGridLayout, QScrollArea, QToolButton,
+                               QListWidget, QListWidgetItem, QListView, QAbstractItemView, QLineEdit, QComboBox, QStyledItemDelegate)
 from .utils import (ROOM_COLOR, DEV_COLOR, PREVIEW_MAX_W, PREVIEW_MAX_H, DEVICE_PREVIEW_SIZE,
                     load_svg_icon, CATEGORY_ICON_ROOMS, CATEGORY_ICON_DEVICES, CATEGORY_ICON_FURNITURE)
-from typing import Dict, Tuple, Optional
+from .catalog import catalog
 
 def make_icon(w: int, h: int, color: QColor, label: str = "") -> QIcon:
     pm = QPixmap(w, h); pm.fill(Qt.transparent)
@@ -20,6 +23,7 @@ def make_icon(w: int, h: int, color: QColor, label: str = "") -> QIcon:
     p.end()
     return QIcon(pm)
 
+@lru_cache(maxsize=None)
 def make_category_icon(kind: str, size: int = 44) -> QIcon:
     svg_path = CATEGORY_ICON_ROOMS if kind == "rooms" else (CATEGORY_ICON_DEVICES if kind == "devices" else CATEGORY_ICON_FURNITURE)
     svg_icon = load_svg_icon(svg_path, size)
@@ -161,10 +165,113 @@ class PreviewTile(QWidget):
         self.updateGeometry() 
         super().resizeEvent(ev)
 
+SIZE_RE = re.compile(r"^(\d+(?:[.,]\d+)?)\s*[xх×*]\s*(\d+(?:[.,]\d+)?)$", re.IGNORECASE)
+
+def parse_size_query(text: str) -> Tuple[str, Optional[float], Optional[float]]:
+    """«диван 200x90» -> ("диван", 200, 90): слово вида ШxГ — верхний предел габаритов."""
+    words, max_w, max_h = [], None, None
+    for w in text.split():
+        m = SIZE_RE.match(w)
+        if m:
+            max_w, max_h = (float(g.replace(",", ".")) for g in m.groups())
+        else:
+            words.append(w)
+    return " ".join(words), max_w, max_h
+
+class CatalogModel(QAbstractListModel):
+    """
+    Найденные позиции каталога. Название берётся из индекса; описание и иконка — из самой
+    позиции, которая читается с диска, только когда вид спросит о видимой строке.
+    """
+    ICON = 40
+
+    def __init__(self, cat, parent=None):
+        super().__init__(parent)
+        self.cat = cat
+        self._rows: List[int] = []
+
+    def catalog_index(self, row: int) -> int:
+        return self._rows[row]
+
+    def set_rows(self, rows: List[int]):
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.cat.rows[i].name
+        if role == Qt.DecorationRole:
+            icon = self.cat.entry(i).get("icon")
+            return (load_svg_icon(icon, self.ICON) if icon else None) or make_category_icon(self.cat.rows[i].section, self.ICON)
+        if role == Qt.ToolTipRole:
+            row, meta = self.cat.rows[i], self.cat.entry(i)
+            lines = [row.name, f"{row.w:.0f} × {row.h:.0f}"]
+            if row.category:
+                lines.append(row.category)
+            if meta.get("desc"):
+                lines.append(meta["desc"])
+            return "\n".join(lines)
+        return None
+
+    def flags(self, index: QModelIndex):
+        return super().flags(index) | Qt.ItemIsDragEnabled
+
+    def mimeTypes(self):
+        return ["application/x-smart"]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        if indexes:
+            meta = self.cat.entry(self._rows[indexes[0].row()])
+            mime.setData("application/x-smart", QByteArray(json.dumps(meta, ensure_ascii=False).encode("utf-8")))
+        return mime
+
+class _TileDelegate(QStyledItemDelegate):
+    """Размер плитки постоянный: раскладке не нужны данные строк (и иконки) вне экрана."""
+    SIZE = QSize(84, 76)
+
+    def sizeHint(self, option, index) -> QSize:
+        return self.SIZE
+
+class CatalogView(QListView):
+    """Плитки каталога. Строки раскладываются пачками, данные запрашиваются только у видимых."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setIconSize(QSize(CatalogModel.ICON, CatalogModel.ICON))
+        self.setItemDelegate(_TileDelegate(self))
+        self.setSpacing(4)
+        self.setWordWrap(True)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragOnly)
+        self.setStyleSheet("QListView{ background:#ffffff; border:none; }")
+
+    def startDrag(self, actions):
+        # как у PreviewTile: без картинки под курсором — «призрак» рисует сама сцена
+        idx = self.currentIndex()
+        if not idx.isValid():
+            return
+        drag = QDrag(self)
+        drag.setMimeData(self.model().mimeData([idx]))
+        drag.exec(Qt.CopyAction)
+
 class PalettePanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._current = "rooms"
+        self._view: Optional[CatalogView] = None
         self._build_ui()
 
     def _build_ui(self):
@@ -232,6 +339,7 @@ class PalettePanel(QWidget):
 
 
     def _clear_content(self):
+        self._view = None
         while self.content_layout.count():
             item = self.content_layout.takeAt(0)
             w = item.widget()
@@ -249,61 +357,53 @@ class PalettePanel(QWidget):
             self._populate_furniture()
 
     def _populate_rooms(self):
-        blocks = [
-            # Комната
-            {"name": "Комната 300x200", "w": 300, "h": 200, "kind": "room", "desc": "Прямоугольная"},
-            # Проёмы
-            {"name": "Окно", "w": 100, "h": 12, "kind": "opening", "subtype": "window", "desc": "Проём (окно)"},
-            {"name": "Дверь", "w": 90,  "h": 16, "kind": "opening", "subtype": "door",   "desc": "Проём (дверь)"},
-        ]
-        for meta in blocks:
-            self.content_layout.addWidget(PreviewTile(meta))
+        # комната и проёмы — плитки с формой; их в каталоге единицы
+        cat = catalog()
+        for i in cat.query(section="rooms"):
+            self.content_layout.addWidget(PreviewTile(cat.entry(i)))
         self.content_layout.addStretch(1)
 
-
     def _populate_devices(self):
-        devices = [
-        {"name":"Лампа","w":30,"h":30,"kind":"device","icon":"assets/icons/device_lamp.svg"},
-        {"name":"Розетка","w":20,"h":20,"kind":"device","icon":"assets/icons/device_socket.svg"},
-        {"name":"Датчик движения","w":30,"h":30,"kind":"device","icon":"assets/icons/device_motion.svg"},
-        {"name":"Камера","w":46,"h":32,"kind":"device","icon":"assets/icons/device_camera.svg"},
-        {"name":"Кондиционер","w":90,"h":30,"kind":"device","icon":"assets/icons/device_ac.svg"},
-        {"name":"Термостат","w":32,"h":48,"kind":"device","icon":"assets/icons/device_thermostat.svg"},
-        {"name":"Колонка","w":40,"h":80,"kind":"device","icon":"assets/icons/device_speaker.svg"},
-        {"name":"Роутер","w":80,"h":30,"kind":"device","icon":"assets/icons/device_router.svg"},
-        {"name":"Хаб","w":40,"h":40,"kind":"device","icon":"assets/icons/device_hub.svg"},
-        ]
-
-        grid_host = QWidget(); grid = QGridLayout(grid_host)
-        grid.setContentsMargins(0, 0, 0, 0)
-        grid.setHorizontalSpacing(8); grid.setVerticalSpacing(8)
-        for i, meta in enumerate(devices):
-            grid.addWidget(PreviewTile(meta), i // 2, i % 2)
-        self.content_layout.addWidget(grid_host)
-        self.content_layout.addStretch(1)
+        self._populate_catalog("devices")
 
     def _populate_furniture(self):
-            furniture = [
-            {"name":"Кровать","w":200,"h":160,"kind":"furniture","icon":"assets/icons/furn_bed.svg"},
-            {"name":"Диван","w":180,"h":80,"kind":"furniture","icon":"assets/icons/furn_sofa.svg"},
-            {"name":"Стол","w":140,"h":80,"kind":"furniture","icon":"assets/icons/furn_table.svg"},
-            {"name":"Стул","w":40,"h":40,"kind":"furniture","icon":"assets/icons/furn_chair.svg"},
-            {"name":"Холодильник","w":70,"h":70,"kind":"furniture","icon":"assets/icons/furn_fridge.svg"},
-            {"name":"Плита","w":60,"h":60,"kind":"furniture","icon":"assets/icons/furn_stove.svg"},
-            {"name":"Торшер","w":30,"h":30,"kind":"furniture","icon":"assets/icons/furn_floorlamp.svg"},
-            {"name":"Телевизор","w":120,"h":20,"kind":"furniture","icon":"assets/icons/furn_tv.svg"},
-            {"name":"Тумба","w":80,"h":45,"kind":"furniture","icon":"assets/icons/furn_nightstand.svg"},
-            {"name":"Шкаф","w":160,"h":60,"kind":"furniture","icon":"assets/icons/furn_wardrobe.svg"},
-            {"name":"Унитаз","w":38,"h":70,"kind":"furniture","icon":"assets/icons/furn_toilet.svg"},
-            ]
-
-            grid_host = QWidget(); grid = QGridLayout(grid_host)
-            grid.setContentsMargins(0, 0, 0, 0)
-            grid.setHorizontalSpacing(8); grid.setVerticalSpacing(8)
-            for i, meta in enumerate(furniture):
-                grid.addWidget(PreviewTile(meta), i // 2, i % 2)
-            self.content_layout.addWidget(grid_host)
-            self.content_layout.addStretch(1)
+        self._populate_catalog("furniture")
+
+    def _populate_catalog(self, section: str):
+        """Приборы/мебель: список по индексу каталога, позиции и иконки — по мере прокрутки."""
+        cat = catalog()
+        host = QWidget()
+        vb = QVBoxLayout(host)
+        vb.setContentsMargins(0, 0, 0, 0)
+        vb.setSpacing(6)
+        ed = QLineEdit()
+        ed.setPlaceholderText("Название или размер, напр. 60x40")
+        ed.setClearButtonEnabled(True)
+        cb = QComboBox()
+        cb.addItem("Все категории", "")
+        for c in cat.categories(section):
+            cb.addItem(c, c)
+        model = CatalogModel(cat, host)
+        view = CatalogView()
+        view.setModel(model)
+        vb.addWidget(ed)
+        vb.addWidget(cb)
+        vb.addWidget(view, 1)
+
+        def refresh():
+            text, max_w, max_h = parse_size_query(ed.text())
+            model.set_rows(cat.query(text, section, cb.currentData() or None, max_w, max_h))
+        ed.textChanged.connect(refresh)
+        cb.currentIndexChanged.connect(refresh)
+        refresh()
+        self.content_layout.addWidget(host, 1)
+        self._view = view
+
+    def current_entry(self) -> Optional[int]:
+        """Номер в каталоге выбранной плитки приборов/мебели; None — ничего не выбрано."""
+        idx = self._view.currentIndex() if self._view is not None else None
+        return self._view.model().catalog_index(idx.row()) if idx is not None and idx.isValid() else None
+
     def resizeEvent(self, e):
         super().resizeEvent(e)
         # перерисовать плитки, чтобы sizeHint учитывал новую ширину
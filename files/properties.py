@@ -2,15 +2,18 @@
 from __future__ import annotations
 import json, os
 from typing import Optional, List
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QModelIndex
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit, QDoubleSpinBox, QComboBox,
-    QListWidget, QListWidgetItem, QLabel, QHBoxLayout, QPushButton,QGroupBox
+    QListWidget, QListWidgetItem, QListView, QLabel, QHBoxLayout, QPushButton,QGroupBox
 )
 
-from .items import RoomItem, DeviceItem, PlanRectItem, FurnitureItem
+from .items import RoomItem, DeviceItem, PlanRectItem, FurnitureItem, OpeningItem
 from .scene import PlanScene
 from .scene import Layer  # если у вас Layer объявлен в scene.py — импорт скорректируйте: from .scene import Layer
+from .room_contents import RoomChildrenModel, RoomChildrenProxy
+
+SORT_ORDERS = (("Как на плане", None), ("По имени А→Я", Qt.AscendingOrder), ("По имени Я→А", Qt.DescendingOrder))
 
 class PropertyPanel(QWidget):
     # полезный сигнал, если нужно куда-то отдать инфу наружу
@@ -41,21 +44,46 @@ class PropertyPanel(QWidget):
         for s in (self.sp_room_w, self.sp_room_h):
             s.setRange(1, 99999); s.setDecimals(0); s.setSingleStep(5); s.setSuffix(" px")
 
-        self.list_devices = QListWidget()
-        self.list_furniture = QListWidget()
-        self.list_devices.setMinimumHeight(120)
-        self.list_furniture.setMinimumHeight(120)
-        self.list_devices.setStyleSheet("QListWidget{ background:#fafafa; }")
-        self.list_furniture.setStyleSheet("QListWidget{ background:#fafafa; }")
+        # содержимое комнаты: модели правятся точечно по сигналам сцены, QListView рисует только видимое
+        self.model_devices = RoomChildrenModel(scene, DeviceItem, "Прибор", self)
+        self.model_furniture = RoomChildrenModel(scene, FurnitureItem, "Мебель", self)
+        self.proxy_devices = RoomChildrenProxy(self.model_devices, self)
+        self.proxy_furniture = RoomChildrenProxy(self.model_furniture, self)
+        self.list_devices = QListView()
+        self.list_furniture = QListView()
+        for view, proxy in ((self.list_devices, self.proxy_devices), (self.list_furniture, self.proxy_furniture)):
+            view.setModel(proxy)
+            view.setUniformItemSizes(True)
+            view.setEditTriggers(QListView.NoEditTriggers)
+            view.setMinimumHeight(120)
+            view.setStyleSheet("QListView{ background:#fafafa; }")
+
+        self.ed_contents_filter = QLineEdit()
+        self.ed_contents_filter.setPlaceholderText("Фильтр по названию…")
+        self.ed_contents_filter.setClearButtonEnabled(True)
+        self.ed_contents_filter.textChanged.connect(self._apply_contents_filter)
+        self.cmb_contents_sort = QComboBox()
+        self.cmb_contents_sort.addItems([title for title, _ in SORT_ORDERS])
+        self.cmb_contents_sort.currentIndexChanged.connect(self._apply_contents_sort)
+        contents_row = QHBoxLayout()
+        contents_row.addWidget(self.ed_contents_filter, 1)
+        contents_row.addWidget(self.cmb_contents_sort)
+
+        self.list_neighbors = QListWidget()
+        self.list_neighbors.setMaximumHeight(90)
+        self.list_neighbors.setStyleSheet("QListWidget{ background:#fafafa; }")
 
         fr.addRow("Название:", self.ed_room_name)
         fr.addRow("Ширина:", self.sp_room_w)
         fr.addRow("Высота:", self.sp_room_h)
+        fr.addRow(contents_row)
         fr.addRow(QLabel("Приборы в комнате:"), self.list_devices)
         fr.addRow(QLabel("Мебель в комнате:"), self.list_furniture)
+        fr.addRow(QLabel("Соседние комнаты:"), self.list_neighbors)
 
-        self.list_devices.itemDoubleClicked.connect(self._go_to_device)
-        self.list_furniture.itemDoubleClicked.connect(self._go_to_furniture)
+        self.list_devices.doubleClicked.connect(self._go_to_device)
+        self.list_furniture.doubleClicked.connect(self._go_to_furniture)
+        self.list_neighbors.itemDoubleClicked.connect(self._go_to_room)
         # хендлеры изменений комнаты
         self.ed_room_name.textEdited.connect(self._apply_room_name)
         self.sp_room_w.valueChanged.connect(self._apply_room_size)
@@ -84,18 +112,14 @@ class PropertyPanel(QWidget):
         fo = QFormLayout(self.grp_opening)
 
         self.opening_kind = QLabel("-")            # окно/дверь (read-only)
-        self.sp_open_w = QDoubleSpinBox()          # ширина окна
-        self.sp_open_h = QDoubleSpinBox()          # высота окна
+        self.sp_open_w = QDoubleSpinBox()          # длина вдоль стены
+        self.sp_open_h = QDoubleSpinBox()          # толщина (поперёк стены)
         for s in (self.sp_open_w, self.sp_open_h):
             s.setRange(1, 9999); s.setDecimals(0); s.setSingleStep(5); s.setSuffix(" px")
 
-        self.cmb_door_swing = QComboBox()
-        self.cmb_door_swing.addItems(["Вправо", "Влево"])
-
         fo.addRow("Тип:", self.opening_kind)
-        fo.addRow("Ширина (окно):", self.sp_open_w)
-        fo.addRow("Высота (окно):", self.sp_open_h)
-        fo.addRow("Открытие (дверь):", self.cmb_door_swing)
+        fo.addRow("Длина:", self.sp_open_w)
+        fo.addRow("Толщина:", self.sp_open_h)
 
         root.addWidget(self.grp_opening)  # где root — основной layout панели
         self.grp_opening.setVisible(False)
@@ -103,7 +127,6 @@ class PropertyPanel(QWidget):
         # сигналы
         self.sp_open_w.valueChanged.connect(self._apply_opening_size)
         self.sp_open_h.valueChanged.connect(self._apply_opening_size)
-        self.cmb_door_swing.currentIndexChanged.connect(self._apply_door_swing)
 
         self.clear()
 
@@ -113,6 +136,9 @@ class PropertyPanel(QWidget):
         self.lbl_title.setText("Ничего не выбрано")
         self.frm_room.setVisible(False)
         self.frm_dev.setVisible(False)
+        self.grp_opening.setVisible(False)
+        self.model_devices.set_room(None)
+        self.model_furniture.set_room(None)
 
     def load_item(self, item: Optional[PlanRectItem]):
         self._current = item
@@ -122,10 +148,12 @@ class PropertyPanel(QWidget):
 
         if isinstance(item, RoomItem):
             self.lbl_title.setText("Свойства: Комната")
-            self._populate_room_devices(item)
-            self._populate_room_furniture(item)
+            self.model_devices.set_room(item)
+            self.model_furniture.set_room(item)
+            self._populate_room_neighbors(item)
             self.frm_room.setVisible(True)
             self.frm_dev.setVisible(False)
+            self.grp_opening.setVisible(False)
 
             # прокинуть текущее состояние
             self.ed_room_name.blockSignals(True)
@@ -146,7 +174,10 @@ class PropertyPanel(QWidget):
         elif isinstance(item, DeviceItem):
             self.lbl_title.setText("Свойства: Прибор")
             self.frm_room.setVisible(False)
+            self.model_devices.set_room(None)
+            self.model_furniture.set_room(None)
             self.frm_dev.setVisible(True)
+            self.grp_opening.setVisible(False)
 
             self.ed_dev_name.blockSignals(True)
             self.ed_dev_model.blockSignals(True)
@@ -156,23 +187,34 @@ class PropertyPanel(QWidget):
 
             self.ed_dev_name.blockSignals(False)
             self.ed_dev_model.blockSignals(False)
+        elif isinstance(item, OpeningItem) and item.anchor_room is not None:
+            self.lbl_title.setText("Свойства: Проём")
+            self.frm_room.setVisible(False)
+            self.frm_dev.setVisible(False)
+            self.model_devices.set_room(None)
+            self.model_furniture.set_room(None)
+            self.grp_opening.setVisible(True)
+            self.opening_kind.setText("Дверь" if item.subtype == "door" else "Окно")
+            self._show_opening_size(item)
         else:
             self.clear()
 
     # ---------- helpers ----------
-    def _populate_room_devices(self, room: RoomItem):
-        self.list_devices.clear()
-        for child in room.childItems():
-            if isinstance(child, DeviceItem):
-                li = QListWidgetItem(child.props.name or "Прибор")
-                li.setData(Qt.UserRole, child)
-                self.list_devices.addItem(li)
+    def _apply_contents_filter(self, text: str):
+        for proxy in (self.proxy_devices, self.proxy_furniture):
+            proxy.setFilterFixedString(text.strip())
+
+    def _apply_contents_sort(self, index: int):
+        order = SORT_ORDERS[index][1]
+        for proxy in (self.proxy_devices, self.proxy_furniture):
+            proxy.set_order(order)
 
     # ---------- apply handlers ----------
     def _apply_room_name(self, text: str):
         if not isinstance(self._current, RoomItem): return
         self._current.props.name = text.strip()
         self._current.update_tooltip()
+        self.scene.item_renamed(self._current)
         self.scene._push_snapshot("room.name")
 
     def _apply_room_size(self, *_):
@@ -187,8 +229,8 @@ class PropertyPanel(QWidget):
         self.sp_room_h.setValue(self._current.rect().height())
         self.sp_room_w.blockSignals(False); self.sp_room_h.blockSignals(False)
 
-    def _go_to_device(self, item: QListWidgetItem):
-        dev = item.data(Qt.UserRole)
+    def _go_to_device(self, index: QModelIndex):
+        dev = self.proxy_devices.item_at(index)
         if not isinstance(dev, DeviceItem): return
         self.scene.set_active_layer(Layer.DEVICES)   # переключаем слой (HUD сам подсветится)
         for it in self.scene.selectedItems():
@@ -196,8 +238,17 @@ class PropertyPanel(QWidget):
         dev.setSelected(True)
         self.requestFocusItem.emit(dev)
 
-    def _go_to_furniture(self, item: QListWidgetItem):
-        furn = item.data(Qt.UserRole)
+    def _go_to_room(self, item: QListWidgetItem):
+        room = item.data(Qt.UserRole)
+        if not isinstance(room, RoomItem): return
+        self.scene.set_active_layer(Layer.ROOMS)
+        for it in self.scene.selectedItems():
+            it.setSelected(False)
+        room.setSelected(True)
+        self.requestFocusItem.emit(room)
+
+    def _go_to_furniture(self, index: QModelIndex):
+        furn = self.proxy_furniture.item_at(index)
         if not isinstance(furn, FurnitureItem): return
         self.scene.set_active_layer(Layer.FURNITURE) # переключаем слой (HUD сам подсветится)
         for it in self.scene.selectedItems():
@@ -210,6 +261,7 @@ class PropertyPanel(QWidget):
         if not isinstance(self._current, DeviceItem): return
         self._current.props.name = text.strip()
         self._current.update_tooltip()
+        self.scene.item_renamed(self._current)
         self.scene._push_snapshot("device.name")
 
     def _apply_dev_model(self, text: str):
@@ -217,21 +269,32 @@ class PropertyPanel(QWidget):
         # используем description как «модель/описание»
         self._current.props.description = text.strip()
         self._current.update_tooltip()
+        self.scene.item_renamed(self._current)
         self.scene._push_snapshot("device.model")
 
-    def _populate_room_devices(self, room: RoomItem):
-        self.list_devices.clear()
-        for ch in room.childItems():
-            if isinstance(ch, DeviceItem):
-                li = QListWidgetItem(ch.props.name or "Прибор")
-                li.setData(Qt.UserRole, ch)
-                self.list_devices.addItem(li)
-
-    def _populate_room_furniture(self, room: RoomItem):
-        self.list_furniture.clear()
-        for ch in room.childItems():
-            if isinstance(ch, FurnitureItem):
-                li = QListWidgetItem(ch.props.name or "Мебель")
-                li.setData(Qt.UserRole, ch)
-                self.list_furniture.addItem(li)
-
+    def _show_opening_size(self, op: OpeningItem):
+        self.sp_open_w.blockSignals(True); self.sp_open_h.blockSignals(True)
+        self.sp_open_w.setValue(op.length)
+        self.sp_open_h.setValue(op.thickness)
+        self.sp_open_w.blockSignals(False); self.sp_open_h.blockSignals(False)
+
+    def _apply_opening_size(self, *_):
+        op = self._current
+        if not isinstance(op, OpeningItem) or op.anchor_room is None: return
+        r = op.anchor_room.rect()
+        wall = r.width() if op.edge in ("T", "B") else r.height()
+        length = min(float(self.sp_open_w.value()), wall)   # длиннее стены проём не бывает
+        thickness = float(self.sp_open_h.value())
+        if (length, thickness) != (op.length, op.thickness):
+            op.set_anchor(op.anchor_room, op.edge, op.offset, length, thickness, op.side)
+            self.scene.track_item(op)
+            self.scene._push_snapshot("opening.size")
+        self._show_opening_size(op)
+
+    def _populate_room_neighbors(self, room: RoomItem):
+        # смежность берётся из топологии стен сцены (общие стены соседних комнат)
+        self.list_neighbors.clear()
+        for other, length in sorted(self.scene.topology.neighbors(room).items(), key=lambda kv: -kv[1]):
+            li = QListWidgetItem(f"{other.props.name or 'Комната'} — стена {length:.0f} px")
+            li.setData(Qt.UserRole, other)
+            self.list_neighbors.addItem(li)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import os, json, hashlib
+from typing import Dict, Optional, List
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QRectF, QSettings, QStandardPaths, Signal
+from PySide6.QtGui import QImage, QPainter, QPen, QColor, QPixmap
+from .utils import ROOM_COLOR, ROOM_BORDER, DEV_COLOR, DEV_BORDER
+
+RECENT_MAX = 12
+THUMB_W, THUMB_H = 160, 100
+
+# ===== список недавних (QSettings) =====
+def recent_paths() -> List[str]:
+    st = QSettings("SmartHome", "Editor")
+    return list(st.value("recent", [], list))
+
+def push_recent(path: str):
+    st = QSettings("SmartHome", "Editor")
+    files = st.value("recent", [], list)
+    if path in files: files.remove(path)
+    files.insert(0, path)
+    st.setValue("recent", files[:RECENT_MAX])
+
+# ===== кэш: meta + миниатюра, ключ = путь + mtime + размер =====
+def cache_dir() -> str:
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation) or os.path.expanduser("~/.cache")
+    return os.path.join(base, "SmartHome", "recent")
+
+def _path_tag(path: str) -> str:
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+def cache_key(path: str) -> Optional[str]:
+    """Ключ записи кэша; None, если файла нет. Стоит одного stat(), файл не читается."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = f"{st.st_mtime_ns}|{st.st_size}".encode("utf-8")
+    return f"{_path_tag(path)}-{hashlib.sha1(stamp).hexdigest()[:16]}"
+
+def lookup(path: str):
+    """(meta, QPixmap|None) из кэша или None, если записи для текущей версии файла нет."""
+    key = cache_key(path)
+    if key is None:
+        return None
+    meta_path = os.path.join(cache_dir(), key + ".json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    pm = QPixmap(os.path.join(cache_dir(), key + ".png"))
+    return meta, (None if pm.isNull() else pm)
+
+def project_summary(data: Dict) -> Dict:
+    canvas = data.get("canvas") or {}
+    return {
+        "rooms": len(data.get("rooms", [])),
+        "devices": len(data.get("devices", [])),
+        "furniture": len(data.get("furniture", [])),
+        "openings": len(data.get("openings", [])),
+        "canvas": [float(canvas.get("w", 0)), float(canvas.get("h", 0))],
+    }
+
+def render_thumbnail(data: Dict, w: int = THUMB_W, h: int = THUMB_H) -> QImage:
+    """Схема плана прямо по данным проекта. QImage можно рисовать вне GUI-потока."""
+    img = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+    img.fill(QColor("#F2F4F7"))
+    rooms = {}
+    for r in data.get("rooms", []):
+        rooms[r.get("id")] = QRectF(float(r["x"]), float(r["y"]), float(r["w"]), float(r["h"]))
+    if not rooms:
+        return img
+    bbox = QRectF()
+    for rr in rooms.values():
+        bbox = bbox.united(rr)
+    pad = 6.0
+    k = min((w - 2 * pad) / max(1.0, bbox.width()), (h - 2 * pad) / max(1.0, bbox.height()))
+    ox = pad + ((w - 2 * pad) - bbox.width() * k) / 2 - bbox.left() * k
+    oy = pad + ((h - 2 * pad) - bbox.height() * k) / 2 - bbox.top() * k
+
+    def _map(r: QRectF) -> QRectF:
+        return QRectF(ox + r.left() * k, oy + r.top() * k, max(1.0, r.width() * k), max(1.0, r.height() * k))
+
+    p = QPainter(img)
+    p.setRenderHint(QPainter.Antialiasing, True)
+    p.setPen(QPen(ROOM_BORDER, 1)); p.setBrush(ROOM_COLOR)
+    for rr in rooms.values():
+        p.drawRect(_map(rr))
+    p.setPen(QPen(DEV_BORDER, 0.5)); p.setBrush(DEV_COLOR)
+    for it in data.get("devices", []) + data.get("furniture", []):
+        room = rooms.get(it.get("room_id"))
+        x, y = float(it.get("x", 0)), float(it.get("y", 0))
+        if room is not None:
+            x += room.left(); y += room.top()
+        p.drawRect(_map(QRectF(x, y, float(it.get("w", 0)), float(it.get("h", 0)))))
+    p.end()
+    return img
+
+class _CacheJob(QRunnable):
+    def __init__(self, cache: "RecentCache", path: str, key: str, data: Optional[Dict]):
+        super().__init__()
+        self.cache, self.path, self.key, self.data = cache, path, key, data
+
+    def run(self):
+        try:
+            data = self.data
+            if data is None:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            out = cache_dir()
+            os.makedirs(out, exist_ok=True)
+            render_thumbnail(data).save(os.path.join(out, self.key + ".png"), "PNG")
+            with open(os.path.join(out, self.key + ".json"), "w", encoding="utf-8") as f:
+                json.dump(project_summary(data), f)
+            # задания идут в пуле в любом порядке: запись, которую файл уже обогнал, не нужна,
+            # а чистить чужие версии вправе только задание текущей
+            current = cache_key(self.path) == self.key
+            tag = _path_tag(self.path) + "-"
+            for name in os.listdir(out):
+                if name.startswith(tag) and name.startswith(self.key) != current:
+                    try: os.remove(os.path.join(out, name))
+                    except OSError: pass
+            if current:
+                self.cache.updated.emit(self.path)
+        except Exception:
+            pass
+
+class RecentCache(QObject):
+    """Фоновая генерация записей кэша в глобальном QThreadPool."""
+    updated = Signal(str)   # путь, для которого появилась свежая запись
+
+    def schedule(self, path: str, data: Optional[Dict] = None):
+        """
+        data — уже сериализованный проект (после сохранения); иначе файл читается в фоне.
+        Ключ берётся сейчас: запись ляжет под ту версию файла, для которой её заказали.
+        """
+        key = cache_key(path)
+        if key is not None:
+            QThreadPool.globalInstance().start(_CacheJob(self, path, key, data))
+
+_shared: Optional[RecentCache] = None
+
+def recent_cache() -> RecentCache:
+    global _shared
+    if _shared is None:
+        _shared = RecentCache()
+    return _shared
+
+def describe(meta: Dict) -> str:
+    w, h = meta.get("canvas", [0, 0])
+    return (f"Комнат: {meta.get('rooms', 0)} · Приборов: {meta.get('devices', 0)} · "
+            f"Мебели: {meta.get('furniture', 0)} · Холст: {int(w)}×{int(h)}")
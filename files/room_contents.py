@@ -0,0 +1,99 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+
+class RoomChildrenModel(QAbstractListModel):
+    """
+    Дети одной комнаты заданного класса (приборы или мебель). Наполняется один раз при
+    смене комнаты, дальше правится точечно по itemAdded/itemRemoved/itemRenamed сцены.
+    """
+    ItemRole = Qt.UserRole
+
+    def __init__(self, scene, cls, placeholder: str, parent=None):
+        super().__init__(parent)
+        self.cls = cls
+        self.placeholder = placeholder
+        self._room = None
+        self._items: List[object] = []
+        self._rows: Dict[object, int] = {}
+        scene.itemAdded.connect(self._on_added)
+        scene.itemRemoved.connect(self._on_removed)
+        scene.itemRenamed.connect(self._on_renamed)
+
+    def room(self):
+        return self._room
+
+    def set_room(self, room):
+        self.beginResetModel()
+        self._room = room
+        self._items = [] if room is None else [
+            ch for ch in room.childItems() if isinstance(ch, self.cls) and not ch._is_preview]
+        self._rows = {it: i for i, it in enumerate(self._items)}
+        self.endResetModel()
+
+    # ---- Qt API ----
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        it = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return it.props.name or self.placeholder
+        if role == Qt.ToolTipRole:
+            return it.props.description or None
+        if role == self.ItemRole:
+            return it
+        return None
+
+    def item_at(self, index: QModelIndex) -> Optional[object]:
+        return self._items[index.row()] if index.isValid() else None
+
+    # ---- точечные правки ----
+    def _on_added(self, item):
+        if (self._room is None or not isinstance(item, self.cls) or item in self._rows
+                or item.parentItem() is not self._room):
+            return
+        row = len(self._items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._items.append(item)
+        self._rows[item] = row
+        self.endInsertRows()
+
+    def _on_removed(self, item):
+        if item is self._room:
+            self.set_room(None)
+            return
+        row = self._rows.get(item)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[row]
+        del self._rows[item]
+        for i in range(row, len(self._items)):
+            self._rows[self._items[i]] = i
+        self.endRemoveRows()
+
+    def _on_renamed(self, item):
+        row = self._rows.get(item)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [Qt.DisplayRole, Qt.ToolTipRole])
+
+class RoomChildrenProxy(QSortFilterProxyModel):
+    """Фильтр по подстроке названия и сортировка по имени поверх RoomChildrenModel."""
+    def __init__(self, source: RoomChildrenModel, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        self.setSortLocaleAware(True)
+        self.setDynamicSortFilter(True)
+
+    def set_order(self, order: Optional[Qt.SortOrder]):
+        """None — как в комнате (порядок добавления), иначе по имени."""
+        self.sort(-1 if order is None else 0, Qt.AscendingOrder if order is None else order)
+
+    def item_at(self, index: QModelIndex) -> Optional[object]:
+        return self.sourceModel().item_at(self.mapToSource(index))
@@ -0,0 +1,407 @@
+"""
+Трассировка кабелей от хаба/роутера/розетки к приборам.
+
+План растрируется в сетку с шагом PX_GRID: клетки внутри комнат проходимы, клетки
+у стен дешевле (кабель ведут вдоль стен), мебель перекрывает внутренние клетки,
+переход в другую комнату — через дверь или сверление стены (дорого). Трассы ищет
+ортогональный A* со штрафом за изгиб; на источник — одна сетка и одно дерево трасс ко
+всем приборам комнат, которые он питает. Расчёт — в фоновом потоке, при большом пакете — в пуле процессов
+(spawn: без наследования Qt-состояния).
+"""
+from __future__ import annotations
+import atexit, csv, heapq, math, os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from PySide6.QtCore import Qt, QRectF, QPointF, QThread, Signal
+from PySide6.QtGui import QPainter, QPainterPath, QPen, QColor
+from PySide6.QtWidgets import QGraphicsObject
+from .items import DeviceItem, FurnitureItem
+from .utils import PX_GRID, PX_PER_METER, _scene_rect_of_item
+from .walls import opening_gap
+
+COST_EDGE = 10          # клетка вдоль стены
+COST_FREE = 15          # клетка посреди комнаты
+COST_WALL = 60          # сверлить стену
+COST_TURN = 8           # изгиб трассы
+POOL_MIN_WORK = 400_000 # меньше (клеток сетки × трасс) — считаем в текущем процессе
+POOL_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+REGION_MARGIN = 2       # клеток сетки вокруг области трассировки
+CABLE_RESERVE = 0.10    # запас кабеля в спецификации
+SOURCE_NAMES = ("хаб", "роутер", "розетка")   # в порядке предпочтения
+CABLE_COLOR = QColor("#0F766E")
+CABLE_Z = 70
+
+DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+@dataclass
+class Grid:
+    """Сетка занятости: стоимость клетки (0 — непроходима), номер комнаты (-1 — снаружи), дверь."""
+    x0: float
+    y0: float
+    step: float
+    w: int
+    h: int
+    cost: bytes
+    room: array
+    door: bytes
+
+    def cell_of(self, x: float, y: float) -> int:
+        i = min(max(int((x - self.x0) // self.step), 0), self.w - 1)
+        j = min(max(int((y - self.y0) // self.step), 0), self.h - 1)
+        return j * self.w + i
+
+    def center(self, idx: int) -> Tuple[float, float]:
+        j, i = divmod(idx, self.w)
+        return self.x0 + (i + 0.5) * self.step, self.y0 + (j + 0.5) * self.step
+
+def route_tree(g: Grid, start: int, goals: Sequence[int]) -> Dict[int, Optional[List[int]]]:
+    """
+    Трассы от start ко всем goals одним поиском: ортогональный A* по состояниям
+    (клетка, направление входа), чтобы учитывать изгибы. Оценка — до габарита целей: она не
+    больше пути ни к одной из них, так что цель, вынутая из кучи, уже с кратчайшей трассой;
+    поиск идёт, пока не найдены все цели. Недостижимые цели — None.
+    """
+    W, H = g.w, g.h
+    cost, room, door = g.cost, g.room, g.door
+    todo = set(goals)
+    found: Dict[int, Optional[List[int]]] = {c: None for c in todo}
+    if not todo:
+        return found
+    bx0 = min(c % W for c in todo); bx1 = max(c % W for c in todo)
+    by0 = min(c // W for c in todo); by1 = max(c // W for c in todo)
+    def h(x, y):
+        return (max(bx0 - x, 0, x - bx1) + max(by0 - y, 0, y - by1)) * COST_EDGE
+    # состояние = клетка * 5 + направление входа (4 — старт, без направления)
+    best = [math.inf] * (W * H * 5)
+    prev = array("i", [-1]) * (W * H * 5)
+    s0 = start * 5 + 4
+    best[s0] = 0
+    heap = [(h(start % W, start // W), 0, s0)]
+    pop, push = heapq.heappop, heapq.heappush
+    while heap and todo:
+        _, c, st = pop(heap)
+        if c > best[st]:
+            continue
+        idx, d = divmod(st, 5)
+        if idx in todo:
+            todo.discard(idx)
+            out, k = [idx], st
+            while prev[k] >= 0:
+                k = prev[k]
+                out.append(k // 5)
+            found[idx] = out[::-1]
+            if not cost[idx]:
+                continue          # прибор на непроходимой клетке: дальше сквозь неё нельзя
+        x, y = idx % W, idx // W
+        here = room[idx]
+        for nd in range(4):
+            dx, dy = DIRS[nd]
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < W and 0 <= ny < H):
+                continue
+            n = ny * W + nx
+            step = cost[n]
+            if not step:
+                if n not in todo:
+                    continue
+                step = COST_FREE
+            if room[n] != here:
+                step += 0 if (door[n] and door[idx]) else COST_WALL
+            if d != 4 and nd != d:
+                step += COST_TURN
+            nc = c + step
+            ns = n * 5 + nd
+            if nc < best[ns]:
+                best[ns] = nc
+                prev[ns] = st
+                push(heap, (nc + h(nx, ny), nc, ns))
+    return found
+
+def astar(g: Grid, start: int, goal: int) -> Optional[List[int]]:
+    """Одна трасса (route_tree с одной целью)."""
+    return route_tree(g, start, [goal])[goal]
+
+def _route_task(task):
+    key, grid, start, goals = task
+    return key, route_tree(grid, start, goals)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Пул создаётся один раз: запуск spawn-процесса стоит дороже небольшого пакета."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=get_context("spawn"))
+        atexit.register(_pool.shutdown, cancel_futures=True)
+    return _pool
+
+def route_batch(tasks: Sequence[tuple], stop: Optional[Callable[[], bool]] = None) -> Dict[object, Dict[int, Optional[List[int]]]]:
+    """
+    tasks: (ключ, Grid, старт, цели) — одно дерево трасс на задачу. Большие пакеты — в пуле
+    процессов; stop() проверяется между задачами (в пуле — только до запуска).
+    """
+    stop = stop or (lambda: False)
+    if sum(t[1].w * t[1].h for t in tasks) >= POOL_MIN_WORK and POOL_WORKERS > 1 and not stop():
+        try:
+            pool = _get_pool()
+            return dict(pool.map(_route_task, tasks, chunksize=max(1, len(tasks) // (POOL_WORKERS * 4))))
+        except (OSError, RuntimeError):   # нет процессов (песочница/заморозка) — считаем здесь
+            pass
+    out = {}
+    for t in tasks:
+        if stop():
+            break
+        key, res = _route_task(t)
+        out[key] = res
+    return out
+
+def simplify(g: Grid, cells: Sequence[int]):
+    """Центры клеток трассы без промежуточных точек на прямых участках; число изгибов."""
+    pts = [g.center(c) for c in cells]
+    out = pts[:2]
+    for p in pts[2:]:
+        a, b = out[-2], out[-1]
+        if (a[0] == b[0] == p[0]) or (a[1] == b[1] == p[1]):
+            out[-1] = p
+        else:
+            out.append(p)
+    return out, max(0, len(out) - 2)
+
+# ---------- сцена ----------
+
+@dataclass
+class Cable:
+    source: object
+    target: object
+    room: object
+    points: List[QPointF]
+    length: float             # px сцены
+    bends: int
+
+    @property
+    def length_m(self) -> float:
+        return self.length / PX_PER_METER
+
+def source_rank(item) -> Optional[int]:
+    if not isinstance(item, DeviceItem):
+        return None
+    name = item.props.name.strip().lower()
+    for k, prefix in enumerate(SOURCE_NAMES):
+        if name.startswith(prefix):
+            return k
+    return None
+
+def _center(item) -> QPointF:
+    return item.mapToScene(item.rect().center())
+
+def build_grid(scene, region: QRectF, step: float = PX_GRID) -> Grid:
+    """Сетка занятости для области сцены: комнаты, мебель (кроме полосы у стен) и двери."""
+    s = step
+    x0 = math.floor(region.left() / s) * s - REGION_MARGIN * s
+    y0 = math.floor(region.top() / s) * s - REGION_MARGIN * s
+    w = int(math.ceil((region.right() - x0) / s)) + REGION_MARGIN
+    h = int(math.ceil((region.bottom() - y0) / s)) + REGION_MARGIN
+    cost = bytearray(w * h)
+    room = array("i", [-1]) * (w * h)
+    door = bytearray(w * h)
+    area = QRectF(x0, y0, w * s, h * s)
+
+    def span(lo, hi, origin, n):
+        """Клетки, чьи центры лежат в [lo, hi]."""
+        a = max(0, int(math.ceil((lo - origin) / s - 0.5)))
+        b = min(n - 1, int(math.floor((hi - origin) / s - 0.5)))
+        return a, b
+
+    rooms = [r for r in scene.walls.rooms() if _scene_rect_of_item(r).intersects(area)]
+    for k, r in enumerate(rooms):
+        rr = _scene_rect_of_item(r)
+        i0, i1 = span(rr.left(), rr.right(), x0, w)
+        j0, j1 = span(rr.top(), rr.bottom(), y0, h)
+        for j in range(j0, j1 + 1):
+            edge_row = j in (j0, j1)
+            base = j * w
+            for i in range(i0, i1 + 1):
+                cost[base + i] = COST_EDGE if edge_row or i in (i0, i1) else COST_FREE
+                room[base + i] = k
+        for ch in r.childItems():
+            if isinstance(ch, FurnitureItem):
+                fr = ch.mapRectToScene(ch.rect())
+                fi0, fi1 = span(fr.left(), fr.right(), x0, w)
+                fj0, fj1 = span(fr.top(), fr.bottom(), y0, h)
+                for j in range(max(fj0, j0 + 1), min(fj1, j1 - 1) + 1):
+                    for i in range(max(fi0, i0 + 1), min(fi1, i1 - 1) + 1):
+                        cost[j * w + i] = 0
+    for op in scene._openings:
+        if op.subtype != "door":
+            continue
+        gap = opening_gap(op)
+        if gap is None:
+            continue
+        orient, c, a, b = gap
+        if orient == "H":
+            i0, i1 = span(a, b, x0, w)
+            js = [int((c - y0) // s) - 1, int((c - y0) // s)]
+            cells = [(i, j) for i in range(i0, i1 + 1) for j in js]
+        else:
+            j0, j1 = span(a, b, y0, h)
+            ii = [int((c - x0) // s) - 1, int((c - x0) // s)]
+            cells = [(i, j) for j in range(j0, j1 + 1) for i in ii]
+        for i, j in cells:
+            if 0 <= i < w and 0 <= j < h and room[j * w + i] >= 0:
+                door[j * w + i] = 1
+                cost[j * w + i] = COST_FREE
+    return Grid(x0, y0, s, w, h, bytes(cost), room, bytes(door))
+
+class CableRouter:
+    """Пакетная трассировка: приборы комнаты — от её источника (своего или ближайшего)."""
+    def __init__(self, scene):
+        self.scene = scene
+
+    def sources(self) -> List[object]:
+        return [d for r in self.scene.walls.rooms() for d in self.scene.devices_in_room(r)
+                if source_rank(d) is not None]
+
+    def pick_source(self, room, sources=None):
+        """Источник для комнаты: лучший по типу в самой комнате, иначе ближайший на плане."""
+        sources = self.sources() if sources is None else sources
+        own = [s for s in sources if s.parentItem() is room]
+        if own:
+            return min(own, key=source_rank)
+        if not sources:
+            return None
+        c = _scene_rect_of_item(room).center()
+        return min(sources, key=lambda s: (_center(s) - c).manhattanLength())
+
+    def prepare(self, rooms=None):
+        """
+        Задачи для route_batch (здесь, в GUI-потоке: нужна сцена) и их описание для cables().
+        Задача — одна на источник: сетка по его комнате и всем комнатам, которые он питает,
+        и одно дерево трасс ко всем их приборам.
+        """
+        rooms = list(self.scene.walls.rooms()) if rooms is None else list(rooms)
+        sources = self.sources()
+        plan: Dict[object, List[Tuple[object, List[object]]]] = {}
+        for room in rooms:
+            targets = [d for d in self.scene.devices_in_room(room) if source_rank(d) is None]
+            src = self.pick_source(room, sources)
+            if targets and src is not None:
+                plan.setdefault(src, []).append((room, targets))
+        tasks, meta = [], {}
+        for src, jobs in plan.items():
+            region = _scene_rect_of_item(src.parentItem())
+            for room, _ in jobs:
+                region = region.united(_scene_rect_of_item(room))
+            grid = build_grid(self.scene, region)
+            sp = _center(src)
+            goals = []
+            for room, targets in jobs:
+                for t in targets:
+                    tp = _center(t)
+                    goals.append((t, room, grid.cell_of(tp.x(), tp.y())))
+            key = len(meta)
+            meta[key] = (src, grid, goals)
+            tasks.append((key, grid, grid.cell_of(sp.x(), sp.y()), sorted({c for _, _, c in goals})))
+        return tasks, meta
+
+    def cables(self, found, meta) -> List[Cable]:
+        """Трассы из результата route_batch; порядок — как в prepare()."""
+        out = []
+        for key in sorted(found):
+            src, grid, goals = meta[key]
+            tree = found[key]
+            sp = _center(src)
+            for t, room, cell in goals:
+                cells = tree.get(cell)
+                if not cells:
+                    continue
+                pts, bends = simplify(grid, cells)
+                tp = _center(t)
+                points = [sp] + [QPointF(x, y) for x, y in pts] + [tp]
+                length = sum(math.hypot(b.x() - a.x(), b.y() - a.y()) for a, b in zip(points, points[1:]))
+                out.append(Cable(src, t, room, points, length, bends))
+        return out
+
+    def route(self, rooms=None) -> List[Cable]:
+        tasks, meta = self.prepare(rooms)
+        return self.cables(route_batch(tasks), meta)
+
+class RouteThread(QThread):
+    """
+    route_batch в фоновом потоке: задачи — чистые данные (сетки и номера клеток), сцену
+    поток не трогает. Правка плана во время расчёта помечает результат устаревшим.
+    """
+    routed = Signal(object)     # {ключ: {клетка: трасса}}
+    failed = Signal(str)
+
+    def __init__(self, scene, tasks, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.stale = False
+        scene.planChanged.connect(self.mark_stale)
+
+    def mark_stale(self):
+        self.stale = True
+
+    def run(self):
+        try:
+            found = route_batch(self.tasks, self.isInterruptionRequested)
+            if not self.isInterruptionRequested():
+                self.routed.emit(found)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def write_bom(path: str, cables: Sequence[Cable], reserve: float = CABLE_RESERVE):
+    """Спецификация кабеля в CSV (Excel-совместимо: ';' и BOM в начале файла)."""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        wr = csv.writer(f, delimiter=";")
+        wr.writerow(["Источник", "Прибор", "Комната", "Длина трассы, м", f"С запасом {int(reserve * 100)}%, м", "Изгибов"])
+        total = 0.0
+        for c in cables:
+            need = c.length_m * (1.0 + reserve)
+            total += need
+            wr.writerow([c.source.props.name, c.target.props.name, c.room.props.name,
+                         f"{c.length_m:.2f}", f"{need:.2f}", c.bends])
+        wr.writerow(["Итого", "", "", f"{sum(c.length_m for c in cables):.2f}", f"{total:.2f}", ""])
+
+class CableOverlay(QGraphicsObject):
+    """Слой трасс; после любой правки плана трассы устаревают и слой очищается."""
+    def __init__(self, scene):
+        super().__init__()
+        self.cables: List[Cable] = []
+        self._path = QPainterPath()
+        self.setZValue(CABLE_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self._scene = scene
+        scene.addItem(self)
+        scene.planChanged.connect(self.clear)
+
+    def detach(self):
+        self._scene.planChanged.disconnect(self.clear)
+        self._scene.removeItem(self)
+
+    def set_cables(self, cables: List[Cable]):
+        path = QPainterPath()
+        for c in cables:
+            path.moveTo(c.points[0])
+            for p in c.points[1:]:
+                path.lineTo(p)
+        self.prepareGeometryChange()
+        self.cables, self._path = list(cables), path
+
+    def clear(self):
+        if self.cables:
+            self.set_cables([])
+
+    def boundingRect(self) -> QRectF:
+        return self._path.boundingRect().adjusted(-3, -3, 3, 3)
+
+    def paint(self, painter: QPainter, option, widget=None):
+        pen = QPen(CABLE_COLOR, 2, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+        pen.setCosmetic(True)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(self._path)
@@ -2,21 +2,27 @@ from __future__ import annotations
 import json, math
 from typing import Optional, Dict, Callable
 
-from PySide6.QtCore import Qt, QRectF, QPointF, Signal
-from PySide6.QtGui import QPainter, QPen, QColor, QWheelEvent
+from PySide6.QtCore import Qt, QRectF, QPointF, QLineF, Signal
+from PySide6.QtGui import QPainter, QPainterPath, QPen, QColor, QWheelEvent
 from PySide6.QtWidgets import (
-    QGraphicsScene, QGraphicsView, QGraphicsProxyWidget, QGraphicsItem,
+    QGraphicsScene, QGraphicsView, QGraphicsProxyWidget, QGraphicsItem, QGraphicsLineItem, QGraphicsPathItem,
     QWidget, QHBoxLayout, QDoubleSpinBox, QLabel, QApplication
 )
 
 from .models import Mode, Layer, ItemProps
-from .utils import (BG_COLOR, GRID_STEP, MAJOR_EVERY, GRID_MAJOR, GRID_MINOR,
+from .utils import (BG_COLOR, GRID_STEP, MAJOR_EVERY, GRID_MAJOR, GRID_MINOR, GRID_MIN_PX,
                     SCENE_BORDER, SCENE_BORDER_W, snap, PX_GRID, _scene_rect_of_item, _rects_overlap_strict,
-                    SCENE_W, SCENE_H, EPS, DEV_BORDER)
-from .state import SceneState
+                    SCENE_W, SCENE_H, CANVAS_MAX, EPS, DEV_BORDER, MAGNET_COLOR, GUIDE_COLOR, ROUTE_COLOR,
+                    GUIDE_SNAP_PX, grow_canvas)
+from .state import SceneState, claim_uid
 from .factory import ItemFactory
+from .walls import WallIndex, opening_gap, cut_openings
+from .topology import WallTopology
+from .guides import GuideIndex, item_scene_rect
+from .search import SearchIndex
+from .navgraph import NavGraph
 from .items import RoomItem, DeviceItem, PlanRectItem, FurnitureItem, OpeningItem
-from .hud import LayersHUD
+from .hud import LayersHUD, MinimapHUD
 
 # ---- SizeOverlay (как в монолитной версии) ----
 class SizeOverlay(QWidget):
@@ -35,6 +41,12 @@ class SizeOverlay(QWidget):
     def _emit(self, *_): self.sizeChanged.emit(self.w.value(), self.h.value())
 
 class PlanScene(QGraphicsScene):
+    planChanged = Signal()   # объекты плана добавлены/удалены/сдвинуты (для аналитических слоёв)
+    itemRenamed = Signal(object)   # у объекта сменилось название/описание
+    itemAdded = Signal(object)     # объект попал в сцену или переехал в другую комнату
+    itemRemoved = Signal(object)   # объект уходит из сцены или из своей комнаты (ещё с прежним родителем)
+    itemChanged = Signal(object)   # объект добавлен, сдвинут, изменил размер или поворот
+
     def __init__(self, status_cb: Optional[Callable[[str], None]] = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.mode = Mode.EDIT
@@ -50,29 +62,183 @@ class PlanScene(QGraphicsScene):
         self.active_layer = Layer.ROOMS
         self._drag_preview: Optional[PlanRectItem] = None
         self._drag_meta: Optional[Dict] = None
+        self._magnet_hint: Optional[QGraphicsLineItem] = None
+        self._route_hint: Optional[QGraphicsPathItem] = None
+        # индекс стен и реестр проёмов (заодно держат Python-ссылки на объекты верхнего уровня)
+        self.walls = WallIndex()
+        self.topology = WallTopology()
+        self._openings = set()
+        self._by_id: Dict[str, PlanRectItem] = {}   # uid -> объект плана
+        self._restoring = False                     # идёт откат/повтор (см. SceneState.apply_records)
+        self.nav = NavGraph(self)
+        # умные направляющие: индекс кромок/центров и линии текущего перетаскивания
+        self.guides = GuideIndex()
+        self.search = SearchIndex()   # полнотекстовый поиск по названиям/описаниям
+        self.smart_guides = True
+        self._guide_lines = []
+        self._export_plain = False   # экспорт без сетки: белый фон (см. files/export.py)
         self.selectionChanged.connect(self._on_selection_changed)
 
+    # ---- учёт объектов плана ----
+    def addItem(self, item):
+        super().addItem(item)
+        if getattr(item, "_is_preview", False):
+            return
+        if isinstance(item, RoomItem):
+            self.walls.update_room(item)
+            self.topology.update_room(item)
+            self.nav.mark_room(item)
+        elif isinstance(item, OpeningItem):
+            self._openings.add(item)
+            self.nav.mark_door(item)
+
+    def removeItem(self, item):
+        super().removeItem(item)
+        if isinstance(item, RoomItem):
+            self.walls.remove_room(item)
+            self.topology.remove_room(item)
+            self.nav.mark_room(item)
+        elif isinstance(item, OpeningItem):
+            self._openings.discard(item)
+            self.nav.mark_door(item)
+
+    # ---- направляющие ----
+    def track_item(self, item):
+        """Объект попал в сцену или сдвинулся: переиндексировать его кромки (комната — вместе с детьми)."""
+        if item._is_preview:
+            return
+        self._by_id[item.props.uid] = item
+        self.search.update_item(item)
+        self.planChanged.emit()
+        self.itemChanged.emit(item)
+        if isinstance(item, OpeningItem):
+            self.nav.mark_door(item)
+        if not isinstance(item, (RoomItem, DeviceItem, FurnitureItem)):
+            return
+        self.guides.update_item(item)
+        if isinstance(item, RoomItem):
+            for ch in item.childItems():
+                if ch in self.guides:
+                    self.guides.update_item(ch)
+
+    def untrack_item(self, item):
+        self.guides.remove_item(item)
+        self.search.remove_item(item)
+        if self._by_id.get(item.props.uid) is item:
+            del self._by_id[item.props.uid]
+        if not item._is_preview:
+            self.planChanged.emit()
+
+    def item_attached(self, item):
+        if not item._is_preview:
+            self.itemAdded.emit(item)
+
+    def item_detached(self, item):
+        if not item._is_preview:
+            self.itemRemoved.emit(item)
+
+    def item_renamed(self, item):
+        """Название/описание объекта изменилось: переиндексировать поиск и оповестить панели."""
+        if item._is_preview:
+            return
+        self.search.update_item(item)
+        self.itemRenamed.emit(item)
+
+    def item_by_id(self, uid: str) -> Optional[PlanRectItem]:
+        """Объект плана по постоянному id (None — нет в сцене)."""
+        return self._by_id.get(uid)
+
+    def guide_snap(self, item, x: float, y: float, bounds: Optional[QRectF] = None):
+        """
+        Прилипание перетаскиваемого item к кромкам/центрам соседей. x, y — позиция в координатах
+        родителя; bounds — допустимая область (rect комнаты) или None для холста.
+        """
+        old = self._guide_lines
+        self._guide_lines = []
+        if (self.smart_guides and isinstance(item, (RoomItem, DeviceItem, FurnitureItem))
+                and len(self.selectedItems()) <= 1 and self.views()):
+            view = self.views()[0]
+            scale = abs(view.transform().m11()) or 1.0
+            window = view.mapToScene(view.viewport().rect()).boundingRect()
+            rect = item_scene_rect(item)
+            rect.moveTo(rect.left() - item.pos().x() + x, rect.top() - item.pos().y() + y)
+            exclude = [item] + (item.childItems() if isinstance(item, RoomItem) else [])
+            dx, dy, lines = self.guides.snap(rect, window, GUIDE_SNAP_PX / scale, exclude)
+            w, h = item.rect().width(), item.rect().height()
+            if bounds is not None:
+                nx = min(max(x + dx, bounds.left()), bounds.right() - w)
+                ny = min(max(y + dy, bounds.top()), bounds.bottom() - h)
+            else:
+                nx, ny = self.clamp_to_canvas(x + dx, y + dy, w, h)
+            # направляющая, которую пришлось бы нарушить ради границ, не показывается
+            if abs(nx - (x + dx)) < EPS and abs(ny - (y + dy)) < EPS:
+                x, y = nx, ny
+                self._guide_lines = lines
+        if old or self._guide_lines:
+            self._update_guides(old)
+        return x, y
+
+    def clear_guides(self):
+        if self._guide_lines:
+            old, self._guide_lines = self._guide_lines, []
+            self._update_guides(old)
+
+    def _update_guides(self, old):
+        area = QRectF()
+        for ln in list(old) + self._guide_lines:
+            area = area.united(QRectF(ln.p1(), ln.p2()).normalized().adjusted(-2, -2, 2, 2))
+        if not area.isNull():
+            self.update(area)
+
+    def drawForeground(self, painter: QPainter, rect: QRectF):
+        if not self._guide_lines or self._export_plain:
+            return
+        pen = QPen(GUIDE_COLOR, 1, Qt.DashLine)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawLines(self._guide_lines)
+
+    def room_geometry_changed(self, room: RoomItem):
+        """Комната сдвинута или изменила размер: обновить индекс стен, топологию и прижать проёмы."""
+        if room._is_preview or room not in self.walls:
+            return
+        self.walls.update_room(room)
+        self.topology.update_room(room)
+        self.nav.mark_room(room)
+        for op in list(self._openings):
+            if op.anchor_room is room:
+                op._reposition_on_wall()
+        self.planChanged.emit()
+
+    def solid_walls(self):
+        """Сплошные участки стен плана (общие стены — один раз, проёмы вырезаны)."""
+        return cut_openings(self.topology.segments(), [opening_gap(op) for op in self._openings])
+
 
     def import_from_data(self, data: Dict):
         """Добавляет содержимое JSON в текущую сцену (merge, без очистки)."""
-        # 1) создаём комнаты и запоминаем индекс->объект
-        idx_to_room = {}
+        # id из файла сохраняются; занятые в сцене (повторный импорт) получают новые
+        taken = set(self._by_id)
+        # 1) создаём комнаты и запоминаем id из файла (или индекс для совсем старых) -> объект
+        id_to_room = {}
         rooms = data.get("rooms", [])
         for idx, r in enumerate(rooms):
             w = float(r.get("w", 200)); h = float(r.get("h", 150))
-            item = RoomItem(ItemProps(r.get("name","Комната"), w, h, r.get("desc",""), "room"), QRectF(0,0,w,h))
+            item = RoomItem(ItemProps(r.get("name","Комната"), w, h, r.get("desc",""), "room", claim_uid(r, taken)),
+                            QRectF(0,0,w,h))
             self.addItem(item)
             item.setPos(QPointF(float(r.get("x", 0)), float(r.get("y", 0))))
             rot = float(r.get("rot", 0)); 
             try: item.setRotation(rot)
             except: pass
-            idx_to_room[idx] = item
+            id_to_room[r.get("id", idx)] = item
 
         # 2) устройства
         for d in data.get("devices", []):
             w = float(d.get("w", 40)); h = float(d.get("h", 40))
-            dev = DeviceItem(ItemProps(d.get("name","Устройство"), w, h, d.get("desc",""), "device"), QRectF(0,0,w,h))
-            room = idx_to_room.get(d.get("room_id"))
+            dev = DeviceItem(ItemProps(d.get("name","Устройство"), w, h, d.get("desc",""), "device", claim_uid(d, taken)),
+                             QRectF(0,0,w,h))
+            room = id_to_room.get(d.get("room_id"))
             if room:
                 dev.setParentItem(room)
                 dev.setPos(QPointF(float(d.get("x", 0)), float(d.get("y", 0))))
@@ -81,13 +247,14 @@ class PlanScene(QGraphicsScene):
                 dev.setPos(QPointF(float(d.get("x", 0)), float(d.get("y", 0))))
             try: dev.setRotation(float(d.get("rot", 0)))
             except: pass
-            self.addItem(dev)
+            if not room: self.addItem(dev)   # с родителем уже в сцене
 
         # 3) мебель
         for f in data.get("furniture", []):
             w = float(f.get("w", 60)); h = float(f.get("h", 40))
-            fur = FurnitureItem(ItemProps(f.get("name","Мебель"), w, h, f.get("desc",""), "furniture"), QRectF(0,0,w,h))
-            room = idx_to_room.get(f.get("room_id"))
+            fur = FurnitureItem(ItemProps(f.get("name","Мебель"), w, h, f.get("desc",""), "furniture", claim_uid(f, taken)),
+                                QRectF(0,0,w,h))
+            room = id_to_room.get(f.get("room_id"))
             if room:
                 fur.setParentItem(room)
                 fur.setPos(QPointF(float(f.get("x", 0)), float(f.get("y", 0))))
@@ -95,10 +262,39 @@ class PlanScene(QGraphicsScene):
                 fur.setPos(QPointF(float(f.get("x", 0)), float(f.get("y", 0))))
             try: fur.setRotation(float(f.get("rot", 0)))
             except: pass
-            self.addItem(fur)
+            if not room: self.addItem(fur)   # с родителем уже в сцене
 
+        self.ensure_canvas_fits(self.content_rect())
         self.apply_layer_state()
 
+    # ---- canvas ----
+    def set_canvas_size(self, w: float, h: float):
+        w = min(max(float(w), SCENE_W), CANVAS_MAX)
+        h = min(max(float(h), SCENE_H), CANVAS_MAX)
+        self.setSceneRect(0, 0, w, h)
+
+    def ensure_canvas_fits(self, rect: QRectF):
+        """Расширяет холст кусками (CANVAS_CHUNK), когда rect подходит к правому/нижнему краю."""
+        sr = self.sceneRect()
+        w, h = grow_canvas(sr.width(), sr.height(), rect.right(), rect.bottom())
+        if w != sr.width() or h != sr.height():
+            self.setSceneRect(0, 0, w, h)
+
+    def content_rect(self) -> QRectF:
+        """Габарит всех объектов плана (без учёта толщины пера, в отличие от itemsBoundingRect)."""
+        out = QRectF()
+        # верхний уровень плана — комнаты и проёмы; приборы/мебель всегда внутри комнат
+        for it in self.items():
+            if isinstance(it, (RoomItem, OpeningItem)) and not it._is_preview:
+                out = out.united(_scene_rect_of_item(it))
+        return out
+
+    def clamp_to_canvas(self, x: float, y: float, w: float, h: float):
+        """Верхний левый угол объекта w×h в допустимой области холста (справа/снизу холст растёт)."""
+        x = min(max(x, 0.0), CANVAS_MAX - w)
+        y = min(max(y, 0.0), CANVAS_MAX - h)
+        return x, y
+
     def _on_selection_changed(self):
     # no-op: MainWindow сам слушает scene.selectionChanged и обновляет панель свойств
         pass
@@ -110,46 +306,19 @@ class PlanScene(QGraphicsScene):
         Если на сцене нет ни одной комнаты — вернёт None.
         """
         side = "outside" if subtype == "window" else "inside"
-
-        # 1) ищем ближайшую комнату (по евклидову расстоянию до bbox)
-        best_room = None
-        best_dist = 1e18
-        for it in self.items():
-            if not isinstance(it, RoomItem):
-                continue
-            r = _scene_rect_of_item(it)
-            dx = max(r.left() - scene_pos.x(), 0, scene_pos.x() - r.right())
-            dy = max(r.top()  - scene_pos.y(), 0, scene_pos.y() - r.bottom())
-            dist = (dx*dx + dy*dy) ** 0.5
-            if dist < best_dist:
-                best_room, best_dist = it, dist
-
-        if not best_room:
+        # ближайшая стена и offset вдоль неё (проём центрируется по курсору) — через индекс стен
+        hit = self.walls.nearest_edge(scene_pos.x(), scene_pos.y(), length)
+        if hit is None:
             return None
-
-        # 2) ближайшая сторона этой комнаты
-        local = best_room.mapFromScene(scene_pos)
-        rr = best_room.rect()
-        dL = abs(local.x() - 0.0)
-        dR = abs(local.x() - rr.width())
-        dT = abs(local.y() - 0.0)
-        dB = abs(local.y() - rr.height())
-        edge, _ = min((("L", dL), ("R", dR), ("T", dT), ("B", dB)), key=lambda x: x[1])
-
-        # 3) offset вдоль стены (центрируем по курсору) + clamp + snap
-        if edge in ("T", "B"):
-            offset = local.x() - length / 2.0
-            offset = max(0.0, min(offset, rr.width() - length))
-        else:
-            offset = local.y() - length / 2.0
-            offset = max(0.0, min(offset, rr.height() - length))
+        best_room, edge, offset = hit
         offset = snap(offset, PX_GRID)
 
         return (best_room, edge, float(offset), float(length), float(thickness), side)
 
 
-    def apply_layer_state(self):
-        """Разрешаем двигать/выделять ТОЛЬКО объекты активного слоя. Остальные — залочены и не выделяются."""
+    def apply_layer_state(self, items=None):
+        """Разрешаем двигать/выделять ТОЛЬКО объекты активного слоя. Остальные — залочены и не выделяются.
+        items — только эти объекты (например, пересозданные откатом); по умолчанию вся сцена."""
         self.clearSelection()
 
         # helper: разрешены ли item в активном слое
@@ -165,7 +334,7 @@ class PlanScene(QGraphicsScene):
                 return isinstance(it, OpeningItem)
             return False
 
-        for it in self.items():
+        for it in (self.items() if items is None else items):
             if not isinstance(it, PlanRectItem):
                 continue
 
@@ -211,14 +380,15 @@ class PlanScene(QGraphicsScene):
             w = float(meta.get("w", 100)); h = float(meta.get("h", 50))
             item = FurnitureItem(ItemProps(meta.get("name","Мебель"), w, h, meta.get("desc",""), "furniture"), QRectF(0,0,w,h))
         elif kind == "opening":
-            L = float(meta.get("length", 70)); T = float(meta.get("thickness", 12))
-            item = OpeningItem(meta.get("subtype","window"), length=L, thickness=T)
+            L, T = self._opening_dims(meta)
+            item = OpeningItem(ItemProps(meta.get("name", "Проём"), L, T, meta.get("desc", ""), "opening"),
+                               QRectF(0, 0, L, T), subtype=meta.get("subtype", "window"))
         else:
             w = float(meta.get("w", 100)); h = float(meta.get("h", 50))
             item = DeviceItem(ItemProps(meta.get("name","Устройство"), w, h, meta.get("desc",""), "device"), QRectF(0,0,w,h))
 
+        item._is_preview = True   # до addItem: превью не попадает в индекс стен
         self.addItem(item)
-        item._is_preview = True
         if hasattr(item, "set_view_mode"):
             item.set_view_mode("ghost")
         else:
@@ -239,6 +409,47 @@ class PlanScene(QGraphicsScene):
             self.removeItem(self._drag_preview)
             self._drag_preview = None
             self._drag_meta = None
+        self._show_magnet(None)
+
+    @staticmethod
+    def _opening_dims(meta: Dict):
+        """Длина/толщина проёма из meta палитры — так же, как их берёт ItemFactory."""
+        w = float(meta.get("w", 100)); h = float(meta.get("h", 50))
+        return float(meta.get("length", w)), float(meta.get("thickness", max(8.0, min(20.0, h))))
+
+    def _show_magnet(self, room: Optional[RoomItem], edge: str = ""):
+        """Подсветка стены, к которой прилипнет проём; room=None — спрятать."""
+        line = self.walls.wall_line(room, edge) if room is not None else None
+        if line is None:
+            if self._magnet_hint is not None:
+                self._magnet_hint.setVisible(False)
+            return
+        if self._magnet_hint is None:
+            self._magnet_hint = QGraphicsLineItem()
+            self._magnet_hint.setPen(QPen(MAGNET_COLOR, 4, Qt.SolidLine, Qt.RoundCap))
+            self._magnet_hint.setZValue(9_999)
+            self.addItem(self._magnet_hint)
+        self._magnet_hint.setLine(line)
+        self._magnet_hint.setVisible(True)
+
+    def show_route(self, points):
+        """Ломаная маршрута (NavGraph.route / exit_route); пустой список — спрятать."""
+        if not points:
+            if self._route_hint is not None:
+                self._route_hint.setVisible(False)
+            return
+        if self._route_hint is None:
+            self._route_hint = QGraphicsPathItem()
+            pen = QPen(ROUTE_COLOR, 3, Qt.DashLine, Qt.RoundCap, Qt.RoundJoin)
+            pen.setCosmetic(True)
+            self._route_hint.setPen(pen)
+            self._route_hint.setZValue(9_998)
+            self.addItem(self._route_hint)
+        path = QPainterPath(points[0])
+        for p in points[1:]:
+            path.lineTo(p)
+        self._route_hint.setPath(path)
+        self._route_hint.setVisible(True)
 
     def _update_preview_pos(self, scene_pos: QPointF):
         if not (self._drag_preview and self._drag_meta): 
@@ -251,14 +462,27 @@ class PlanScene(QGraphicsScene):
 
         if kind == "room":
             w = float(self._drag_meta.get("w",100)); h = float(self._drag_meta.get("h",50))
-            x = min(max(pos.x(), self.sceneRect().left()),  self.sceneRect().right() - w)
-            y = min(max(pos.y(), self.sceneRect().top()),   self.sceneRect().bottom() - h)
+            x, y = self.clamp_to_canvas(pos.x(), pos.y(), w, h)
             self._drag_preview.setParentItem(None)
             self._drag_preview.setPos(QPointF(x, y))
             # (опционально) ваш nudge + подсветка пересечений — как было
             return
 
-        # device/furniture/opening — внутрь ближайшей комнаты (как потом при drop)
+        if kind == "opening":
+            # проём — к ближайшей стене, как потом при drop; стена подсвечивается
+            L, T = self._opening_dims(self._drag_meta)
+            hit = self._magnet_for_opening(pos, self._drag_meta.get("subtype", "window"), L, T)
+            if not hit:
+                self._drag_preview.setVisible(False)
+                self._show_magnet(None)
+                return
+            room, edge, offset, L, T, side = hit
+            self._drag_preview.setVisible(True)
+            self._drag_preview.set_anchor(room, edge, offset, L, T, side)
+            self._show_magnet(room, edge)
+            return
+
+        # device/furniture — внутрь ближайшей комнаты (как потом при drop)
         room = self.room_at(scene_pos)
         if not room:
             self._drag_preview.setVisible(False)
@@ -268,12 +492,8 @@ class PlanScene(QGraphicsScene):
         self._drag_preview.setParentItem(room)
 
         # размер для позиционирования
-        if kind == "opening":
-            w = float(self._drag_meta.get("length", 70))
-            h = float(self._drag_meta.get("thickness", 12))
-        else:
-            w = float(self._drag_meta.get("w", 40))
-            h = float(self._drag_meta.get("h", 40))
+        w = float(self._drag_meta.get("w", 40))
+        h = float(self._drag_meta.get("h", 40))
 
         local = room.mapFromScene(pos)
         lx = min(max(local.x(), 0), room.rect().width()  - w)
@@ -306,8 +526,8 @@ class PlanScene(QGraphicsScene):
                     dx = (b.left() - a.right()) if a.center().x() < b.center().x() else (b.right() - a.left()); dy = 0.0
                 else:
                     dx = 0.0; dy = (b.top() - a.bottom()) if a.center().y() < b.center().y() else (b.bottom() - a.top())
-                new_x = min(max(room.pos().x() + dx, self.sceneRect().left()), self.sceneRect().right() - room.rect().width())
-                new_y = min(max(room.pos().y() + dy, self.sceneRect().top()),  self.sceneRect().bottom() - room.rect().height())
+                new_x, new_y = self.clamp_to_canvas(room.pos().x() + dx, room.pos().y() + dy,
+                                                    room.rect().width(), room.rect().height())
                 if self.snap_to_grid:
                     new_x = snap(new_x, PX_GRID); new_y = snap(new_y, PX_GRID)
                 if abs(new_x - room.pos().x()) > EPS or abs(new_y - room.pos().y()) > EPS:
@@ -315,22 +535,27 @@ class PlanScene(QGraphicsScene):
             if not moved: break
 
     def drawBackground(self, painter: QPainter, rect: QRectF):
+        if self._export_plain:
+            painter.fillRect(rect, Qt.white)
+            return
         painter.fillRect(rect, BG_COLOR)
+        # рисуем только видимую область; при отдалении укрупняем шаг,
+        # чтобы число линий зависело от экрана, а не от размера холста
+        scale = abs(painter.worldTransform().m11()) or 1.0
         step = GRID_STEP
-        left = math.floor(rect.left() / step) * step
-        top  = math.floor(rect.top()  / step) * step
-        x = left; i = int(x // step)
+        while step * scale < GRID_MIN_PX:
+            step *= MAJOR_EVERY
+        minor, major = [], []
+        x = math.floor(rect.left() / step) * step; i = int(round(x / step))
         while x < rect.right():
-            is_major = (i % MAJOR_EVERY == 0)
-            painter.setPen(QPen(GRID_MAJOR if is_major else GRID_MINOR, 1.5 if is_major else 1, Qt.SolidLine, Qt.SquareCap))
-            painter.drawLine(x, rect.top(), x, rect.bottom())
+            (major if i % MAJOR_EVERY == 0 else minor).append(QLineF(x, rect.top(), x, rect.bottom()))
             x += step; i += 1
-        y = top; j = int(y // step)
+        y = math.floor(rect.top() / step) * step; j = int(round(y / step))
         while y < rect.bottom():
-            is_major = (j % MAJOR_EVERY == 0)
-            painter.setPen(QPen(GRID_MAJOR if is_major else GRID_MINOR, 1.5 if is_major else 1, Qt.SolidLine, Qt.SquareCap))
-            painter.drawLine(rect.left(), y, rect.right(), y)
+            (major if j % MAJOR_EVERY == 0 else minor).append(QLineF(rect.left(), y, rect.right(), y))
             y += step; j += 1
+        painter.setPen(QPen(GRID_MINOR, 1, Qt.SolidLine, Qt.SquareCap)); painter.drawLines(minor)
+        painter.setPen(QPen(GRID_MAJOR, 1.5, Qt.SolidLine, Qt.SquareCap)); painter.drawLines(major)
         painter.setPen(QPen(SCENE_BORDER, SCENE_BORDER_W)); painter.setBrush(Qt.NoBrush); painter.drawRect(self.sceneRect())
 
     # ---- DnD ----
@@ -419,12 +644,22 @@ class PlanScene(QGraphicsScene):
 
     def clear_all_items(self):
         for it in list(self.items()):
-            if isinstance(it, (RoomItem, DeviceItem, QGraphicsProxyWidget)):
+            if it.scene() is not self:
+                continue   # уже ушёл вместе с родительской комнатой
+            if isinstance(it, (RoomItem, DeviceItem, OpeningItem, QGraphicsProxyWidget)):
                 self.removeItem(it)
 
     def deserialize(self, data: Dict):
         self.state.deserialize(self, data)
 
+    def restore_records(self, canvas: Dict, records):
+        """Откат/повтор: пересоздаются только объекты с изменившимися записями. Возвращает новые объекты."""
+        return self.state.apply_records(self, canvas, records)
+
+    def iter_deserialize(self, data: Dict):
+        """Поэтапная загрузка: генератор (готово, всего), см. SceneState.iter_deserialize."""
+        return self.state.iter_deserialize(self, data)
+
     def _stash_snapshot(self):
         self._pre_snapshot = json.dumps(self.serialize())
 
@@ -438,7 +673,7 @@ class PlanScene(QGraphicsScene):
         from PySide6.QtWidgets import QApplication
         mw = QApplication.activeWindow()
         if hasattr(mw, "undo_manager"):
-            mw.undo_manager.push(json.dumps(self.serialize()))
+            mw.undo_manager.push(self.serialize())
 
     # files/scene.py
     def set_editable(self, editable: bool):
@@ -475,6 +710,11 @@ class PlanView(QGraphicsView):
         self.hud.raise_()
         self.hud.reposition()
 
+        # мини-карта — в противоположном углу
+        self.minimap = MinimapHUD(self)
+        self.minimap.show()
+        self.minimap.raise_()
+
         # один раз сообщим текущий масштаб (1.0)
         self.scaleChanged.emit(self.transform().m11())
 
@@ -482,6 +722,16 @@ class PlanView(QGraphicsView):
         super().resizeEvent(event)
         if hasattr(self, "hud") and self.hud:
             self.hud.reposition()
+        if hasattr(self, "minimap") and self.minimap:
+            self.minimap.reposition()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        # прокрутка сдвигает и дочерние виджеты viewport — HUD возвращаем в углы
+        super().scrollContentsBy(dx, dy)
+        if hasattr(self, "hud") and self.hud:
+            self.hud.reposition()
+        if hasattr(self, "minimap") and self.minimap:
+            self.minimap.reposition()
 
     def wheelEvent(self, event: QWheelEvent):
         if QApplication.keyboardModifiers() & Qt.ControlModifier:
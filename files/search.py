@@ -0,0 +1,81 @@
+from __future__ import annotations
+from typing import Dict, List, Set
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """
+    Триграммный индекс по названию и описанию объектов плана. Объект переиндексируется,
+    только если его текст изменился; запрос из слов ≥3 символов — пересечение списков
+    триграмм и проверка подстрокой, короткие слова отсеивают уже найденное.
+    """
+    SEP = "\x00"   # между названием и описанием: запрос не найдётся «на стыке»
+
+    def __init__(self):
+        self._text: Dict[object, str] = {}
+        self._grams: Dict[str, Set[object]] = {}
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def __contains__(self, item) -> bool:
+        return item in self._text
+
+    def clear(self):
+        self.__init__()
+
+    def update_item(self, item):
+        text = normalize(item.props.name) + self.SEP + normalize(item.props.description)
+        old = self._text.get(item)
+        if old == text:
+            return
+        if old is not None:
+            self._drop(item, old)
+        self._text[item] = text
+        for g in trigrams(text):
+            self._grams.setdefault(g, set()).add(item)
+
+    def remove_item(self, item):
+        old = self._text.pop(item, None)
+        if old is not None:
+            self._drop(item, old)
+
+    def _drop(self, item, text: str):
+        for g in trigrams(text):
+            bucket = self._grams.get(g)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del self._grams[g]
+
+    def search(self, query: str, limit: int = 100) -> List[object]:
+        """
+        Объекты, в тексте которых есть все слова запроса. Сначала совпадения по началу
+        названия, затем по названию, затем по описанию; внутри — по алфавиту.
+        """
+        words = normalize(query).split()
+        if not words:
+            return []
+        cand = None
+        for w in sorted((w for w in words if len(w) >= 3), key=len, reverse=True):
+            for g in trigrams(w):
+                bucket = self._grams.get(g)
+                if not bucket:
+                    return []
+                cand = set(bucket) if cand is None else cand & bucket
+                if not cand:
+                    return []
+        pool = self._text if cand is None else cand
+        hits = []
+        for item in pool:
+            text = self._text[item]
+            if all(w in text for w in words):
+                name = text.split(self.SEP, 1)[0]
+                rank = 0 if name.startswith(words[0]) else (1 if all(w in name for w in words) else 2)
+                hits.append((rank, name, item))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [h[2] for h in hits[:limit]]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import List
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem
+from shiboken6 import isValid
+
+from .models import Layer
+from .items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
+
+KIND_NAMES = {"room": "Комната", "device": "Прибор", "furniture": "Мебель", "opening": "Проём"}
+SEARCH_LIMIT = 200
+
+class SearchPanel(QWidget):
+    """Поиск по названиям и описаниям (индекс scene.search); Enter/двойной клик — перейти к объекту."""
+    requestFocusItem = Signal(object)  # item
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+
+        root = QVBoxLayout(self)
+        root.setContentsMargins(8, 8, 8, 8)
+        root.setSpacing(8)
+
+        self.ed_query = QLineEdit()
+        self.ed_query.setPlaceholderText("Название или описание…")
+        self.ed_query.setClearButtonEnabled(True)
+        self.ed_query.textChanged.connect(self.refresh)
+        self.ed_query.returnPressed.connect(self._go_to_first)
+        root.addWidget(self.ed_query)
+
+        self.lbl_summary = QLabel("")
+        root.addWidget(self.lbl_summary)
+
+        self.list_results = QListWidget()
+        self.list_results.setStyleSheet("QListWidget{ background:#fafafa; }")
+        self.list_results.itemActivated.connect(self._go_to_result)
+        self.list_results.itemDoubleClicked.connect(self._go_to_result)
+        root.addWidget(self.list_results, 1)
+
+        # переименование/удаление объекта — обновить выдачу (не чаще раза в 150 мс)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(150)
+        self._timer.timeout.connect(self.refresh)
+        scene.itemRenamed.connect(self._schedule)
+        scene.planChanged.connect(self._schedule)
+
+    def focus_query(self):
+        self.ed_query.setFocus()
+        self.ed_query.selectAll()
+
+    def _schedule(self, *_):
+        if self.ed_query.text().strip() and self.isVisible() and not self._timer.isActive():
+            self._timer.start()
+
+    def refresh(self, *_):
+        query = self.ed_query.text()
+        items = self.scene.search.search(query, SEARCH_LIMIT) if query.strip() else []
+        self.show_results(items)
+        if not query.strip():
+            self.lbl_summary.setText("")
+        elif not items:
+            self.lbl_summary.setText("Ничего не найдено")
+        else:
+            more = "+" if len(items) >= SEARCH_LIMIT else ""
+            self.lbl_summary.setText(f"Найдено: {len(items)}{more}")
+
+    def show_results(self, items: List[object]):
+        self.list_results.setUpdatesEnabled(False)
+        self.list_results.clear()
+        for it in items:
+            where = ""
+            parent = it.anchor_room if isinstance(it, OpeningItem) else it.parentItem()
+            if isinstance(parent, RoomItem):
+                where = f" — {parent.props.name or 'Комната'}"
+            li = QListWidgetItem(f"{KIND_NAMES.get(it.props.kind, '')}: {it.props.name or '(без названия)'}{where}")
+            if it.props.description:
+                li.setToolTip(it.props.description)
+            li.setData(Qt.UserRole, it)
+            self.list_results.addItem(li)
+        self.list_results.setUpdatesEnabled(True)
+
+    def _go_to_first(self):
+        if self.list_results.count():
+            self.list_results.setCurrentRow(0)
+            self._go_to_result(self.list_results.item(0))
+
+    def _go_to_result(self, li: QListWidgetItem):
+        it = li.data(Qt.UserRole)
+        if not isValid(it) or it.scene() is not self.scene:
+            return
+        if isinstance(it, RoomItem):     layer = Layer.ROOMS
+        elif isinstance(it, DeviceItem): layer = Layer.DEVICES
+        elif isinstance(it, FurnitureItem): layer = Layer.FURNITURE
+        elif isinstance(it, OpeningItem): layer = Layer.OPENINGS
+        else: layer = self.scene.active_layer
+        self.scene.set_active_layer(layer)   # HUD сам подсветится
+        for sel in self.scene.selectedItems():
+            sel.setSelected(False)
+        it.setSelected(True)
+        self.requestFocusItem.emit(it)
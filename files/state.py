@@ -1,118 +1,352 @@
 from __future__ import annotations
-from typing import Dict, List
-from PySide6.QtCore import QRectF, QPointF
-from .models import ItemProps
+from typing import Dict, List, Tuple, Optional
+from PySide6.QtCore import QRectF, QPointF, QSizeF
+from .models import ItemProps, new_uid
 from .items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
+from .undo import record_key, SECTIONS
+
+DESERIALIZE_CHUNK = 200   # объектов за один шаг поэтапной загрузки
 
 class SceneState:
     def __init__(self, scene_rect: QRectF):
-        self.scene_rect = scene_rect
+        self.scene_rect = QRectF(scene_rect)   # канва по умолчанию (если в файле нет "canvas")
 
-    def serialize(self, scene) -> Dict:
-        rooms: List[Dict] = []
-        devices: List[Dict] = []
-        furniture: List[Dict] = []
-        openings: List[Dict] = []
+    # ---- scene -> data ----
+    def canvas_meta(self, scene) -> Dict:
+        canvas = scene.sceneRect()
+        return {"w": canvas.width(), "h": canvas.height(), "grid": 10.0}
 
-        room_ids: Dict[RoomItem, int] = {}
-        rid = 0
-        for it in scene.items():
-            if isinstance(it, RoomItem):
-                room_ids[it] = rid
-                rooms.append({
-                    "id": rid,
-                    "name": it.props.name,
-                    "x": it.pos().x(), "y": it.pos().y(),
-                    "w": it.rect().width(), "h": it.rect().height(),
-                    "desc": it.props.description
-                })
-                rid += 1
-        for it in scene.items():
-            if isinstance(it, DeviceItem):
-                parent_room = it.parentItem() if isinstance(it.parentItem(), RoomItem) else None
-                devices.append({
-                    "name": it.props.name,
-                    "room_id": room_ids.get(parent_room, None),
-                    "x": it.pos().x(), "y": it.pos().y(),
-                    "w": it.rect().width(), "h": it.rect().height(),
-                    "rot": it.rotation(),
-                    "desc": it.props.description
-                })
-        for it in scene.items():
-            if isinstance(it, FurnitureItem):
-                parent_room = it.parentItem() if isinstance(it.parentItem(), RoomItem) else None
-                furniture.append({
-                    "name": it.props.name,
-                    "room_id": room_ids.get(parent_room, None),
-                    "x": it.pos().x(), "y": it.pos().y(),
-                    "w": it.rect().width(), "h": it.rect().height(),
-                    "rot": it.rotation(),
-                    "desc": it.props.description
-                })
+    def record_of(self, item) -> Optional[Tuple[str, Dict]]:
+        """(секция, запись) одного объекта плана; None — не объект плана или проём без якоря."""
+        if getattr(item, "_is_preview", True):
+            return None
+        if isinstance(item, RoomItem):
+            return "rooms", {
+                "id": item.props.uid,
+                "name": item.props.name,
+                "x": item.pos().x(), "y": item.pos().y(),
+                "w": item.rect().width(), "h": item.rect().height(),
+                "desc": item.props.description
+            }
+        if isinstance(item, (DeviceItem, FurnitureItem)):
+            parent_room = item.parentItem() if isinstance(item.parentItem(), RoomItem) else None
+            return ("devices" if isinstance(item, DeviceItem) else "furniture"), {
+                "id": item.props.uid,
+                "name": item.props.name,
+                "room_id": parent_room.props.uid if parent_room else None,
+                "x": item.pos().x(), "y": item.pos().y(),
+                "w": item.rect().width(), "h": item.rect().height(),
+                "rot": item.rotation(),
+                "desc": item.props.description
+            }
+        if isinstance(item, OpeningItem) and item.anchor_room and item.edge:
+            return "openings", {
+                "id": item.props.uid,
+                "name": item.props.name,
+                "subtype": item.subtype,          # "window" | "door"
+                "room_id": item.anchor_room.props.uid,
+                "edge": item.edge,                # 'T'|'R'|'B'|'L'
+                "offset": item.offset,
+                "length": item.length,
+                "thickness": item.thickness,
+                "side": item.side                 # 'inside'|'outside'
+            }
+        return None
+
+    def collect(self, scene) -> List[Tuple[str, Dict, object]]:
+        """Записи всех объектов плана: (секция, запись, item) в порядке секций."""
+        by_section: Dict[str, List[Tuple[str, Dict, object]]] = {s: [] for s in SECTIONS}
         for it in scene.items():
-            if isinstance(it, OpeningItem) and it.anchor_room and it.edge:
-                openings.append({
-                    "name": it.props.name,
-                    "subtype": it.subtype,          # "window" | "door"
-                    "room_id": room_ids.get(it.anchor_room, None),
-                    "edge": it.edge,                # 'T'|'R'|'B'|'L'
-                    "offset": it.offset,
-                    "length": it.length,
-                    "thickness": it.thickness,
-                    "side": it.side                 # 'inside'|'outside'
-                })
-
-        return {
-            "canvas": {"w": self.scene_rect.width(), "h": self.scene_rect.height(), "grid": 10.0},
-            "rooms": rooms, "devices": devices, "furniture": furniture,
-            "openings": openings
-        }
+            entry = self.record_of(it)
+            if entry is not None:
+                by_section[entry[0]].append((entry[0], entry[1], it))
+        return [e for section in SECTIONS for e in by_section[section]]
+
+    def serialize(self, scene) -> Dict:
+        data = {"canvas": self.canvas_meta(scene)}
+        for section in SECTIONS:
+            data[section] = []
+        for section, rec, _ in self.collect(scene):
+            data[section].append(rec)
+        return data
+
+    # ---- data -> items ----
+    def _make_room(self, r: Dict, uid: Optional[str] = None) -> RoomItem:
+        item = RoomItem(ItemProps(r.get("name","Комната"), r["w"], r["h"], r.get("desc",""), "room",
+                                  uid or new_uid()),
+                        QRectF(0,0,r["w"], r["h"]))
+        item.setPos(QPointF(r["x"], r["y"]))
+        return item
+
+    def _make_placeable(self, d: Dict, cls, room: Optional[RoomItem], uid: Optional[str] = None):
+        if cls is DeviceItem:
+            props = ItemProps(d.get("name","Устройство"), d["w"], d["h"], d.get("desc",""), "device", uid or new_uid())
+        else:
+            props = ItemProps(d.get("name","Мебель"), d["w"], d["h"], d.get("desc",""), "furniture", uid or new_uid())
+        item = cls(props, QRectF(0,0,d["w"], d["h"]))
+        if room: item.setParentItem(room)
+        item.setPos(QPointF(d["x"], d["y"]))
+        item.setRotation(float(d.get("rot", 0)))
+        return item
+
+    def _make_opening(self, o: Dict, room: RoomItem, uid: Optional[str] = None) -> OpeningItem:
+        # длина/толщина управляют ориентацией rect
+        edge = o.get("edge", "T")
+        length = float(o.get("length", 80))
+        thickness = float(o.get("thickness", 12))
+        if edge in ("T", "B"):
+            rect = QRectF(0, 0, length, thickness)
+        else:
+            rect = QRectF(0, 0, thickness, length)
+        item = OpeningItem(
+            ItemProps(o.get("name", "Проём"), rect.width(), rect.height(), "", "opening", uid or new_uid()),
+            rect,
+            subtype=o.get("subtype", "window")
+        )
+        item.set_anchor(room, edge, float(o.get("offset", 0.0)),
+                        length, thickness, o.get("side", "outside"))
+        return item
 
     def deserialize(self, scene, data: Dict):
+        for _ in self.iter_deserialize(scene, data):
+            pass
+
+    def iter_deserialize(self, scene, data: Dict, chunk: int = DESERIALIZE_CHUNK):
+        """Как deserialize, но порциями: после каждых chunk объектов отдаёт (готово, всего)."""
+        rooms = data.get("rooms", [])
+        devices = data.get("devices", [])
+        furniture = data.get("furniture", [])
+        openings = data.get("openings", [])
+        total = len(rooms) + len(devices) + len(furniture) + len(openings)
+        done = 0
+
         scene.clear_all_items()
-        by_id: Dict[int, RoomItem] = {}
-        for r in data.get("rooms", []):
-            item = RoomItem(ItemProps(r.get("name","Комната"), r["w"], r["h"], r.get("desc",""), "room"),
-                            QRectF(0,0,r["w"], r["h"]))
-            item.setPos(QPointF(r["x"], r["y"]))
+        canvas = data.get("canvas") or {}
+        scene.set_canvas_size(canvas.get("w", self.scene_rect.width()),
+                              canvas.get("h", self.scene_rect.height()))
+        taken = set()
+        # ключ — id из файла как есть: в старых файлах это номер комнаты, в новых — uid
+        by_id: Dict[object, RoomItem] = {}
+        for r in rooms:
+            item = self._make_room(r, claim_uid(r, taken))
             scene.addItem(item)
-            by_id[int(r["id"])] = item
-        for d in data.get("devices", []):
-            item = DeviceItem(ItemProps(d.get("name","Устройство"), d["w"], d["h"], d.get("desc",""), "device"),
-                              QRectF(0,0,d["w"], d["h"]))
-            room = by_id.get(d.get("room_id"))
-            if room: item.setParentItem(room)
-            item.setPos(QPointF(d["x"], d["y"]))
-            item.setRotation(float(d.get("rot", 0)))
-            scene.addItem(item)
-        for f in data.get("furniture", []):
-            item = FurnitureItem(ItemProps(f.get("name","Мебель"), f["w"], f["h"], f.get("desc",""), "furniture"),
-                                QRectF(0,0,f["w"], f["h"]))
-            room = by_id.get(f.get("room_id"))
-            if room: item.setParentItem(room)
-            item.setPos(QPointF(f["x"], f["y"]))
-            item.setRotation(float(f.get("rot", 0)))
-            scene.addItem(item)
-        for o in data.get("openings", []):
+            by_id[r.get("id")] = item
+            done += 1
+            if done % chunk == 0: yield done, total
+        for section, cls in ((devices, DeviceItem), (furniture, FurnitureItem)):
+            for d in section:
+                room = by_id.get(d.get("room_id"))
+                item = self._make_placeable(d, cls, room, claim_uid(d, taken))
+                if room is None: scene.addItem(item)
+                done += 1
+                if done % chunk == 0: yield done, total
+        for o in openings:
+            done += 1
+            if done % chunk == 0: yield done, total
             room = by_id.get(o.get("room_id"))
             if not room:
                 continue
-            # длина/толщина управляют ориентацией rect
-            edge = o.get("edge", "T")
-            length = float(o.get("length", 80))
-            thickness = float(o.get("thickness", 12))
-            if edge in ("T", "B"):
-                rect = QRectF(0, 0, length, thickness)
+            scene.addItem(self._make_opening(o, room, claim_uid(o, taken)))
+        # старые файлы могли сохранить канву меньше содержимого
+        scene.ensure_canvas_fits(scene.content_rect())
+        yield total, total
+
+    # ---- частичное восстановление (undo/redo) ----
+    def apply_records(self, scene, canvas: Dict, records: List[Tuple[str, str, Dict]]):
+        """
+        Приводит сцену к набору записей (секция, хэш, запись), сопоставляя объекты по id:
+        объект с тем же хэшем остаётся как есть, с изменившимся — обновляется на месте,
+        отсутствующий в записях — удаляется, новый id — создаётся. Возвращает созданные объекты.
+        """
+        current: Dict[str, Tuple[str, str, object]] = {}
+        for section, rec, item in self.collect(scene):
+            current[rec["id"]] = (section, record_key(section, rec), item)
+        target = {rec["id"]: (section, rec) for section, _, rec in records}
+
+        stale = set()
+        for uid, (section, _, item) in current.items():
+            want = target.get(uid)
+            if want is None or want[0] != section:
+                stale.add(item)
+            elif section == "openings" and want[1].get("subtype", "window") != item.subtype:
+                stale.add(item)   # дверь <-> окно: другой класс отрисовки, проще пересоздать
+        # уцелевшие дети удаляемых комнат — временно на верхний уровень (локальная pos не меняется)
+        for uid, (section, _, item) in current.items():
+            if section in ("devices", "furniture") and item not in stale and item.parentItem() in stale:
+                item.setParentItem(None)
+        for item in stale:
+            if isinstance(item, (DeviceItem, FurnitureItem)) and item.parentItem() in stale:
+                continue   # уйдёт вместе с комнатой
+            scene.removeItem(item)
+
+        scene.set_canvas_size(canvas.get("w", self.scene_rect.width()),
+                              canvas.get("h", self.scene_rect.height()))
+        by_id: Dict[str, RoomItem] = {}
+        created = []
+        scene._restoring = True   # записи уже прошли клампинг/снап: ставим значения как есть
+        try:
+            for section, key, rec in records:
+                if section != "rooms":
+                    continue
+                uid = rec["id"]
+                cur = current.get(uid)
+                if cur is None or cur[2] in stale:
+                    item = self._make_room(rec, uid)
+                    scene.addItem(item)
+                    created.append(item)
+                else:
+                    item = cur[2]
+                    if cur[1] != key:
+                        self._update_room(scene, item, rec)
+                by_id[uid] = item
+            for section, key, rec in records:
+                if section == "rooms":
+                    continue
+                uid = rec["id"]
+                cur = current.get(uid)
+                room = by_id.get(rec.get("room_id"))
+                if cur is None or cur[2] in stale:
+                    if section == "openings":
+                        if room is None:
+                            continue
+                        item = self._make_opening(rec, room, uid)
+                        scene.addItem(item)
+                    else:
+                        cls = DeviceItem if section == "devices" else FurnitureItem
+                        item = self._make_placeable(rec, cls, room, uid)
+                        if room is None:
+                            scene.addItem(item)   # с родителем объект попадает в сцену вместе с комнатой
+                    created.append(item)
+                elif section == "openings":
+                    if room is not None and (cur[1] != key or cur[2].anchor_room is not room):
+                        self._update_opening(cur[2], rec, room)
+                elif cur[1] != key or cur[2].parentItem() is not room:
+                    self._update_placeable(cur[2], rec, room)
+        finally:
+            scene._restoring = False
+        return created
+
+    # ---- точечные правки (совместная работа) ----
+    def upsert_record(self, scene, section: str, rec: Dict):
+        """Создаёт объект по записи или обновляет на месте объект с тем же id. Возвращает объект."""
+        item = scene.item_by_id(rec["id"])
+        room = scene.item_by_id(rec.get("room_id")) if section != "rooms" and rec.get("room_id") else None
+        room = room if isinstance(room, RoomItem) else None
+        scene._restoring = True
+        try:
+            if item is None:
+                if section == "rooms":
+                    item = self._make_room(rec, rec["id"])
+                    scene.addItem(item)
+                elif section == "openings":
+                    if room is None:
+                        return None
+                    item = self._make_opening(rec, room, rec["id"])
+                    scene.addItem(item)
+                else:
+                    cls = DeviceItem if section == "devices" else FurnitureItem
+                    item = self._make_placeable(rec, cls, room, rec["id"])
+                    if room is None:
+                        scene.addItem(item)
+            elif section == "rooms":
+                self._update_room(scene, item, rec)
+            elif section == "openings":
+                if room is not None:
+                    self._update_opening(item, rec, room)
             else:
-                rect = QRectF(0, 0, thickness, length)
-
-            from .items import OpeningItem
-            item = OpeningItem(
-                ItemProps(o.get("name", "Проём"), rect.width(), rect.height(), "", "opening"),
-                rect,
-                subtype=o.get("subtype", "window")
-            )
-            item.set_anchor(room, edge, float(o.get("offset", 0.0)),
-                            length, thickness, o.get("side", "outside"))
-            scene.addItem(item)
+                self._update_placeable(item, rec, room)
+        finally:
+            scene._restoring = False
+        return item
+
+    # ---- вставка пачкой (буфер обмена) ----
+    def insert_records(self, scene, data: Dict) -> List[object]:
+        """
+        Добавляет объекты data (формат файла, id свободны) как есть: без клампинга, снапа и
+        раздвигания комнат — раскладку готовит вызывающий. room_id ищется среди вставляемых
+        комнат, затем в сцене; приборы и проёмы без комнаты пропускаются. Возвращает новые объекты.
+        """
+        created: List[object] = []
+        rooms: Dict[str, RoomItem] = {}
+        def room_of(rec: Dict) -> Optional[RoomItem]:
+            rid = rec.get("room_id")
+            room = rooms.get(rid) or (scene.item_by_id(rid) if rid else None)
+            return room if isinstance(room, RoomItem) else None
+        bounds = QRectF()
+        scene._restoring = True
+        try:
+            for r in data.get("rooms", []):
+                item = self._make_room(r, r["id"])
+                scene.addItem(item)
+                rooms[r["id"]] = item
+                created.append(item)
+                bounds = bounds.united(item.sceneBoundingRect())
+            for section, cls in (("devices", DeviceItem), ("furniture", FurnitureItem)):
+                for d in data.get(section, []):
+                    room = room_of(d)
+                    if room is not None:
+                        created.append(self._make_placeable(d, cls, room, d["id"]))
+            for o in data.get("openings", []):
+                room = room_of(o)
+                if room is not None:
+                    item = self._make_opening(o, room, o["id"])
+                    scene.addItem(item)
+                    created.append(item)
+        finally:
+            scene._restoring = False
+        if not bounds.isNull():
+            scene.ensure_canvas_fits(bounds)
+        return created
+
+    def remove_record(self, scene, uid: str) -> bool:
+        item = scene.item_by_id(uid)
+        if item is None:
+            return False
+        scene.removeItem(item)
+        return True
+
+    @staticmethod
+    def _set_geometry(item, rec: Dict):
+        w, h = float(rec["w"]), float(rec["h"])
+        text = (item.props.name, item.props.description)
+        item.props.name = rec.get("name", item.props.name)
+        item.props.description = rec.get("desc", "")
+        if text != (item.props.name, item.props.description):
+            item.scene().item_renamed(item)
+        item.props.width_px, item.props.height_px = w, h
+        if item.rect().size() != QSizeF(w, h):
+            item.setRect(QRectF(0, 0, w, h))
+        pos = QPointF(rec["x"], rec["y"])
+        if item.pos() != pos:
+            item.setPos(pos)
+        item.update_tooltip()
+        item.update()
+
+    def _update_room(self, scene, item: RoomItem, rec: Dict):
+        self._set_geometry(item, rec)
+        scene.room_geometry_changed(item)   # размер мог смениться без сдвига
+        scene.track_item(item)
+
+    def _update_placeable(self, item, rec: Dict, room: Optional[RoomItem]):
+        if item.parentItem() is not room:
+            item.setParentItem(room)   # без комнаты объект остаётся в сцене на верхнем уровне
+        self._set_geometry(item, rec)
+        rot = float(rec.get("rot", 0))
+        if item.rotation() != rot:
+            item.setRotation(rot)
+
+    def _update_opening(self, item: OpeningItem, rec: Dict, room: RoomItem):
+        if rec.get("name", item.props.name) != item.props.name:
+            item.props.name = rec.get("name", item.props.name)
+            item.scene().item_renamed(item)
+        item.set_anchor(room, rec.get("edge", "T"), float(rec.get("offset", 0.0)),
+                        float(rec.get("length", 80)), float(rec.get("thickness", 12)),
+                        rec.get("side", "outside"))
+        item.props.width_px, item.props.height_px = item.rect().width(), item.rect().height()
 
+def claim_uid(rec: Dict, taken: set) -> str:
+    """uid для записи из файла: её строковый id, если он свободен, иначе новый (старые номера, дубли)."""
+    v = rec.get("id")
+    uid = v if isinstance(v, str) and v and v not in taken else new_uid()
+    taken.add(uid)
+    return uid
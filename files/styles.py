@@ -0,0 +1,67 @@
+"""
+Общие перья, кисти и шрифты объектов плана.
+
+QPen/QBrush в Qt разделяемые: объект хранит не свою копию, а ссылку на запись таблицы,
+поэтому на 50 тыс. объектов приходится несколько десятков стилей, а не сотни тысяч.
+Записи не изменять — правка пера из таблицы поменяет вид всех объектов с этим ключом.
+"""
+from __future__ import annotations
+from typing import Dict, NamedTuple, Tuple
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QBrush, QColor, QFont, QPen
+from .utils import ROOM_COLOR, ROOM_BORDER, DEV_COLOR, DEV_BORDER
+
+class ItemStyle(NamedTuple):
+    pen: QPen
+    brush: QBrush
+
+StyleKey = Tuple[str, str, bool]   # (вид: room|device|furniture|window|door|handle|ghost, режим слоя, выделен)
+
+_STYLES: Dict[StyleKey, ItemStyle] = {}
+_FONTS: Dict[str, QFont] = {}
+
+def _alpha(c: QColor, a: int) -> QColor:
+    return QColor(c.red(), c.green(), c.blue(), a)
+
+def _build(kind: str, mode: str, selected: bool) -> ItemStyle:
+    if kind == "window":
+        return ItemStyle(QPen(QColor("#0EA5E9"), 1.5), QBrush(QColor(14, 165, 233, 30)))
+    if kind == "door":
+        return ItemStyle(QPen(QColor("#2563EB"), 2), QBrush(QColor(37, 99, 235, 30)))
+    if kind == "ghost":
+        return ItemStyle(QPen(QColor(37, 99, 235), 1, Qt.DashLine), QBrush(QColor(37, 99, 235, 40)))
+    if kind == "handle":
+        return ItemStyle(QPen(QColor(80, 80, 80), 1), QBrush(QColor(255, 255, 255)))
+    if kind == "room":
+        # тусклая комната остаётся тусклой и выделенной — слой всё равно не её
+        if mode == "dim":
+            return ItemStyle(QPen(ROOM_BORDER, 1.5, Qt.SolidLine), QBrush(_alpha(ROOM_COLOR, 40)))
+        if mode == "dim_strong_border":
+            return ItemStyle(QPen(ROOM_BORDER, 3, Qt.SolidLine), QBrush(_alpha(ROOM_COLOR, 50)))
+    if selected:
+        return ItemStyle(QPen(QColor(255, 140, 0), 2, Qt.DashLine), QBrush(QColor(255, 240, 180, 160)))
+    if kind == "room":
+        return ItemStyle(QPen(ROOM_BORDER, 2, Qt.SolidLine), QBrush(ROOM_COLOR))
+    return ItemStyle(QPen(DEV_BORDER, 1, Qt.SolidLine), QBrush(DEV_COLOR))
+
+def item_style(kind: str, mode: str = "active", selected: bool = False) -> ItemStyle:
+    """Стиль из таблицы; создаётся при первом запросе ключа."""
+    key = (kind, mode, selected)
+    st = _STYLES.get(key)
+    if st is None:
+        st = _STYLES[key] = _build(kind, mode, selected)
+    return st
+
+def style_count() -> int:
+    return len(_STYLES)
+
+# ---- подпись размера комнаты ----
+LABEL_BRUSH = QBrush(QColor(0, 0, 0, 110))
+LABEL_PEN = QPen(QColor(255, 255, 255))
+
+def label_font() -> QFont:
+    # шрифт — лениво: до QGuiApplication его не создать
+    f = _FONTS.get("label")
+    if f is None:
+        f = _FONTS["label"] = QFont("", 8, QFont.DemiBold)
+    return f
@@ -0,0 +1,178 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from PySide6.QtCore import QLineF
+from .utils import _scene_rect_of_item
+from .walls import room_walls
+
+LINE_ROUND = 3   # стены на одной прямой, если координаты совпадают до 1e-3 px
+
+@dataclass(frozen=True)
+class WallSegment:
+    orient: str          # "H" (стены T/B) | "V" (стены L/R)
+    coord: float         # y для "H", x для "V"
+    lo: float
+    hi: float
+    sides: Tuple[Tuple[object, str], ...]   # (комната, сторона) всех стен, накрывающих отрезок
+
+    @property
+    def length(self) -> float:
+        return self.hi - self.lo
+
+    @property
+    def rooms(self) -> Tuple[object, ...]:
+        return tuple(r for r, _ in self.sides)
+
+    @property
+    def shared(self) -> bool:
+        """Общая стена: по обе стороны есть комнаты (T одной и B другой / L и R)."""
+        edges = {e for _, e in self.sides}
+        return len(edges) > 1
+
+    def line(self) -> QLineF:
+        if self.orient == "H":
+            return QLineF(self.lo, self.coord, self.hi, self.coord)
+        return QLineF(self.coord, self.lo, self.coord, self.hi)
+
+def _sweep(orient: str, coord: float, spans: Dict[Tuple[object, str], Tuple[float, float]]) -> List[WallSegment]:
+    """Заметание вдоль одной прямой: отрезки с постоянным набором накрывающих стен."""
+    events = []
+    for key, (lo, hi) in spans.items():
+        if hi > lo:
+            events.append((lo, 1, key)); events.append((hi, -1, key))
+    # при равной позиции сначала закрываем, потом открываем — касание концами не склеивает отрезки
+    events.sort(key=lambda e: (e[0], e[1]))
+    out: List[WallSegment] = []
+    active: Dict[Tuple[object, str], None] = {}
+    prev = None
+    for pos, kind, key in events:
+        if prev is not None and active and pos > prev:
+            sides = tuple(active)
+            last = out[-1] if out else None
+            if last is not None and last.hi == prev and set(last.sides) == set(sides):
+                out[-1] = WallSegment(orient, coord, last.lo, pos, last.sides)
+            else:
+                out.append(WallSegment(orient, coord, prev, pos, sides))
+        if kind > 0:
+            active[key] = None
+        else:
+            active.pop(key, None)
+        prev = pos
+    return out
+
+class WallTopology:
+    """
+    Топология стен плана: общие стены соседних комнат, внешние стены и смежность.
+    Стены сгруппированы по прямым; при сдвиге/изменении комнаты пересчитываются
+    только прямые, на которых лежали её старые и новые стены.
+    """
+    def __init__(self):
+        self._lines: Dict[Tuple[str, float], Dict[Tuple[object, str], Tuple[float, float]]] = {}
+        self._segments: Dict[Tuple[str, float], List[WallSegment]] = {}
+        self._pairs: Dict[Tuple[str, float], Dict[frozenset, float]] = {}
+        self._room_lines: Dict[object, Tuple[object, Tuple[Tuple[str, float], ...]]] = {}
+        self._adj: Dict[object, Dict[object, float]] = {}
+
+    def clear(self):
+        self.__init__()
+
+    def __contains__(self, room) -> bool:
+        return room in self._room_lines
+
+    # ---- обновление ----
+    def update_room(self, room):
+        rect = _scene_rect_of_item(room)
+        old = self._room_lines.get(room)
+        if old is not None and old[0] == rect:
+            return
+        dirty = set(self._detach(room))
+        keys = []
+        for edge, c, lo, hi in room_walls(rect):
+            line = ("H" if edge in ("T", "B") else "V", round(c, LINE_ROUND))
+            self._lines.setdefault(line, {})[(room, edge)] = (lo, hi)
+            keys.append(line)
+        self._room_lines[room] = (rect, tuple(keys))
+        dirty.update(keys)
+        for line in dirty:
+            self._recompute(line)
+
+    def remove_room(self, room):
+        for line in set(self._detach(room)):
+            self._recompute(line)
+        self._adj.pop(room, None)
+
+    def _detach(self, room):
+        old = self._room_lines.pop(room, None)
+        if old is None:
+            return ()
+        for line in old[1]:
+            spans = self._lines.get(line, {})
+            for edge in ("T", "B", "L", "R"):
+                spans.pop((room, edge), None)
+        return old[1]
+
+    def _recompute(self, line):
+        for pair, length in self._pairs.pop(line, {}).items():
+            a, b = tuple(pair)
+            self._add_adj(a, b, -length)
+        spans = self._lines.get(line)
+        if not spans:
+            self._lines.pop(line, None)
+            self._segments.pop(line, None)
+            return
+        segs = _sweep(line[0], line[1], spans)
+        pairs: Dict[frozenset, float] = {}
+        for s in segs:
+            if not s.shared:
+                continue
+            for i, (a, ea) in enumerate(s.sides):
+                for b, eb in s.sides[i + 1:]:
+                    if a is not b and ea != eb:
+                        key = frozenset((a, b))
+                        pairs[key] = pairs.get(key, 0.0) + s.length
+        for pair, length in pairs.items():
+            a, b = tuple(pair)
+            self._add_adj(a, b, length)
+        self._segments[line] = segs
+        self._pairs[line] = pairs
+
+    def _add_adj(self, a, b, length: float):
+        for x, y in ((a, b), (b, a)):
+            row = self._adj.setdefault(x, {})
+            v = row.get(y, 0.0) + length
+            if v > 1e-9:
+                row[y] = v
+            else:
+                row.pop(y, None)
+
+    # ---- запросы ----
+    def neighbors(self, room) -> Dict[object, float]:
+        """Соседи комнаты -> длина общей стены."""
+        return dict(self._adj.get(room, {}))
+
+    def _room_segments(self, room) -> List[WallSegment]:
+        entry = self._room_lines.get(room)
+        if entry is None:
+            return []
+        out = []
+        for line in set(entry[1]):
+            out.extend(s for s in self._segments.get(line, ()) if any(r is room for r in s.rooms))
+        return out
+
+    def segments(self, room=None) -> List[WallSegment]:
+        if room is not None:
+            return self._room_segments(room)
+        return [s for segs in self._segments.values() for s in segs]
+
+    def shared_walls(self, room=None) -> List[WallSegment]:
+        return [s for s in self.segments(room) if s.shared]
+
+    def exterior_walls(self, room=None) -> List[WallSegment]:
+        return [s for s in self.segments(room) if not s.shared]
+
+    def walls_between(self, a, b) -> List[WallSegment]:
+        """Участки общей стены двух комнат (например, куда можно поставить дверь между ними)."""
+        return [s for s in self.shared_walls(a) if any(r is b for r in s.rooms)]
+
+    def adjacent(self, a, b) -> bool:
+        return b in self._adj.get(a, {})
@@ -1,18 +1,100 @@
 from __future__ import annotations
-import json
-from typing import Optional, Callable, List
+import json, hashlib, sys
+from typing import Optional, Callable, List, Dict, Tuple
+
+SECTIONS = ("rooms", "devices", "furniture", "openings")
+
+# снимок = (canvas-JSON, кортеж хэшей записей); записи хранятся один раз и делятся между снимками
+Snapshot = Tuple[str, Tuple[str, ...]]
+
+def record_key(section: str, rec: Dict) -> str:
+    """Адрес записи по содержимому: одинаковые объекты в разных снимках дают один ключ."""
+    body = json.dumps(rec, sort_keys=True, ensure_ascii=False)
+    return sys.intern(section[0] + hashlib.sha1(f"{section}|{body}".encode("utf-8")).hexdigest()[:20])
 
 class UndoManager:
-    def __init__(self, on_change: Optional[Callable[[], None]] = None, autosave_path: str = "smarthome_autosave.json"):
-        self._undo_stack: List[str] = []
-        self._redo_stack: List[str] = []
+    """
+    История правок. Снимок — не JSON всей сцены, а список хэшей записей объектов:
+    неизменённые объекты общие для всех снимков, память растёт с объёмом правок.
+    Автосохранение по умолчанию журналом (см. journal.py): в лог уходит разница с прошлым
+    снимком, проект целиком — только в контрольные точки. journaled=False — как раньше,
+    весь проект в autosave_path на каждую правку.
+    """
+    def __init__(self, on_change: Optional[Callable[[], None]] = None, autosave_path: str = "smarthome_autosave.json",
+                 journaled: bool = True):
+        self._undo_stack: List[Snapshot] = []
+        self._redo_stack: List[Snapshot] = []
+        self._records: Dict[str, Tuple[str, Dict]] = {}   # хэш -> (секция, запись)
+        self._refs: Dict[str, int] = {}
         self.autosave_path = autosave_path
         self.on_change = on_change
+        self._journal = None
+        if journaled:
+            from .journal import Journal
+            self._journal = Journal(autosave_path)
+
+    # ---- хранилище записей ----
+    def _intern(self, data: Dict) -> Snapshot:
+        keys: List[str] = []
+        for section in SECTIONS:
+            for rec in data.get(section, []):
+                key = record_key(section, rec)
+                if key not in self._records:
+                    self._records[key] = (section, rec)
+                    self._refs[key] = 0
+                self._refs[key] += 1
+                keys.append(key)
+        canvas = json.dumps(data.get("canvas") or {}, sort_keys=True)
+        return canvas, tuple(keys)
+
+    def _release(self, snaps: List[Snapshot]):
+        for _, keys in snaps:
+            for key in keys:
+                self._refs[key] -= 1
+                if not self._refs[key]:
+                    del self._refs[key], self._records[key]
+
+    def records(self, snap: Snapshot) -> List[Tuple[str, str, Dict]]:
+        """(секция, хэш, запись) снимка. Записи общие — не изменять."""
+        out = []
+        for key in snap[1]:
+            section, rec = self._records[key]
+            out.append((section, key, rec))
+        return out
+
+    def canvas(self, snap: Snapshot) -> Dict:
+        return json.loads(snap[0])
+
+    def data(self, snap: Snapshot) -> Dict:
+        """Полный проект снимка (как SceneState.serialize)."""
+        out: Dict = {"canvas": self.canvas(snap)}
+        for section in SECTIONS:
+            out[section] = []
+        for section, _, rec in self.records(snap):
+            out[section].append(rec)
+        return out
+
+    def stats(self) -> Tuple[int, int]:
+        """(снимков в истории, уникальных записей)."""
+        return len(self._undo_stack) + len(self._redo_stack), len(self._records)
+
+    # ---- история ----
+    def push(self, data: Dict):
+        snap = self._intern(data)
+        prev = self.top()
+        self._undo_stack.append(snap)
+        self._journal_step(prev, snap, data)
+        self._release(self._redo_stack)
+        self._redo_stack.clear()
+        if self.on_change: self.on_change()
 
-    def push(self, snapshot: str):
-        self._undo_stack.append(snapshot)
+    def reset(self, data: Dict):
+        """Начать историю заново с data (например, после загрузки проекта)."""
+        snap = self._intern(data)
+        self._release(self._undo_stack + self._redo_stack)
+        self._undo_stack = [snap]
         self._redo_stack.clear()
-        self._autosave(snapshot)
+        self._journal_step(None, snap, data)
         if self.on_change: self.on_change()
 
     def can_undo(self) -> bool:
@@ -21,26 +103,57 @@ class UndoManager:
     def can_redo(self) -> bool:
         return bool(self._redo_stack)
 
-    def undo(self) -> Optional[str]:
+    def undo(self) -> Optional[Snapshot]:
         if not self.can_undo():
             return None
         current = self._undo_stack.pop()
         self._redo_stack.append(current)
+        self._journal_step(current, self._undo_stack[-1])
         return self._undo_stack[-1]
 
-    def redo(self) -> Optional[str]:
+    def redo(self) -> Optional[Snapshot]:
         if not self.can_redo():
             return None
         snap = self._redo_stack.pop()
         self._undo_stack.append(snap)
+        self._journal_step(self._undo_stack[-2], snap)
         return snap
 
-    def top(self) -> Optional[str]:
+    def top(self) -> Optional[Snapshot]:
         return self._undo_stack[-1] if self._undo_stack else None
 
-    def _autosave(self, snapshot: str):
+    # ---- автосохранение ----
+    def _delta(self, prev: Snapshot, snap: Snapshot) -> Optional[Tuple[List, List[str]]]:
+        """(новые записи, id удалённых) между снимками; None — если есть записи без id."""
+        old, new = set(prev[1]), set(snap[1])
+        put = [list(self._records[k]) for k in snap[1] if k not in old]
+        gone = [self._records[k][1].get("id") for k in prev[1] if k not in new]
+        alive = {rec.get("id") for _, rec in put}
+        if None in alive or None in gone:
+            return None
+        return put, [uid for uid in gone if uid not in alive]
+
+    def _journal_step(self, prev: Optional[Snapshot], snap: Snapshot, data: Optional[Dict] = None):
+        """Переход prev -> snap: в журнал — разница снимков; при prev=None или длинном логе — точка."""
+        if self._journal is None:
+            if data is not None:
+                self._autosave(data)
+            return
+        try:
+            delta = None if prev is None or self._journal.needs_checkpoint() else self._delta(prev, snap)
+            if delta is None:
+                self._journal.checkpoint(data if data is not None else self.data(snap))
+            else:
+                self._journal.append(self.canvas(snap) if snap[0] != prev[0] else None, *delta)
+        except Exception:
+            pass
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+
+    def _autosave(self, data: Dict):
         try:
-            data = json.loads(snapshot)
             with open(self.autosave_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception:
@@ -1,25 +1,39 @@
 from __future__ import annotations
 import os, math
+from bisect import bisect_left
 from PySide6.QtCore import Qt, QRectF
 from PySide6.QtGui import QColor, QPixmap, QPainter, QPen
 from PySide6.QtSvg import QSvgRenderer
 
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # ===== Canvas / grid =====
 PX_GRID = 10.0
 GRID_STEP = PX_GRID
-SCENE_W = 1100.0
+SCENE_W = 1100.0          # стартовый (и минимальный) размер холста
 SCENE_H = 750.0
 EPS = 0.5
+PX_PER_METER = 100.0       # масштаб плана: 1 px = 1 см
+
+# ===== Dynamic canvas =====
+CANVAS_CHUNK = 1000.0      # холст растёт кусками по столько px
+CANVAS_GROW_MARGIN = 200.0 # ...как только содержимое подходит к краю ближе этого
+CANVAS_MAX = 200_000.0     # жёсткий предел по каждой оси
 
 # ===== Colors =====
 ROOM_COLOR = QColor(100, 160, 255, 90)
 ROOM_BORDER = QColor(30, 90, 200)
 DEV_COLOR = QColor(255, 220, 0, 150)
 DEV_BORDER = QColor(120, 95, 0)
+MAGNET_COLOR = QColor(249, 115, 22, 200)   # стена, к которой прилипнет проём
+GUIDE_COLOR = QColor("#EC4899")            # умные направляющие при перетаскивании
+ROUTE_COLOR = QColor("#7C3AED")            # маршрут через двери
 
 # ===== Grid visuals =====
 GRID_STEP = 10.0
 MAJOR_EVERY = 5
+GRID_MIN_PX = 6.0          # линии сетки ближе этого (на экране) — укрупняем шаг
+GUIDE_SNAP_PX = 6.0        # порог прилипания к направляющим, экранные px
 BG_COLOR = QColor("#F2F4F7")
 GRID_MINOR = QColor("#D0D6E0")
 GRID_MAJOR = QColor("#A8B3C2")
@@ -38,6 +52,15 @@ CATEGORY_ICON_FURNITURE = "assets/icons/furniture.svg"
 def snap(v: float, step: float) -> float:
     return round(v / step) * step
 
+def grow_canvas(w: float, h: float, right: float, bottom: float) -> tuple:
+    """Новый размер холста, чтобы правый/нижний край содержимого не упирался в границу."""
+    def _grow(size: float, edge: float) -> float:
+        need = edge + CANVAS_GROW_MARGIN
+        if need <= size:
+            return size
+        return min(CANVAS_MAX, math.ceil(need / CANVAS_CHUNK) * CANVAS_CHUNK)
+    return _grow(w, right), _grow(h, bottom)
+
 def _scene_rect_of_item(item) -> QRectF:
     r = item.rect()
     return QRectF(item.pos().x(), item.pos().y(), r.width(), r.height())
@@ -50,19 +73,56 @@ def _rects_overlap_strict(a: QRectF, b: QRectF, eps: float = EPS) -> bool:
         (a.bottom() > b.top()    + eps)
     )
 
+class SortedEntries:
+    """Кортежи, упорядоченные по первому полю; ключи — отдельным списком для bisect."""
+    def __init__(self):
+        self.keys: list = []
+        self.entries: list = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def insert(self, entry: tuple):
+        i = bisect_left(self.keys, entry[0])
+        self.keys.insert(i, entry[0])
+        self.entries.insert(i, entry)
+
+    def remove(self, entry: tuple):
+        """Удаляет именно этот кортеж (по идентичности), а не равный ему."""
+        i = bisect_left(self.keys, entry[0])
+        while i < len(self.entries) and self.keys[i] == entry[0]:
+            if self.entries[i] is entry:
+                del self.keys[i], self.entries[i]
+                return
+            i += 1
+
+def asset_path(path: str) -> str:
+    """Относительный путь ассета: сначала от рабочей папки, затем от папки приложения."""
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    return os.path.join(APP_DIR, path)
+
+_icon_cache: dict = {}
+
 def load_svg_icon(path: str, size: int):
+    # каждый SVG разбираем и растрируем один раз на (путь, размер)
+    key = (path, size)
+    if key in _icon_cache:
+        return _icon_cache[key]
+    icon = None
     try:
-        if not os.path.exists(path):
-            return None
-        renderer = QSvgRenderer(path)
-        if not renderer.isValid():
-            return None
-        pm = QPixmap(size, size)
-        pm.fill(Qt.transparent)
-        p = QPainter(pm)
-        renderer.render(p, QRectF(0, 0, size, size))
-        p.end()
-        from PySide6.QtGui import QIcon
-        return QIcon(pm)
+        full = asset_path(path)
+        if os.path.exists(full):
+            renderer = QSvgRenderer(full)
+            if renderer.isValid():
+                pm = QPixmap(size, size)
+                pm.fill(Qt.transparent)
+                p = QPainter(pm)
+                renderer.render(p, QRectF(0, 0, size, size))
+                p.end()
+                from PySide6.QtGui import QIcon
+                icon = QIcon(pm)
     except Exception:
-        return None
+        icon = None
+    _icon_cache[key] = icon
+    return icon
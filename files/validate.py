@@ -0,0 +1,150 @@
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import List, Tuple, Sequence
+from .items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
+from .utils import EPS, _scene_rect_of_item
+
+try:
+    import numpy as np
+except ImportError:   # NumPy необязателен: без него тот же sweep идёт на списках
+    np = None
+
+@dataclass
+class Issue:
+    kind: str            # "overlap" | "out_of_canvas" | "out_of_parent" | "dangling_opening"
+    items: tuple         # объекты сцены, к которым относится проблема
+    message: str
+
+KIND_TITLES = {
+    "overlap": "Пересечение",
+    "out_of_canvas": "За холстом",
+    "out_of_parent": "Вне комнаты",
+    "dangling_opening": "Проём без стены",
+}
+
+Rect = Tuple[float, float, float, float]   # x0, y0, x1, y1
+
+# ---- sort-and-sweep ----
+def overlapping_pairs(rects: Sequence[Rect], eps: float = EPS) -> List[Tuple[int, int]]:
+    """
+    Индексы пар прямоугольников, пересекающихся больше чем на eps по обеим осям
+    (как _rects_overlap_strict). Сортировка по x0, кандидаты для i — следующие
+    прямоугольники, чей x0 левее x1[i]; затем отсев по y.
+    """
+    if len(rects) < 2:
+        return []
+    if np is not None:
+        return _pairs_numpy(np.asarray(rects, dtype=float), eps)
+    return _pairs_python(rects, eps)
+
+def _pairs_numpy(r, eps: float) -> List[Tuple[int, int]]:
+    n = len(r)
+    order = np.argsort(r[:, 0], kind="stable")
+    s = r[order]
+    ends = np.searchsorted(s[:, 0], s[:, 2] - eps, side="left")
+    starts = np.arange(1, n + 1)
+    cnt = np.maximum(ends - starts, 0)
+    total = int(cnt.sum())
+    if not total:
+        return []
+    i = np.repeat(np.arange(n), cnt)
+    j = np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt) + np.repeat(starts, cnt)
+    a, b = s[i], s[j]
+    hit = ((np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]) > eps) &
+           (np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]) > eps))
+    return list(zip(order[i[hit]].tolist(), order[j[hit]].tolist()))
+
+def _pairs_python(rects: Sequence[Rect], eps: float) -> List[Tuple[int, int]]:
+    order = sorted(range(len(rects)), key=lambda k: rects[k][0])
+    xs = [rects[k][0] for k in order]
+    out = []
+    for pos, i in enumerate(order):
+        ax0, ay0, ax1, ay1 = rects[i]
+        for j in order[pos + 1:bisect_left(xs, ax1 - eps)]:
+            bx0, by0, bx1, by1 = rects[j]
+            if min(ax1, bx1) - max(ax0, bx0) > eps and min(ay1, by1) - max(ay0, by0) > eps:
+                out.append((i, j))
+    return out
+
+def outside(rects: Sequence[Rect], bounds: Sequence[Rect], eps: float = EPS) -> List[int]:
+    """Индексы прямоугольников, выходящих за свои границы bounds[i] больше чем на eps."""
+    if not len(rects):
+        return []
+    if np is not None:
+        r = np.asarray(rects, dtype=float); b = np.asarray(bounds, dtype=float)
+        bad = ((r[:, 0] < b[:, 0] - eps) | (r[:, 1] < b[:, 1] - eps) |
+               (r[:, 2] > b[:, 2] + eps) | (r[:, 3] > b[:, 3] + eps))
+        return np.flatnonzero(bad).tolist()
+    return [k for k, (r, b) in enumerate(zip(rects, bounds))
+            if r[0] < b[0] - eps or r[1] < b[1] - eps or r[2] > b[2] + eps or r[3] > b[3] + eps]
+
+def _xyxy(r) -> Rect:
+    return (r.left(), r.top(), r.right(), r.bottom())
+
+# ---- проверка плана ----
+def validate_scene(scene) -> List[Issue]:
+    """Проверка всего плана за один проход: пересечения, выход за холст/комнату, висящие проёмы."""
+    rooms, placeables, openings = [], [], []
+    for it in scene.items():
+        if getattr(it, "_is_preview", False):
+            continue
+        if isinstance(it, RoomItem):
+            rooms.append(it)
+        elif isinstance(it, (DeviceItem, FurnitureItem)):
+            placeables.append(it)
+        elif isinstance(it, OpeningItem):
+            openings.append(it)
+
+    issues: List[Issue] = []
+    canvas = _xyxy(scene.sceneRect())
+    room_rects = [_xyxy(_scene_rect_of_item(r)) for r in rooms]
+
+    for i, j in overlapping_pairs(room_rects):
+        a, b = rooms[i], rooms[j]
+        issues.append(Issue("overlap", (a, b), f"Комнаты «{a.props.name}» и «{b.props.name}» перекрываются"))
+
+    # приборы и мебель — в координатах сцены (с учётом поворота)
+    pl_rects = [_xyxy(p.mapRectToScene(p.rect())) for p in placeables]
+    for i, j in overlapping_pairs(pl_rects):
+        a, b = placeables[i], placeables[j]
+        issues.append(Issue("overlap", (a, b), f"«{a.props.name}» и «{b.props.name}» перекрываются"))
+
+    # окна «снаружи» у комнаты на краю холста законно торчат за него на свою толщину
+    top = rooms + openings
+    top_rects = room_rects + [_xyxy(_scene_rect_of_item(o)) for o in openings]
+    x0, y0, x1, y1 = canvas
+    top_bounds = [canvas] * len(rooms) + [(x0 - o.thickness, y0 - o.thickness, x1 + o.thickness, y1 + o.thickness)
+                                          for o in openings]
+    for k in outside(top_rects, top_bounds):
+        issues.append(Issue("out_of_canvas", (top[k],), f"«{top[k].props.name}» выходит за границы холста"))
+
+    # приборы/мебель: локальный габарит против rect() комнаты-родителя
+    parented, local, bounds = [], [], []
+    for p in placeables:
+        parent = p.parentItem()
+        if not isinstance(parent, RoomItem):
+            issues.append(Issue("out_of_parent", (p,), f"«{p.props.name}» не находится ни в одной комнате"))
+            continue
+        parented.append(p)
+        local.append(_xyxy(p.mapRectToParent(p.rect())))
+        bounds.append(_xyxy(parent.rect()))
+    for k in outside(local, bounds):
+        p = parented[k]
+        issues.append(Issue("out_of_parent", (p,), f"«{p.props.name}» выходит за стены комнаты «{p.parentItem().props.name}»"))
+
+    # проём должен прилегать к стене своей комнаты: габарит проёма внутри комнаты, расширенной на толщину
+    anchored, op_rects, op_bounds = [], [], []
+    for o in openings:
+        room = o.anchor_room
+        if room is None or room.scene() is not scene or not o.edge:
+            issues.append(Issue("dangling_opening", (o,), f"Проём «{o.props.name}» не привязан к комнате"))
+            continue
+        rr = _scene_rect_of_item(room).adjusted(-o.thickness, -o.thickness, o.thickness, o.thickness)
+        anchored.append(o)
+        op_rects.append(_xyxy(_scene_rect_of_item(o)))
+        op_bounds.append(_xyxy(rr))
+    for k in outside(op_rects, op_bounds):
+        o = anchored[k]
+        issues.append(Issue("dangling_opening", (o,), f"Проём «{o.props.name}» оторван от стены комнаты «{o.anchor_room.props.name}»"))
+    return issues
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from typing import List
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem
+from shiboken6 import isValid
+
+from .models import Layer
+from .items import RoomItem, DeviceItem, FurnitureItem, OpeningItem
+from .validate import Issue, KIND_TITLES, validate_scene
+
+class ValidationPanel(QWidget):
+    """Результаты проверки плана; двойной клик — выделить объект и прокрутить к нему."""
+    requestFocusItem = Signal(object)  # item
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.issues: List[Issue] = []
+
+        root = QVBoxLayout(self)
+        root.setContentsMargins(8, 8, 8, 8)
+        root.setSpacing(8)
+
+        row = QHBoxLayout()
+        self.lbl_summary = QLabel("Проверка не выполнялась")
+        self.lbl_summary.setStyleSheet("font-weight: 600;")
+        self.btn_run = QPushButton("Проверить")
+        self.btn_run.clicked.connect(self.run)
+        row.addWidget(self.lbl_summary, 1)
+        row.addWidget(self.btn_run)
+        root.addLayout(row)
+
+        self.list_issues = QListWidget()
+        self.list_issues.setStyleSheet("QListWidget{ background:#fafafa; }")
+        self.list_issues.itemDoubleClicked.connect(self._go_to_issue)
+        root.addWidget(self.list_issues, 1)
+
+    def run(self) -> List[Issue]:
+        self.show_issues(validate_scene(self.scene))
+        return self.issues
+
+    def show_issues(self, issues: List[Issue]):
+        self.issues = issues
+        self.list_issues.clear()
+        for issue in issues:
+            li = QListWidgetItem(f"{KIND_TITLES.get(issue.kind, issue.kind)}: {issue.message}")
+            li.setData(Qt.UserRole, issue)
+            self.list_issues.addItem(li)
+        self.lbl_summary.setText(f"Найдено проблем: {len(issues)}" if issues else "Проблем не найдено")
+
+    def _go_to_issue(self, li: QListWidgetItem):
+        issue = li.data(Qt.UserRole)
+        items = [it for it in issue.items if isValid(it) and it.scene() is self.scene]
+        if not items:
+            return
+        first = items[0]
+        if isinstance(first, RoomItem):     layer = Layer.ROOMS
+        elif isinstance(first, DeviceItem): layer = Layer.DEVICES
+        elif isinstance(first, FurnitureItem): layer = Layer.FURNITURE
+        elif isinstance(first, OpeningItem): layer = Layer.OPENINGS
+        else: layer = self.scene.active_layer
+        self.scene.set_active_layer(layer)   # HUD сам подсветится
+        for it in self.scene.selectedItems():
+            it.setSelected(False)
+        for it in items:
+            it.setSelected(True)
+        self.requestFocusItem.emit(first)
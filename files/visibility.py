@@ -0,0 +1,349 @@
+"""
+Обзор камер и датчиков движения: что реально видит прибор с учётом стен.
+
+Сплошные стены (проёмы вырезаны) лежат в BVH; из датчика в пределах его сектора
+пускаются лучи — равномерно и точно в концы стен, — ближайшие попадания дают
+многоугольник видимости. Результат кэшируется по датчику и сбрасывается, только
+если датчик сдвинулся/повернулся или изменились стены в радиусе его действия.
+"""
+from __future__ import annotations
+import math, itertools
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from PySide6.QtCore import Qt, QRectF, QPointF, QTimer
+from PySide6.QtGui import QImage, QPainter, QPolygonF, QColor, QPen, QBrush
+from PySide6.QtWidgets import QGraphicsObject, QGraphicsItem
+from .items import DeviceItem, RoomItem
+from .utils import PX_GRID, PX_PER_METER
+
+# имя прибора (начало, без регистра) -> (угол обзора, град; дальность, м)
+SENSOR_KINDS = {
+    "камера": (90.0, 8.0),
+    "датчик движения": (110.0, 6.0),
+}
+RAY_STEP_DEG = 1.0          # шаг равномерных лучей
+EDGE_EPS = 1e-4             # лучи чуть левее/правее конца стены, рад
+BVH_LEAF = 4
+SAMPLE_STEP = PX_GRID       # шаг выборки точек комнаты при поиске слепых зон
+VISIBILITY_Z = 60
+VIEW_COLOR = QColor(16, 185, 129, 60)
+GAP_COLOR = QColor(239, 68, 68, 90)
+
+Seg = Tuple[float, float, float, float]          # x0, y0, x1, y1
+Box = Tuple[float, float, float, float]          # x0, y0, x1, y1
+Sensor = Tuple[float, float, float, float, float]   # x, y, направление (град), угол обзора, дальность (px)
+
+def sensor_kind(item) -> Optional[Tuple[float, float]]:
+    if not isinstance(item, DeviceItem):
+        return None
+    name = item.props.name.strip().lower()
+    for prefix, kind in SENSOR_KINDS.items():
+        if name.startswith(prefix):
+            return kind
+    return None
+
+def sensor_params(item) -> Optional[Sensor]:
+    """Центр прибора в сцене, направление взгляда (rot: 0° — вправо, по часовой), сектор и дальность."""
+    kind = sensor_kind(item)
+    if kind is None:
+        return None
+    c = item.mapToScene(item.rect().center())
+    return (c.x(), c.y(), item.rotation(), kind[0], kind[1] * PX_PER_METER)
+
+def _seg_box(s: Seg) -> Box:
+    return (min(s[0], s[2]), min(s[1], s[3]), max(s[0], s[2]), max(s[1], s[3]))
+
+def _boxes_touch(a: Box, b: Box) -> bool:
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+class SegmentBVH:
+    """
+    Иерархия ограничивающих прямоугольников над отрезками стен. Узел — список
+    [x0, y0, x1, y1, левый, правый, начало, количество]; листья ссылаются на
+    непрерывный кусок self.segs (отрезки переставлены при построении).
+    """
+    def __init__(self, segments: Sequence[Seg]):
+        self.segs: List[Seg] = list(segments)
+        self.nodes: List[list] = []
+        if self.segs:
+            self._build(0, len(self.segs))
+
+    def __len__(self) -> int:
+        return len(self.segs)
+
+    def _build(self, lo: int, hi: int) -> int:
+        segs = self.segs
+        x0 = min(min(s[0], s[2]) for s in segs[lo:hi]); x1 = max(max(s[0], s[2]) for s in segs[lo:hi])
+        y0 = min(min(s[1], s[3]) for s in segs[lo:hi]); y1 = max(max(s[1], s[3]) for s in segs[lo:hi])
+        idx = len(self.nodes)
+        node = [x0, y0, x1, y1, -1, -1, lo, hi - lo]
+        self.nodes.append(node)
+        if hi - lo > BVH_LEAF:
+            # делим по медиане центров вдоль длинной стороны
+            axis = 0 if x1 - x0 >= y1 - y0 else 1
+            segs[lo:hi] = sorted(segs[lo:hi], key=lambda s: s[axis] + s[axis + 2])
+            mid = (lo + hi) // 2
+            node[4] = self._build(lo, mid)
+            node[5] = self._build(mid, hi)
+            node[7] = 0
+        return idx
+
+    def query(self, box: Box) -> List[Seg]:
+        """Отрезки, чей габарит пересекает box."""
+        out: List[Seg] = []
+        if not self.nodes:
+            return out
+        stack = [0]
+        while stack:
+            n = self.nodes[stack.pop()]
+            if not _boxes_touch((n[0], n[1], n[2], n[3]), box):
+                continue
+            if n[7]:
+                out.extend(s for s in self.segs[n[6]:n[6] + n[7]] if _boxes_touch(_seg_box(s), box))
+            else:
+                stack.append(n[4]); stack.append(n[5])
+        return out
+
+    def raycast(self, ox: float, oy: float, dx: float, dy: float, tmax: float) -> float:
+        """Расстояние (в долях (dx, dy)) до ближайшей стены вдоль луча, но не больше tmax."""
+        if not self.nodes:
+            return tmax
+        inv_x = 1.0 / dx if dx else math.inf
+        inv_y = 1.0 / dy if dy else math.inf
+        best = tmax
+        stack = [0]
+        nodes, segs = self.nodes, self.segs
+        while stack:
+            n = nodes[stack.pop()]
+            # slab-тест габарита узла
+            if dx:
+                t0 = (n[0] - ox) * inv_x; t1 = (n[2] - ox) * inv_x
+                if t0 > t1: t0, t1 = t1, t0
+            else:
+                if ox < n[0] or ox > n[2]: continue
+                t0, t1 = -math.inf, math.inf
+            if dy:
+                u0 = (n[1] - oy) * inv_y; u1 = (n[3] - oy) * inv_y
+                if u0 > u1: u0, u1 = u1, u0
+            else:
+                if oy < n[1] or oy > n[3]: continue
+                u0, u1 = -math.inf, math.inf
+            if max(t0, u0, 0.0) > min(t1, u1, best):
+                continue
+            if not n[7]:
+                stack.append(n[4]); stack.append(n[5])
+                continue
+            for x0, y0, x1, y1 in segs[n[6]:n[6] + n[7]]:
+                ex, ey = x1 - x0, y1 - y0
+                den = dx * ey - dy * ex
+                if not den:
+                    continue                      # параллельно стене
+                t = ((x0 - ox) * ey - (y0 - oy) * ex) / den
+                u = ((x0 - ox) * dy - (y0 - oy) * dx) / den
+                if 0.0 < t < best and 0.0 <= u <= 1.0:
+                    best = t
+        return best
+
+@dataclass
+class SensorView:
+    params: Sensor
+    polygon: QPolygonF
+    box: Box                                   # габарит радиуса действия (для сброса кэша)
+    serial: int = field(default_factory=itertools.count().__next__)   # номер расчёта, не повторяется
+
+@dataclass
+class RoomVisibility:
+    room: object
+    seen: float                                # доля площади комнаты, которую видит хоть один датчик
+    gaps: List[QRectF] = field(default_factory=list)
+
+class VisibilityEngine:
+    """Кэш многоугольников видимости по датчикам и слепых зон по комнатам."""
+    def __init__(self):
+        self._walls: Set[Tuple[float, float, float, float, bool]] = set()
+        self.bvh = SegmentBVH(())
+        self._sensors: Dict[object, Sensor] = {}
+        self._views: Dict[object, SensorView] = {}
+        self._rooms: Dict[object, Tuple[tuple, RoomVisibility]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sensors)
+
+    def clear(self):
+        self.__init__()
+
+    def update(self, sensors: Dict[object, Sensor], walls) -> Set[object]:
+        """Новые датчики и стены; возвращает датчики, чей обзор придётся пересчитать."""
+        dirty = {s for s in set(self._sensors) | set(sensors) if self._sensors.get(s) != sensors.get(s)}
+        for s in dirty:
+            self._views.pop(s, None)
+        self._sensors = dict(sensors)
+        walls = set(walls)
+        changed = walls ^ self._walls
+        if changed:
+            self._walls = walls
+            self.bvh = SegmentBVH([(lo, c, hi, c) if o == "H" else (c, lo, c, hi) for o, c, lo, hi, _ in walls])
+            boxes = [_seg_box((lo, c, hi, c) if o == "H" else (c, lo, c, hi)) for o, c, lo, hi, _ in changed]
+            for s, view in list(self._views.items()):
+                if any(_boxes_touch(view.box, b) for b in boxes):
+                    del self._views[s]
+                    dirty.add(s)
+        return dirty
+
+    def view(self, sensor) -> Optional[SensorView]:
+        v = self._views.get(sensor)
+        if v is None and sensor in self._sensors:
+            v = self._views[sensor] = self._cast(self._sensors[sensor])
+        return v
+
+    def views(self) -> List[SensorView]:
+        return [self.view(s) for s in self._sensors]
+
+    def _cast(self, p: Sensor) -> SensorView:
+        ox, oy, heading, fov, rng = p
+        box = (ox - rng, oy - rng, ox + rng, oy + rng)
+        a0 = math.radians(heading - fov / 2.0)
+        a1 = math.radians(heading + fov / 2.0)
+        n = max(2, int(math.ceil(fov / RAY_STEP_DEG)))
+        angles = [a0 + (a1 - a0) * k / n for k in range(n + 1)]
+        # лучи точно в концы стен (и чуть мимо них) — углы тени получаются резкими
+        for x0, y0, x1, y1 in self.bvh.query(box):
+            for ex, ey in ((x0, y0), (x1, y1)):
+                a = math.atan2(ey - oy, ex - ox)
+                rel = (a - a0) % (2 * math.pi)
+                if rel <= a1 - a0:
+                    for da in (-EDGE_EPS, 0.0, EDGE_EPS):
+                        if 0.0 <= rel + da <= a1 - a0:
+                            angles.append(a0 + rel + da)
+        angles.sort()
+        pts = [QPointF(ox, oy)]
+        for a in angles:
+            dx, dy = math.cos(a), math.sin(a)
+            t = self.bvh.raycast(ox, oy, dx, dy, rng)
+            pts.append(QPointF(ox + dx * t, oy + dy * t))
+        return SensorView(p, QPolygonF(pts), box)
+
+    def room_visibility(self, room, rect: QRectF) -> RoomVisibility:
+        """Какая доля комнаты видна и где слепые зоны (выборка точек с шагом SAMPLE_STEP)."""
+        rb = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        area = QPolygonF(rect)
+        # в ключе — только обзоры, чей многоугольник задевает комнату: поворот камеры
+        # в соседней комнате, не достающий сюда, выборку не сбрасывает
+        views = [v for v in self.views() if _boxes_touch(v.box, rb) and v.polygon.intersects(area)]
+        # id() освобождённого обзора может достаться новому — ключ по номерам расчёта
+        key = (rb, tuple(v.serial for v in views))
+        cached = self._rooms.get(room)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        step = SAMPLE_STEP
+        nx = max(1, int(rect.width() // step)); ny = max(1, int(rect.height() // step))
+        sx, sy = rect.width() / nx, rect.height() / ny
+        # точка выборки = центр пикселя маски: заливка без сглаживания красит пиксель,
+        # если его центр внутри многоугольника (как containsPoint с OddEvenFill)
+        mask = QImage(nx, ny, QImage.Format_Grayscale8)
+        mask.fill(0)
+        if views:
+            p = QPainter(mask)
+            p.setPen(Qt.NoPen)
+            p.setBrush(QColor(255, 255, 255))
+            p.scale(1.0 / sx, 1.0 / sy)
+            p.translate(-rect.left(), -rect.top())
+            for v in views:
+                p.drawPolygon(v.polygon, Qt.OddEvenFill)
+            p.end()
+        bits, stride = bytes(mask.constBits()), mask.bytesPerLine()
+        seen, gaps = 0, []
+        for j in range(ny):
+            row = bits[j * stride:j * stride + nx]
+            seen += nx - row.count(0)
+            i = row.find(0)
+            while i >= 0:
+                end = row.find(255, i)
+                end = nx if end < 0 else end
+                gaps.append(QRectF(rect.left() + i * sx, rect.top() + j * sy, (end - i) * sx, sy))
+                i = row.find(0, end)
+        res = RoomVisibility(room, seen / float(nx * ny), gaps)
+        self._rooms[room] = (key, res)
+        return res
+
+    def forget_room(self, room):
+        self._rooms.pop(room, None)
+
+class VisibilityOverlay(QGraphicsObject):
+    """
+    Слой обзора: многоугольники видимости датчиков и слепые зоны комнат, где датчики стоят.
+    Пересчёт — по planChanged сцены, не чаще раза в REFRESH_MS; обновляются только
+    датчики из VisibilityEngine.update.
+    """
+    REFRESH_MS = 150
+
+    def __init__(self, scene):
+        super().__init__()
+        self.engine = VisibilityEngine()
+        self.rooms: Dict[object, RoomVisibility] = {}
+        self._bounds = QRectF()
+        self.setZValue(VISIBILITY_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._scene = scene
+        scene.addItem(self)
+        scene.planChanged.connect(self.schedule)
+        self.refresh()
+
+    def detach(self):
+        self._scene.planChanged.disconnect(self.schedule)
+        self._timer.stop()
+        self._scene.removeItem(self)
+
+    def schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def refresh(self) -> Set[object]:
+        sensors, hosts = {}, set()
+        for it in self._scene.items():
+            if isinstance(it, DeviceItem) and not it._is_preview:
+                p = sensor_params(it)
+                if p is not None:
+                    sensors[it] = p
+                    if isinstance(it.parentItem(), RoomItem):
+                        hosts.add(it.parentItem())
+        dirty = self.engine.update(sensors, self._scene.solid_walls())
+        for room in list(self.rooms):
+            if room not in hosts:
+                del self.rooms[room]
+                self.engine.forget_room(room)
+        for room in hosts:
+            r = room.rect()
+            self.rooms[room] = self.engine.room_visibility(room, QRectF(room.pos().x(), room.pos().y(), r.width(), r.height()))
+        bounds = QRectF()
+        for v in self.engine.views():
+            bounds = bounds.united(v.polygon.boundingRect())
+        for rv in self.rooms.values():
+            for g in rv.gaps:
+                bounds = bounds.united(g)
+        if bounds != self._bounds:
+            self.prepareGeometryChange()
+            self._bounds = bounds
+        self.update()
+        return dirty
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter: QPainter, option, widget=None):
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(GAP_COLOR))
+        for rv in self.rooms.values():
+            for g in rv.gaps:
+                painter.drawRect(g)
+        pen = QPen(VIEW_COLOR.darker(150), 1)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(QBrush(VIEW_COLOR))
+        for v in self.engine.views():
+            painter.drawPolygon(v.polygon)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from PySide6.QtCore import QRectF, QLineF
+from .utils import SortedEntries, _scene_rect_of_item
+
+# стена = (координата, начало, конец, комната, сторона); для T/B координата — y, для L/R — x
+Wall = Tuple[float, float, float, object, str]
+TIE = 1e-6   # равные расстояния (общая стена соседних комнат)
+
+def room_walls(rect: QRectF) -> List[Tuple[str, float, float, float]]:
+    """Четыре стены прямоугольника: (сторона, координата, начало, конец)."""
+    return [("T", rect.top(), rect.left(), rect.right()),
+            ("B", rect.bottom(), rect.left(), rect.right()),
+            ("L", rect.left(), rect.top(), rect.bottom()),
+            ("R", rect.right(), rect.top(), rect.bottom())]
+
+Gap = Tuple[str, float, float, float]   # вырез в стене: (ориентация "H"|"V", координата, начало, конец)
+
+def opening_gap(op) -> Optional[Gap]:
+    """Проём как вырез в стене своей комнаты (или None, если проём не привязан)."""
+    room = op.anchor_room
+    if room is None or not op.edge:
+        return None
+    for edge, c, lo, hi in room_walls(_scene_rect_of_item(room)):
+        if edge == op.edge:
+            a = lo + max(0.0, min(op.offset, (hi - lo) - op.length))
+            return ("H" if edge in ("T", "B") else "V", c, a, a + op.length)
+    return None
+
+def cut_openings(segments, gaps, line_round: int = 3) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Сплошные участки стен: отрезки топологии (WallSegment) минус проёмы.
+    Результат — (ориентация, координата, начало, конец, общая ли стена).
+    """
+    by_line: Dict[Tuple[str, float], List[Tuple[float, float]]] = {}
+    for g in gaps:
+        if g is not None:
+            by_line.setdefault((g[0], round(g[1], line_round)), []).append((g[2], g[3]))
+    for cuts in by_line.values():
+        cuts.sort()
+    out = []
+    for s in segments:
+        lo, hi = s.lo, s.hi
+        for a, b in by_line.get((s.orient, round(s.coord, line_round)), ()):
+            if b <= lo or a >= hi:
+                continue
+            if a > lo:
+                out.append((s.orient, s.coord, lo, a, s.shared))
+            lo = max(lo, b)
+            if lo >= hi:
+                break
+        if hi > lo:
+            out.append((s.orient, s.coord, lo, hi, s.shared))
+    return out
+
+class WallIndex:
+    """
+    Индекс стен комнат для магнита проёмов: горизонтальные стены упорядочены по y,
+    вертикальные — по x. Поиск ближайшей стены идёт от позиции bisect наружу и
+    останавливается, как только разница координат превышает лучшее расстояние.
+    """
+    def __init__(self):
+        self._h = SortedEntries()          # T/B
+        self._v = SortedEntries()          # L/R
+        self._rooms: Dict[object, Tuple[QRectF, Tuple[Wall, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __contains__(self, room) -> bool:
+        return room in self._rooms
+
+    def clear(self):
+        self.__init__()
+
+    def update_room(self, room):
+        """Добавить комнату или обновить её стены после сдвига/изменения размера."""
+        rect = _scene_rect_of_item(room)
+        old = self._rooms.get(room)
+        if old is not None:
+            if old[0] == rect:
+                return
+            self._drop(old[1])
+        walls = []
+        for edge, c, lo, hi in room_walls(rect):
+            wall = (c, lo, hi, room, edge)
+            (self._h if edge in ("T", "B") else self._v).insert(wall)
+            walls.append(wall)
+        self._rooms[room] = (rect, tuple(walls))
+
+    def remove_room(self, room):
+        old = self._rooms.pop(room, None)
+        if old is not None:
+            self._drop(old[1])
+
+    def _drop(self, walls):
+        for wall in walls:
+            (self._h if wall[4] in ("T", "B") else self._v).remove(wall)
+
+    def rooms(self) -> List[object]:
+        return list(self._rooms)
+
+    def room_rect(self, room) -> Optional[QRectF]:
+        entry = self._rooms.get(room)
+        return QRectF(entry[0]) if entry else None
+
+    def nearest(self, x: float, y: float, max_dist: float = math.inf,
+                exclude=None) -> Optional[Tuple[object, str, float, float]]:
+        """
+        Ближайшая к точке стена: (комната, сторона, расстояние, позиция проекции вдоль стены
+        от её начала). При равенстве (общая стена) выигрывает комната, внутри которой точка.
+        """
+        best: Optional[Tuple[object, str, float, float]] = None
+        best_d = max_dist
+        best_inside = False
+        for sw, c, t in ((self._h, y, x), (self._v, x, y)):
+            keys, walls = sw.keys, sw.entries
+            i = bisect_left(keys, c)
+            # две волны: вниз и вверх по координате
+            for j, step in ((i - 1, -1), (i, 1)):
+                while 0 <= j < len(keys) and abs(keys[j] - c) <= best_d + TIE:
+                    wc, lo, hi, room, edge = walls[j]
+                    j += step
+                    if room is exclude:
+                        continue
+                    dt = max(lo - t, 0.0, t - hi)
+                    d = math.hypot(wc - c, dt)
+                    if d > best_d + TIE:
+                        continue
+                    inside = self._rooms[room][0].contains(x, y)
+                    if d < best_d - TIE or (inside and not best_inside) or best is None:
+                        best_d, best_inside = d, inside
+                        best = (room, edge, d, min(max(t, lo), hi) - lo)
+        return best
+
+    def nearest_edge(self, x: float, y: float, length: float, max_dist: float = math.inf,
+                     exclude=None) -> Optional[Tuple[object, str, float]]:
+        """(комната, сторона, offset) для проёма длины length, центрированного по точке."""
+        hit = self.nearest(x, y, max_dist, exclude)
+        if hit is None:
+            return None
+        room, edge, _, along = hit
+        rect = self._rooms[room][0]
+        wall_len = rect.width() if edge in ("T", "B") else rect.height()
+        offset = max(0.0, min(along - length / 2.0, wall_len - length))
+        return room, edge, offset
+
+    def wall_line(self, room, edge: str) -> Optional[QLineF]:
+        """Стена комнаты в координатах сцены (для подсветки магнита)."""
+        entry = self._rooms.get(room)
+        if entry is None:
+            return None
+        for wc, lo, hi, _, e in entry[1]:
+            if e == edge:
+                return QLineF(lo, wc, hi, wc) if e in ("T", "B") else QLineF(wc, lo, wc, hi)
+        return None
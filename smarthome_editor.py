@@ -2,15 +2,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import sys, json
-from PySide6.QtCore import Qt, QSizeF
-from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtCore import Qt, QSizeF, QTimer, QEvent
+from PySide6.QtGui import QAction, QKeySequence, QCursor
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QToolBar, QStatusBar, QFileDialog, QMessageBox,
-    QDockWidget, QStyle, QLabel, QWidget, QWidgetAction   # ← добавлено
+    QDockWidget, QStyle, QLabel, QWidget, QWidgetAction,   # ← добавлено
+    QInputDialog, QProgressDialog
 )
 import os
-from files import PlanScene, PlanView, UndoManager, Mode, PalettePanel, SCENE_W, SCENE_H, PropertyPanel, Layer
+from files import PlanScene, PlanView, UndoManager, Mode, Layer
 from shiboken6 import isValid
+from files.recent import push_recent, recent_cache
 
 def _ensure_ext(path: str, ext: str) -> str:
     ext = ext.lower()
@@ -30,17 +32,16 @@ class MainWindow(QMainWindow):
         self.view = PlanView(self.scene)
         self.setCentralWidget(self.view)
 
-        # 2) Панель свойств — СОЗДАЁМ СРАЗУ, до любых addDockWidget()
-        self.props_panel = PropertyPanel(self.scene, self)
+        # 2) Панель свойств — док создаём сразу (до любых addDockWidget()),
+        #    а сам PropertyPanel — лениво, см. _ensure_props_panel()
+        self.props_panel = None
         self.props_dock = QDockWidget("Свойства", self)
-        self.props_dock.setWidget(self.props_panel)
         self.props_dock.setMinimumWidth(300)
         self.addDockWidget(Qt.RightDockWidgetArea, self.props_dock)
 
-        # 3) Палитра
-        self.palette = PalettePanel()
+        # 3) Палитра — так же: оболочка сейчас, содержимое после первого кадра
+        self.palette = None
         self.palette_dock = QDockWidget("Палитра", self)
-        self.palette_dock.setWidget(self.palette)
         self.palette_dock.setMinimumWidth(260)
         # Палитра
         self.palette_dock.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
@@ -54,6 +55,27 @@ class MainWindow(QMainWindow):
 
         self.addDockWidget(Qt.LeftDockWidgetArea, self.palette_dock)
 
+        # Проверка плана — скрыта, пока её не вызвали (или импорт не нашёл проблем)
+        self.validation_panel = None
+        self.validation_dock = QDockWidget("Проверка", self)
+        self.validation_dock.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.validation_dock)
+        self.validation_dock.hide()
+
+        # Поиск по названиям/описаниям — тоже по требованию (Ctrl+F)
+        self.search_panel = None
+        self.search_dock = QDockWidget("Поиск", self)
+        self.search_dock.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+        self.search_dock.visibilityChanged.connect(
+            lambda vis: vis and self._started and self._ensure_search_panel())
+        self._started = False
+        self.props_dock.visibilityChanged.connect(
+            lambda vis: vis and self._started and self._ensure_props_panel())
+        self.palette_dock.visibilityChanged.connect(
+            lambda vis: vis and self._started and self._ensure_palette())
+
         # 4) Тулбар/статус
         self.undo_manager = UndoManager(on_change=self._update_status)
         self._build_toolbar()
@@ -73,25 +95,132 @@ class MainWindow(QMainWindow):
         self.scene.selectionChanged.connect(_show_props_if_hidden)
         self.scene.selectionChanged.connect(self._on_scene_selection)
 
-        # 6) Фокус из панели (дабл-клик по прибору/мебели/комнате)
-        self.props_panel.requestFocusItem.connect(self._focus_item)
-
-        # 7) Стартовое состояние
-        self.undo_manager.push(json.dumps(self.scene.serialize()))
+        # 6) Стартовое состояние. Наполнение доков, снапшот пустой сцены и автосейв —
+        #    после первого кадра, чтобы не задерживать показ окна
         self.scene.apply_layer_state()
+        self.view.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, ev):
+        if not self._started and ev.type() == QEvent.Paint and obj is self.view.viewport():
+            self.view.viewport().removeEventFilter(self)
+            QTimer.singleShot(0, self._finish_startup)
+        return super().eventFilter(obj, ev)
+
+    def _finish_startup(self):
+        if self._started:
+            return
+        self._started = True
+        if self.props_dock.isVisible():
+            self._ensure_props_panel()
+        if self.palette_dock.isVisible():
+            self._ensure_palette()
+        if self.undo_manager.top() is None:
+            self.undo_manager.push(self.scene.serialize())
         self._update_status()
 
-    def _build_properties_panel(self):
-        self.props_panel = PropertyPanel(self.scene, self)
-        self.props_dock = QDockWidget("Свойства", self)
-        self.props_dock.setWidget(self.props_panel)
-        self.addDockWidget(Qt.LeftDockWidgetArea, self.props_dock)
-        self.props_dock.setMinimumWidth(300)
+    # ---- ленивые панели ----
+    def _ensure_props_panel(self):
+        if self.props_panel is None:
+            from files.properties import PropertyPanel
+            self.props_panel = PropertyPanel(self.scene, self)
+            self.props_dock.setWidget(self.props_panel)
+            # Фокус из панели (дабл-клик по прибору/мебели/комнате)
+            self.props_panel.requestFocusItem.connect(self._focus_item)
+        return self.props_panel
+
+    def _ensure_validation_panel(self):
+        if self.validation_panel is None:
+            from files.validation_panel import ValidationPanel
+            self.validation_panel = ValidationPanel(self.scene, self)
+            self.validation_dock.setWidget(self.validation_panel)
+            self.validation_panel.requestFocusItem.connect(self._focus_item)
+        return self.validation_panel
+
+    def _ensure_search_panel(self):
+        if self.search_panel is None:
+            from files.search_panel import SearchPanel
+            self.search_panel = SearchPanel(self.scene, self)
+            self.search_dock.setWidget(self.search_panel)
+            self.search_panel.requestFocusItem.connect(self._focus_item)
+        return self.search_panel
+
+    def _show_search(self):
+        panel = self._ensure_search_panel()
+        self.search_dock.show()
+        self.search_dock.raise_()
+        panel.focus_query()
+
+    def _validate_plan(self, show_if_clean: bool = True):
+        """Проверка всего плана; док показывается, если есть проблемы (или проверку вызвали вручную)."""
+        issues = self._ensure_validation_panel().run()
+        if issues or show_if_clean:
+            self.validation_dock.show()
+            self.validation_dock.raise_()
+        if issues:
+            self._status(f"Проверка плана: проблем — {len(issues)}")
+        return issues
+
+    def _ensure_palette(self):
+        if self.palette is None:
+            from files.palette import PalettePanel
+            self.palette = PalettePanel()
+            self.palette_dock.setWidget(self.palette)
+        return self.palette
+
+    # ---- поэтапная загрузка ----
+    def load_data_async(self, data: dict, label: str = ""):
+        """Наполняет сцену порциями по таймеру: окно уже показано и не подвисает на больших планах."""
+        self._stop_loading()
+        self._load_steps = self.scene.iter_deserialize(data)
+        self._load_label = label
+        self.view.setInteractive(False)
+        # правки и чтение всего плана — только по готовой сцене: генератор держит ссылки на комнаты
+        self._load_locked = [(a, a.isEnabled()) for a in self._load_sensitive_actions()]
+        for a, _ in self._load_locked:
+            a.setEnabled(False)
+        self._load_timer = QTimer(self)
+        self._load_timer.setInterval(0)
+        self._load_timer.timeout.connect(self._load_step)
+        self._load_timer.start()
+
+    def _load_step(self):
+        try:
+            done, total = next(self._load_steps)
+            self.statusBar().showMessage(f"Загрузка: {done} / {total}…")
+        except StopIteration:
+            self._stop_loading()
+            self.undo_manager.reset(self.scene.serialize())
+            self.scene.apply_layer_state()
+            self._status(f"Открыт проект: {self._load_label}" if self._load_label else "Проект открыт.")
+            self._validate_plan(show_if_clean=False)
+        except Exception as e:
+            self._stop_loading()
+            QMessageBox.critical(self, "Ошибка открытия", str(e))
+
+    def _stop_loading(self):
+        timer = getattr(self, "_load_timer", None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+            self._load_timer = None
+        self._load_steps = None
+        self.view.setInteractive(True)
+        for a, enabled in getattr(self, "_load_locked", ()):
+            a.setEnabled(enabled)
+        self._load_locked = []
+
+    def _load_sensitive_actions(self):
+        return (self.act_undo, self.act_redo, self.act_open, self.act_save, self.act_import_into,
+                self.act_export, self.act_export_image, self.act_paste, self.act_duplicate, self.act_array,
+                self.act_cables, self.act_cable_bom, self.act_collab_host, self.act_collab_join, self.act_compare)
 
     def _on_scene_selection(self):
+        if not isValid(self.scene):
+            return   # окно закрывается, сцена уже разрушена
+        self.scene.show_route(None)
         sel = [it for it in self.scene.selectedItems() if hasattr(it, "props")]
         item = sel[0] if sel else None
-        self.props_panel.load_item(item)
+        self._ensure_props_panel().load_item(item)
     
     def _sep_label(self, tb: QToolBar, text: str):
         lbl = QLabel(f"  {text}  ")
@@ -108,13 +237,6 @@ class MainWindow(QMainWindow):
         kind = "Комната" if item.props.kind == "room" else "Прибор"
         self._status(f"Перешли к: {kind} — {item.props.name or '(без названия)'}")
 
-    def _build_palette(self):
-        self.palette = PalettePanel()
-        self.palette_dock = QDockWidget("Палитра", self)
-        self.palette_dock.setWidget(self.palette)
-        self.addDockWidget(Qt.RightDockWidgetArea, self.palette_dock)
-        self.palette_dock.setMinimumWidth(260)
-
     def _build_toolbar(self):
         tb = QToolBar("Панель", self)
         tb.setMovable(False)
@@ -137,6 +259,52 @@ class MainWindow(QMainWindow):
         self.act_snap.setChecked(True)
         self.act_snap.toggled.connect(lambda on: setattr(self.scene, "snap_to_grid", on))
 
+        self.act_guides = QAction(ico("assets/icons/grid.svg", QStyle.SP_DialogResetButton),
+                                  "Направляющие", self, checkable=True)
+        self.act_guides.setChecked(True)
+        self.act_guides.toggled.connect(lambda on: setattr(self.scene, "smart_guides", on))
+
+        self.act_coverage = QAction(ico("assets/icons/device_router.svg", QStyle.SP_DriveNetIcon),
+                                    "Покрытие Wi-Fi", self, checkable=True)
+        self.act_coverage.toggled.connect(self._toggle_coverage)
+        self._coverage = None
+
+        self.act_visibility = QAction(ico("assets/icons/device_camera.svg", QStyle.SP_FileDialogContentsView),
+                                      "Обзор датчиков", self, checkable=True)
+        self.act_visibility.toggled.connect(self._toggle_visibility)
+        self._visibility = None
+
+        self.act_route = QAction(ico("assets/icons/export.svg", QStyle.SP_ArrowRight), "Маршрут", self)
+        self.act_route.setShortcut(QKeySequence("Ctrl+Shift+R"))
+        self.act_route.setToolTip("Два выделенных объекта — путь между ними через двери; один — путь к выходу")
+        self.act_route.triggered.connect(self._show_route)
+
+        self.act_cables = QAction(ico("assets/icons/device_hub.svg", QStyle.SP_DriveNetIcon), "Трассы кабелей", self)
+        self.act_cables.setToolTip("Трассы от хаба/роутера/розетки к приборам выделенной комнаты (или всего плана)")
+        self.act_cables.triggered.connect(lambda: self._route_cables())   # triggered(bool) не должен попасть в rooms
+        self.act_cable_bom = QAction(ico("assets/icons/export.svg", QStyle.SP_ArrowRight),
+                                     "Спецификация кабеля (CSV)…", self)
+        self.act_cable_bom.triggered.connect(self._export_cable_bom)
+        self._cables = None
+        self._cable_job = None
+
+        self.act_collab_host = QAction(ico("assets/icons/device_hub.svg", QStyle.SP_DriveNetIcon),
+                                       "Открыть совместную сессию…", self)
+        self.act_collab_host.triggered.connect(self._collab_host)
+        self.act_collab_join = QAction(ico("assets/icons/open.svg", QStyle.SP_DriveNetIcon),
+                                       "Подключиться к сессии…", self)
+        self.act_collab_join.triggered.connect(self._collab_join)
+        self.act_collab_close = QAction("Завершить сессию", self)
+        self.act_collab_close.triggered.connect(self._collab_close)
+        self.act_collab_close.setEnabled(False)
+        self._collab = None
+
+        self.act_compare = QAction(ico("assets/icons/open.svg", QStyle.SP_FileDialogContentsView),
+                                   "Сравнить с файлом…", self, checkable=True)
+        self.act_compare.setToolTip("Подсветить отличия плана от другой версии проекта")
+        self.act_compare.toggled.connect(self._toggle_compare)
+        self._diff = None
+
         # ОТКРЫТЬ/СОХРАНИТЬ ПРОЕКТ (.sh | .json)
         self.act_open = QAction(ico("assets/icons/open.svg", QStyle.SP_DirOpenIcon),
                                 "Открыть проект…", self)
@@ -158,6 +326,11 @@ class MainWindow(QMainWindow):
         self.act_export.setShortcut(QKeySequence("Ctrl+E"))
         self.act_export.triggered.connect(self._export_json_dialog)
 
+        self.act_export_image = QAction(ico("assets/icons/export.svg", QStyle.SP_ArrowRight),
+                                        "Экспорт изображения…", self)
+        self.act_export_image.setShortcut(QKeySequence("Ctrl+Shift+E"))
+        self.act_export_image.triggered.connect(self._export_image_dialog)
+
         self.act_undo = QAction(ico("assets/icons/undo.svg", QStyle.SP_ArrowBack), "Откат", self)
         self.act_undo.setShortcut(QKeySequence("Ctrl+Z"))
         self.act_undo.triggered.connect(self._undo)
@@ -166,6 +339,36 @@ class MainWindow(QMainWindow):
         self.act_redo.setShortcut(QKeySequence("Ctrl+Y"))
         self.act_redo.triggered.connect(self._redo)
 
+        self.act_copy = QAction("Копировать", self)
+        self.act_copy.setShortcut(QKeySequence.Copy)
+        self.act_copy.triggered.connect(self._copy)
+        self.act_paste = QAction("Вставить", self)
+        self.act_paste.setShortcut(QKeySequence.Paste)
+        self.act_paste.setToolTip("Вставить под курсор (или рядом с оригиналом)")
+        self.act_paste.triggered.connect(self._paste)
+        self.act_duplicate = QAction("Дублировать", self)
+        self.act_duplicate.setShortcut(QKeySequence("Ctrl+D"))
+        self.act_duplicate.triggered.connect(self._duplicate)
+        self.act_array = QAction("Массив…", self)
+        self.act_array.setToolTip("Разместить прибор или мебель рядами в комнате")
+        self.act_array.triggered.connect(self._array_tool)
+        # сочетания должны работать и при закрытом меню
+        self.addActions([self.act_copy, self.act_paste, self.act_duplicate])
+
+        self.act_validate = QAction(ico("assets/icons/grid.svg", QStyle.SP_MessageBoxWarning),
+                                    "Проверить план", self)
+        self.act_validate.setShortcut(QKeySequence("Ctrl+Shift+V"))
+        self.act_validate.triggered.connect(lambda: self._validate_plan())
+
+        self.act_search = QAction(ico("assets/icons/view.svg", QStyle.SP_FileDialogContentsView),
+                                  "Найти…", self)
+        self.act_search.setShortcut(QKeySequence("Ctrl+F"))
+        self.act_search.triggered.connect(self._show_search)
+
+        self.act_minimap = QAction("Мини-карта", self, checkable=True)
+        self.act_minimap.setChecked(True)
+        self.act_minimap.toggled.connect(self.view.minimap.setVisible)
+
         self.act_settings = QAction(ico("assets/icons/settings.svg", QStyle.SP_FileDialogDetailedView),
                                     "Настройки", self)
         self.act_settings.triggered.connect(lambda: None)
@@ -207,21 +410,45 @@ class MainWindow(QMainWindow):
             m.addSeparator()
             m.addAction(self.act_save)
             m.addAction(self.act_export)
+            m.addAction(self.act_export_image)
+            m.addAction(self.act_cable_bom)
+            m.addSeparator()
+            m.addAction(self.act_compare)
+            m.addSeparator()
+            m.addAction(self.act_collab_host)
+            m.addAction(self.act_collab_join)
+            m.addAction(self.act_collab_close)
         add_menu_button("Проект", "assets/icons/open.svg", QStyle.SP_DirOpenIcon, build_project_menu)
 
         # Редактирование
         def build_edit_menu(m: QMenu):
             m.addAction(self.act_snap)
+            m.addAction(self.act_guides)
+            m.addAction(self.act_coverage)
+            m.addAction(self.act_visibility)
+            m.addAction(self.act_route)
+            m.addAction(self.act_cables)
             m.addAction(self.act_viewmode)
             m.addSeparator()
             m.addAction(self.act_undo)
             m.addAction(self.act_redo)
+            m.addSeparator()
+            m.addAction(self.act_copy)
+            m.addAction(self.act_paste)
+            m.addAction(self.act_duplicate)
+            m.addAction(self.act_array)
+            m.addSeparator()
+            m.addAction(self.act_search)
+            m.addAction(self.act_validate)
         add_menu_button("Редактирование", "assets/icons/view.svg", QStyle.SP_DesktopIcon, build_edit_menu)
 
         # Окна
         def build_windows_menu(m: QMenu):
             m.addAction(self.act_toggle_props)
             m.addAction(self.act_toggle_palette)
+            m.addAction(self.validation_dock.toggleViewAction())
+            m.addAction(self.search_dock.toggleViewAction())
+            m.addAction(self.act_minimap)
             m.addSeparator()
             act_welcome = QAction("Стартовый экран", self)
             act_welcome.triggered.connect(self._back_to_welcome)
@@ -238,7 +465,7 @@ class MainWindow(QMainWindow):
             with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             self.scene.deserialize(data)
-            self.undo_manager.push(json.dumps(self.scene.serialize()))
+            self.undo_manager.push(self.scene.serialize())
             self._status("Проект открыт.")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка открытия", str(e))
@@ -257,11 +484,17 @@ class MainWindow(QMainWindow):
             with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             self.scene.import_from_data(data)  # см. п.3
-            self.undo_manager.push(json.dumps(self.scene.serialize()))
+            self.undo_manager.push(self.scene.serialize())
             self._status("Импорт завершён.")
+            self._validate_plan(show_if_clean=False)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка импорта", str(e))
 
+    def closeEvent(self, e):
+        self._stop_cable_job()
+        self.undo_manager.close()   # дописанный лог журнала закрывается вместе с окном
+        super().closeEvent(e)
+
     def _back_to_welcome(self):
         # закрыть редактор и показать стартовое
         from start_window import StartWindow
@@ -286,10 +519,7 @@ class MainWindow(QMainWindow):
         try:
             with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)  # внутри — обычный JSON
-            self.scene.deserialize(data)
-            self.undo_manager.push(json.dumps(self.scene.serialize()))
-            import os
-            self._status(f"Открыт проект: {os.path.basename(path)}")
+            self.load_data_async(data, os.path.basename(path))
         except Exception as e:
             QMessageBox.critical(self, "Ошибка открытия", str(e))
 
@@ -311,6 +541,207 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка экспорта", str(e))
 
+    def _toggle_coverage(self, on: bool):
+        from files.coverage import CoverageOverlay
+        if on and not CoverageOverlay.available():
+            QMessageBox.information(self, "Покрытие Wi-Fi", "Для карты покрытия нужен пакет numpy.")
+            self.act_coverage.setChecked(False)
+            return
+        if on and self._coverage is None:
+            self._coverage = CoverageOverlay(self.scene)
+            n = len(self._coverage.map)
+            self._status(f"Покрытие Wi-Fi: роутеров/хабов — {n}" if n else "На плане нет роутеров или хабов.")
+        elif not on and self._coverage is not None:
+            self._coverage.detach()
+            self._coverage = None
+
+    def _show_route(self):
+        sel = [it for it in self.scene.selectedItems() if hasattr(it, "props")]
+        if len(sel) == 2:
+            route = self.scene.nav.route(sel[0], sel[1])
+            what = f"«{sel[0].props.name}» → «{sel[1].props.name}»"
+        elif len(sel) == 1:
+            route = self.scene.nav.exit_route(sel[0])
+            what = f"«{sel[0].props.name}» → выход"
+        else:
+            self._status("Выделите один объект (путь к выходу) или два (путь между ними).")
+            return
+        if route is None:
+            self.scene.show_route(None)
+            self._status(f"Маршрут {what} не найден: нет связующих дверей.")
+            return
+        self.scene.show_route(route.points)
+        self._status(f"Маршрут {what}: {route.length_m:.1f} м, дверей: {len(route.doors)}")
+
+    def _route_cables(self, rooms=None, then=None):
+        """Трассы считаются в фоне; then(cables) — когда готовы (например, запись спецификации)."""
+        from files import RoomItem
+        from files.routing import CableRouter, RouteThread
+        if self._cable_job is not None:
+            self._status("Трассы уже считаются…")
+            return
+        if rooms is None:
+            rooms = [it for it in self.scene.selectedItems() if isinstance(it, RoomItem)] or None
+        router = CableRouter(self.scene)
+        tasks, meta = router.prepare(rooms)
+        job = self._cable_job = RouteThread(self.scene, tasks, self)
+        job.routed.connect(lambda found: self._on_cables_routed(job, router.cables(found, meta), then))
+        job.failed.connect(lambda msg: QMessageBox.critical(self, "Трассы кабелей", msg))
+        job.finished.connect(lambda: self._on_cable_job_finished(job))
+        self._status("Трассы кабелей: расчёт…")
+        job.start()
+
+    def _on_cables_routed(self, job, cables, then):
+        from files.routing import CableOverlay
+        if job.stale:
+            self._status("План изменился во время расчёта — запустите трассировку заново.")
+            return
+        if self._cables is None:
+            self._cables = CableOverlay(self.scene)
+        self._cables.set_cables(cables)
+        if not cables:
+            self._status("Нет трасс: нужны хаб, роутер или розетка и приборы в комнатах.")
+        else:
+            self._status(f"Трасс: {len(cables)}, кабеля: {sum(c.length_m for c in cables):.1f} м")
+        if then is not None:
+            then(cables)
+
+    def _on_cable_job_finished(self, job):
+        if self._cable_job is job:
+            self._cable_job = None
+        job.deleteLater()
+
+    def _stop_cable_job(self):
+        job, self._cable_job = self._cable_job, None
+        if job is not None:
+            job.requestInterruption()
+            job.wait()
+
+    def _export_cable_bom(self):
+        from files.routing import write_bom
+        path, _ = QFileDialog.getSaveFileName(self, "Спецификация кабеля", "cables.csv", "CSV (*.csv)")
+        if not path:
+            return
+        path = _ensure_ext(path, ".csv")
+
+        def write(cables):
+            try:
+                write_bom(path, cables)
+                self._status(f"Спецификация сохранена: {os.path.basename(path)}")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка экспорта", str(e))
+        self._route_cables(self.scene.walls.rooms(), then=write)   # спецификация — всегда на весь план
+
+    def _collab_session(self):
+        from files.collab import CollabSession
+        self._collab_close()
+        self._collab = CollabSession(self.scene, self)
+        self._collab.statusChanged.connect(self._status)
+        for act, on in ((self.act_collab_host, False), (self.act_collab_join, False), (self.act_collab_close, True)):
+            act.setEnabled(on)
+        return self._collab
+
+    def _collab_host(self):
+        from files.collab import COLLAB_PORT
+        port, ok = QInputDialog.getInt(self, "Совместная сессия", "Порт:", COLLAB_PORT, 1024, 65535)
+        if ok and not self._collab_session().host(port):
+            self._collab_close()
+
+    def _collab_join(self):
+        from files.collab import COLLAB_PORT
+        text, ok = QInputDialog.getText(self, "Подключиться к сессии", "Адрес хоста (host:port):",
+                                        text=f"127.0.0.1:{COLLAB_PORT}")
+        if not ok or not text.strip():
+            return
+        host, _, port = text.strip().rpartition(":")
+        if not host:
+            host, port = port, str(COLLAB_PORT)
+        try:
+            port = int(port)
+        except ValueError:
+            QMessageBox.warning(self, "Подключиться к сессии", f"Неверный порт: {port}")
+            return
+        self._collab_session().join(host, port)
+
+    def _collab_close(self):
+        if self._collab is not None:
+            self._collab.close()
+            self._collab.deleteLater()
+            self._collab = None
+            self._status("Совместная сессия завершена")
+        for act, on in ((self.act_collab_host, True), (self.act_collab_join, True), (self.act_collab_close, False)):
+            act.setEnabled(on)
+
+    def _toggle_compare(self, on: bool):
+        from files.diff import DiffOverlay, load_project, summary
+        if not on:
+            if self._diff is not None:
+                self._diff.detach()
+                self._diff = None
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Сравнить с проектом", "",
+                                              "SmartHome Project (*.sh *.json);;Все файлы (*)")
+        try:
+            other = load_project(path) if path else None
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка открытия", str(e))
+            other = None
+        if other is None:
+            self.act_compare.blockSignals(True)
+            self.act_compare.setChecked(False)
+            self.act_compare.blockSignals(False)
+            return
+        self._diff = DiffOverlay(self.scene, other)
+        names = {"added": "добавлено", "removed": "удалено", "moved": "сдвинуто",
+                 "resized": "изменён размер", "renamed": "переименовано", "edited": "прочее"}
+        parts = [f"{names[k]}: {n}" for k, n in summary(self._diff.changes).items() if n]
+        self._status(f"Отличия от {os.path.basename(path)} — " + (", ".join(parts) if parts else "нет"))
+
+    def _toggle_visibility(self, on: bool):
+        from files.visibility import VisibilityOverlay
+        if on and self._visibility is None:
+            self._visibility = VisibilityOverlay(self.scene)
+            blind = sum(1 for rv in self._visibility.rooms.values() if rv.gaps)
+            if not len(self._visibility.engine):
+                self._status("На плане нет камер или датчиков движения.")
+            else:
+                self._status(f"Датчиков: {len(self._visibility.engine)}; комнат со слепыми зонами: {blind}")
+        elif not on and self._visibility is not None:
+            self._visibility.detach()
+            self._visibility = None
+
+    def _export_image_dialog(self):
+        from files.export import EXPORT_DPI, ExportCancelled, export_scene
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Экспорт изображения",
+            "smarthome_plan.png", "PNG (*.png);;SVG (*.svg);;PDF (*.pdf)"
+        )
+        if not path:
+            return
+        ext = {"PNG": ".png", "SVG": ".svg", "PDF": ".pdf"}.get((selected or "PNG")[:3], ".png")
+        if os.path.splitext(path)[1].lower() not in (".png", ".svg", ".pdf"):
+            path = _ensure_ext(path, ext)
+        dpi, ok = QInputDialog.getInt(self, "Экспорт изображения", "Разрешение, dpi:", EXPORT_DPI, 24, 1200, 50)
+        if not ok:
+            return
+        dlg = QProgressDialog("Экспорт…", "Отмена", 0, 100, self)
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(300)
+
+        def _progress(done, total):
+            dlg.setMaximum(total); dlg.setValue(done)
+            QApplication.processEvents()
+            return not dlg.wasCanceled()
+        try:
+            size = export_scene(self.scene, path, dpi, progress=_progress)
+            self._status(f"Экспортировано: {os.path.basename(path)} ({size.width()}×{size.height()})")
+        except ExportCancelled:
+            self._status("Экспорт отменён.")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка экспорта", str(e))
+        finally:
+            dlg.close()
+
     def _save_project_dialog(self):
         path, _ = QFileDialog.getSaveFileName(
             self, "Сохранить проект",
@@ -326,23 +757,79 @@ class MainWindow(QMainWindow):
             data = self.scene.serialize()
             with open(path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)  # ПИШЕМ JSON, но файл .sh
+            # недавние + миниатюра для стартового экрана (в фоне, файл повторно не читаем)
+            push_recent(path)
+            recent_cache().schedule(path, data)
             self._status(f"Сохранено: {os.path.basename(path)}")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка сохранения", str(e))
 
 
+    # ---- буфер обмена ----
+    def _copy(self):
+        from files.clipboard import copy_items, set_clipboard
+        data = copy_items(self.scene, self.scene.selectedItems())
+        if data is None:
+            self._status("Нечего копировать: ничего не выделено.")
+            return
+        set_clipboard(data)
+        n = sum(len(data[s]) for s in ("rooms", "devices", "furniture", "openings"))
+        self._status(f"Скопировано объектов: {n}")
+
+    def _paste(self):
+        from files.clipboard import clipboard_data, paste
+        data = clipboard_data()
+        if data is None or self.scene.mode != Mode.EDIT:
+            return
+        # под курсор, если он над планом; иначе — рядом с оригиналом
+        vp = self.view.viewport()
+        pos = vp.mapFromGlobal(QCursor.pos())
+        at = self.view.mapToScene(pos) if vp.rect().contains(pos) else None
+        created = paste(self.scene, data, at)
+        self._status(f"Вставлено объектов: {len(created)}" if created else "Вставлять некуда: нет комнаты.")
+
+    def _duplicate(self):
+        from files.clipboard import duplicate
+        if self.scene.mode != Mode.EDIT:
+            return
+        created = duplicate(self.scene, self.scene.selectedItems())
+        if created:
+            self._status(f"Продублировано объектов: {len(created)}")
+
+    def _array_tool(self):
+        from files.array_tool import ArrayDialog
+        from files.items import RoomItem
+        if self.scene.mode != Mode.EDIT:
+            return
+        # комната — выделенная (или комната выделенного прибора), объект — выбранная плитка палитры
+        room = None
+        for it in self.scene.selectedItems():
+            room = it if isinstance(it, RoomItem) else it.parentItem()
+            if isinstance(room, RoomItem):
+                break
+            room = None
+        entry = self.palette.current_entry() if self.palette is not None else None
+        dlg = ArrayDialog(self.scene, room, entry, self)
+        if dlg.exec() and dlg.created:
+            self._status(f"Размещено объектов: {len(dlg.created)}")
+
     def _undo(self):
         snap = self.undo_manager.undo()
         if snap is None: return
-        self.scene.deserialize(json.loads(snap))
+        self._restore_snapshot(snap)
         self._update_status()
 
     def _redo(self):
         snap = self.undo_manager.redo()
         if snap is None: return
-        self.scene.deserialize(json.loads(snap))
+        self._restore_snapshot(snap)
         self._update_status()
 
+    def _restore_snapshot(self, snap):
+        um = self.undo_manager
+        created = self.scene.restore_records(um.canvas(snap), um.records(snap))
+        self.scene.apply_layer_state(created)
+
     def _toggle_viewmode(self, on: bool):
         self.scene.mode = Mode.VIEW if on else Mode.EDIT
         self.scene.set_editable(not on)
@@ -356,10 +843,11 @@ class MainWindow(QMainWindow):
 
 
     def _update_status(self):
+        canvas = self.scene.sceneRect()
         self.statusBar().showMessage(
             f"Режим: {'Просмотр' if self.scene.mode==Mode.VIEW else 'Редактирование'} | "
             f"Сетка: {'ON' if self.scene.snap_to_grid else 'OFF'} | "
-            f"Холст: {int(SCENE_W)}×{int(SCENE_H)} px"
+            f"Холст: {int(canvas.width())}×{int(canvas.height())} px"
         )
 
 
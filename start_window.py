@@ -2,13 +2,15 @@
 from __future__ import annotations
 import os, json
 from pathlib import Path
-from PySide6.QtCore import Qt, QSize, QSettings
+from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFrame, QPushButton, QListWidget,
-    QListWidgetItem, QFileDialog, QMessageBox, QToolButton, QLabel
+    QListWidgetItem, QFileDialog, QMessageBox, QToolButton, QLabel, QProgressBar
 )
-from smarthome_editor import MainWindow
+from files.loader import ProjectReader
+from files import journal
+from files.recent import recent_paths, push_recent, recent_cache, lookup, describe, THUMB_W, THUMB_H
 
 # ========= THEME (dark tech) =========
 ACCENT           = "#22D3EE"   # неон-циан (акцент)
@@ -69,6 +71,15 @@ class StartWindow(QWidget):
         self.btn_cont = QPushButton("Открыть автосохранённый");   self._style_action_btn(self.btn_cont)
 
         vact.addWidget(self.btn_new); vact.addWidget(self.btn_open); vact.addWidget(self.btn_cont)
+
+        # Прогресс фоновой загрузки (скрыт, пока ничего не читаем)
+        self.load_row = QWidget(actions)
+        hl = QHBoxLayout(self.load_row); hl.setContentsMargins(0, 4, 0, 0); hl.setSpacing(8)
+        self.load_progress = QProgressBar(); self.load_progress.setRange(0, 100); self.load_progress.setTextVisible(True)
+        self.btn_cancel_load = QPushButton("Отмена")
+        hl.addWidget(self.load_progress, 1); hl.addWidget(self.btn_cancel_load)
+        self.load_row.setVisible(False)
+        vact.addWidget(self.load_row)
         left.addWidget(actions)
 
         # Карточка «Недавние» (синяя)
@@ -77,6 +88,7 @@ class StartWindow(QWidget):
         rcap = QLabel("Недавние проекты"); rcap.setObjectName("RecentTitle"); vrec.addWidget(rcap)
 
         self.list_recent = QListWidget(); self.list_recent.setObjectName("RecentList"); vrec.addWidget(self.list_recent, 1)
+        self.list_recent.setIconSize(QSize(THUMB_W, THUMB_H))
         left.addWidget(recent, 1)
 
         mid.addLayout(left, 0)
@@ -88,10 +100,13 @@ class StartWindow(QWidget):
         self.btn_open.clicked.connect(self._open)
         self.btn_cont.clicked.connect(self._continue)
         self.list_recent.itemDoubleClicked.connect(self._open_recent)
+        self.btn_cancel_load.clicked.connect(self._cancel_read)
+        self._reader: ProjectReader | None = None
 
         # Данные
+        recent_cache().updated.connect(self._on_recent_cached)
         self._load_recent()
-        self.btn_cont.setEnabled(Path(AUTOSAVE_PATH).exists())
+        self.btn_cont.setEnabled(journal.exists(AUTOSAVE_PATH))
 
         # Стиль
         self._apply_qss()
@@ -101,7 +116,8 @@ class StartWindow(QWidget):
         from pathlib import Path
         bg_exists = Path(START_BG_PATH).exists()
         if bg_exists:
-            bg_css = f"background: url('{START_BG_PATH.replace('\\', '/')}') center/cover no-repeat fixed;"
+            bg_url = START_BG_PATH.replace("\\", "/")
+            bg_css = f"background: url('{bg_url}') center/cover no-repeat fixed;"
         else:
             bg_css = ("background: radial-gradient(1200px 800px at 20% 0%, #0B1220 0%, "
                     "#0B1220 30%, #0A1020 65%, #0A0F1D 100%);")
@@ -195,30 +211,89 @@ class StartWindow(QWidget):
 
     # ---------- DATA ----------
     def _load_recent(self):
+        # проекты не парсим: meta и миниатюра берутся из кэша по (путь, mtime, размер)
         self.list_recent.clear()
-        st = QSettings("SmartHome", "Editor")
-        files = st.value("recent", [], list)
-        for p in files:
+        for p in recent_paths():
             if os.path.exists(p):
-                self.list_recent.addItem(QListWidgetItem(p))
+                li = QListWidgetItem()
+                li.setData(Qt.UserRole, p)
+                self.list_recent.addItem(li)
+                if not self._fill_recent_item(li):
+                    recent_cache().schedule(p)   # записи нет — соберём в фоне
+
+    def _fill_recent_item(self, li: QListWidgetItem) -> bool:
+        path = li.data(Qt.UserRole)
+        cached = lookup(path)
+        if cached is None:
+            li.setText(f"{os.path.basename(path)}\n{path}")
+            return False
+        meta, pm = cached
+        li.setText(f"{os.path.basename(path)}\n{path}\n{describe(meta)}")
+        if pm is not None:
+            li.setIcon(QIcon(pm))
+        return True
+
+    def _on_recent_cached(self, path: str):
+        for i in range(self.list_recent.count()):
+            li = self.list_recent.item(i)
+            if li.data(Qt.UserRole) == path:
+                self._fill_recent_item(li)
 
     def _push_recent(self, path: str):
-        st = QSettings("SmartHome", "Editor")
-        files = st.value("recent", [], list)
-        if path in files: files.remove(path)
-        files.insert(0, path)
-        st.setValue("recent", files[:12])
-
-    def _launch_editor(self, data: dict | None):
-        # Переход в редактор — СРАЗУ полноэкранно
+        push_recent(path)
+
+    def _launch_editor(self, data: dict | None, label: str = ""):
+        # Переход в редактор — СРАЗУ полноэкранно, объекты подгружаются порциями уже в открытом окне
+        from smarthome_editor import MainWindow   # лениво: стартовый экран не ждёт импорта редактора
         self.hide()
         self.editor = MainWindow()
-        if data:
-            try: self.editor.scene.deserialize(data)
-            except Exception: pass
         self.editor.showFullScreen()     # ← как просил
+        if data:
+            self.editor.load_data_async(data, label)
         self.close()
 
+    # ---------- ФОНОВОЕ ЧТЕНИЕ ----------
+    def _read_async(self, path: str, remember: bool, journaled: bool = False):
+        if self._reader is not None:
+            return
+        self._reader = ProjectReader(path, self, journaled)
+        self._reader.progress.connect(self.load_progress.setValue)
+        self._reader.loaded.connect(lambda data, p=path, r=remember: self._on_read(p, data, r))
+        self._reader.failed.connect(lambda msg: QMessageBox.critical(self, "Ошибка", msg))
+        self._reader.finished.connect(self._on_reader_finished)
+        self._set_busy(True)
+        self._reader.start()
+
+    def _on_read(self, path: str, data: dict, remember: bool):
+        if self._reader is None or self._reader.isInterruptionRequested():
+            return
+        if remember:
+            self._push_recent(path)
+        self._launch_editor(data, os.path.basename(path))
+
+    def _cancel_read(self):
+        if self._reader is not None:
+            self._reader.cancel()
+
+    def _on_reader_finished(self):
+        if self._reader is not None:
+            self._reader.deleteLater()
+            self._reader = None
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool):
+        self.load_progress.setValue(0)
+        self.load_row.setVisible(busy)
+        for b in (self.btn_new, self.btn_open, self.list_recent):
+            b.setEnabled(not busy)
+        self.btn_cont.setEnabled(not busy and journal.exists(AUTOSAVE_PATH))
+
+    def closeEvent(self, e):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader.wait()
+        super().closeEvent(e)
+
     # ---------- ACTIONS ----------
     def _new(self):
         self._launch_editor(None)
@@ -226,28 +301,14 @@ class StartWindow(QWidget):
     def _open(self):
         path, _ = QFileDialog.getOpenFileName(self, "Открыть проект", "", "JSON (*.json)")
         if not path: return
-        try:
-            with open(path, "r", encoding="utf-8") as f: data = json.load(f)
-            self._push_recent(path)
-            self._launch_editor(data)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+        self._read_async(path, remember=True)
 
     def _continue(self):
-        if not os.path.exists(AUTOSAVE_PATH):
+        if not journal.exists(AUTOSAVE_PATH):
             QMessageBox.information(self, "Нет автосохранения", "Файл автосохранения не найден.")
             return
-        try:
-            with open(AUTOSAVE_PATH, "r", encoding="utf-8") as f: data = json.load(f)
-            self._launch_editor(data)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+        # контрольная точка + хвост журнала правок
+        self._read_async(AUTOSAVE_PATH, remember=False, journaled=True)
 
     def _open_recent(self, it: QListWidgetItem):
-        path = it.text()
-        try:
-            with open(path, "r", encoding="utf-8") as f: data = json.load(f)
-            self._push_recent(path)
-            self._launch_editor(data)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+        self._read_async(it.data(Qt.UserRole), remember=True)